@@ -0,0 +1,158 @@
+import time
+
+import numpy as np
+
+from generate_array_netlists import read_weights, weight_file
+
+
+# Arr{i}网表的行为级模型（与generate_array_netlists.py生成的结构一一对应）
+#
+# Cell: 96行分6组，每组16行；第k行权重为1时NMOS接mid_out{k//16}，row_en<k%16>选通，
+#       row_2level<k//16>把mid_out接到Cell_out。预充后只要有一条被选中且权重为1的通路，
+#       并且该IC的输入位为1，Cell_out就被放电，记为输出1（多行同时选中时为"线或"）。
+# Col:  16个IC的Cell输出进入AdderTree_domino（计数0~16，5位），最高位列为AdderTree_sign_domino(6位)。
+#       sign_inv<i> = IN<i> & cnt_b7，输入符号位周期内该IC的贡献取负。
+# 8Cols: Bit_shifter_full把8列按位权移位相加，权重最高位(Col7)为补码符号位取负，输出13位补码SUM。
+# Arr:  16个OC，SUM<13*oc+n>为第oc个输出的第n位（n=0为LSB），共208位。
+#
+# 端口约定：IN<i>为第i个IC在当前周期的输入位（正逻辑，IN_N_BUF的反相/门控在阵列内部），
+#           row_en1<0:15>与row_en2<0:5>两级选中第 16*g + r 行。
+
+
+class CimArrayModel:
+    """
+    单个Arr{i}的向量化行为模型
+
+    参数:
+    weights: ICn*rows行 x OCn*bits列的0/1矩阵（output_{i}.txt的内容，每个OC的8位中MSB在前）
+    ICn, OCn, rows, bits, group: 阵列几何参数，与NetlistTemplate一致
+    """
+    def __init__(self, weights, ICn=16, OCn=16, rows=96, bits=8, group=16):
+        self.ICn, self.OCn, self.rows, self.bits, self.group = ICn, OCn, rows, bits, group
+        self.levels = rows // group
+        self.sum_width = bits + ICn.bit_length()
+        w = np.asarray(weights, dtype=np.uint8).reshape(ICn, rows, OCn, bits)
+        # 内部统一为[row][IC][OC][bit]，bit维LSB在前
+        self.w_bits = np.ascontiguousarray(w[..., ::-1].transpose(1, 0, 2, 3))
+        # 每列的位权：最高位为符号位
+        self.bit_weights = 2 ** np.arange(bits, dtype=np.int64)
+        self.bit_weights[-1] = -self.bit_weights[-1]
+
+    @classmethod
+    def from_file(cls, filename, **kwargs):
+        return cls(read_weights(filename), **kwargs)
+
+    def weight_matrix(self, line):
+        """第line行存储的有符号权重矩阵，形状(IC, OC)"""
+        return self.w_bits[line].astype(np.int64) @ self.bit_weights
+
+    def row_select(self, row_en1, row_en2):
+        """两级行选择 -> (B, rows)的选中行掩码"""
+        row_en1 = np.asarray(row_en1, dtype=bool).reshape(-1, self.group)
+        row_en2 = np.asarray(row_en2, dtype=bool).reshape(-1, self.levels)
+        return (row_en2[:, :, None] & row_en1[:, None, :]).reshape(-1, self.rows)
+
+    def cell_outputs(self, IN, row_en1, row_en2):
+        """
+        所有Cell的求值结果
+
+        返回:
+        (B, IC, OC, bits)的0/1数组，1表示Cell_out被放电
+        """
+        IN = np.asarray(IN, dtype=bool).reshape(-1, self.ICn)
+        sel = self.row_select(row_en1, row_en2)
+        n_sel = sel.sum(axis=1)
+        if (n_sel == 1).all():
+            # 常见情况：每次只选中一行，直接按行号取权重
+            hit = self.w_bits[sel.argmax(axis=1)].astype(bool)
+        else:
+            flat = self.w_bits.reshape(self.rows, -1).astype(np.float32)
+            hit = (sel.astype(np.float32) @ flat > 0).reshape(len(sel), self.ICn, self.OCn, self.bits)
+        return hit & IN[:, :, None, None]
+
+    def column_counts(self, IN, row_en1, row_en2, cnt_b7):
+        """
+        每列加法树的有符号输出
+
+        返回:
+        (B, OC, bits)的整数数组，bit维LSB在前
+        """
+        IN = np.asarray(IN, dtype=bool).reshape(-1, self.ICn)
+        cnt_b7 = np.asarray(cnt_b7, dtype=bool).reshape(-1)
+        cells = self.cell_outputs(IN, row_en1, row_en2)
+        sign = (1 - 2 * (IN & cnt_b7[:, None])).astype(np.float32)
+        # 计数值很小，用float32批量矩阵乘是精确的
+        counts = np.matmul(sign[:, None, :], cells.reshape(len(cells), self.ICn, -1).astype(np.float32))
+        return counts.reshape(len(cells), self.OCn, self.bits).astype(np.int64)
+
+    def combine(self, counts):
+        """Bit_shifter_full: 各列按位权移位相加，返回(B, OC)的有符号SUM"""
+        return counts @ self.bit_weights
+
+    def sums(self, IN, row_en1, row_en2, cnt_b7):
+        """每个OC的13位SUM（有符号整数），形状(B, OC)"""
+        return self.combine(self.column_counts(IN, row_en1, row_en2, cnt_b7))
+
+    def sum_bits(self, IN, row_en1, row_en2, cnt_b7):
+        """SUM<0:207>的各位，形状(B, OC*sum_width)，第13*oc+n列为第oc个输出的第n位"""
+        return to_sum_bits(self.sums(IN, row_en1, row_en2, cnt_b7), self.sum_width)
+
+    def matvec(self, x, line):
+        """
+        按位串行输入完成一次完整的向量-矩阵乘
+
+        参数:
+        x: (B, IC)的有符号整数输入（bits位补码）
+        line: 使用的权重行号，整数或(B,)数组
+
+        返回:
+        (B, OC)的整数结果，等于 x @ weight_matrix(line)
+        """
+        x = np.asarray(x, dtype=np.int64).reshape(-1, self.ICn)
+        B = len(x)
+        line = np.broadcast_to(np.asarray(line), (B,))
+        row_en1 = np.zeros((B, self.group), dtype=bool)
+        row_en2 = np.zeros((B, self.levels), dtype=bool)
+        row_en1[np.arange(B), line % self.group] = True
+        row_en2[np.arange(B), line // self.group] = True
+        x_u = x & ((1 << self.bits) - 1)
+        y = np.zeros((B, self.OCn), dtype=np.int64)
+        for t in range(self.bits):
+            IN = (x_u >> t) & 1
+            cnt_b7 = np.full(B, t == self.bits - 1)
+            y += self.sums(IN, row_en1, row_en2, cnt_b7) << t
+        return y
+
+
+def to_sum_bits(sums, width=13):
+    """有符号SUM -> width位补码的各位（LSB在前），(B, OC) -> (B, OC*width)"""
+    sums = np.asarray(sums, dtype=np.int64)
+    u = sums & ((1 << width) - 1)
+    bits = (u[..., None] >> np.arange(width)) & 1
+    return bits.reshape(len(sums), -1).astype(np.uint8)
+
+
+def from_sum_bits(bits, width=13):
+    """width位补码的各位 -> 有符号SUM，(B, OC*width) -> (B, OC)"""
+    bits = np.asarray(bits, dtype=np.int64).reshape(len(bits), -1, width)
+    u = bits @ (1 << np.arange(width, dtype=np.int64))
+    return u - ((u >> (width - 1)) << width)
+
+
+# main
+if __name__ == '__main__':
+    import os
+    rng = np.random.default_rng(0)
+    if os.path.exists(weight_file(1)):
+        model = CimArrayModel.from_file(weight_file(1))
+    else:
+        model = CimArrayModel(rng.integers(0, 2, (16*96, 16*8)))
+
+    B = 10000
+    x = rng.integers(-128, 128, (B, 16))
+    line = rng.integers(0, 96, B)
+    start = time.time()
+    y = model.matvec(x, line)
+    print(f"{B}组输入 x {model.bits}周期: {time.time() - start:.3f}s")
+    ref = np.einsum('bi,bio->bo', x, np.stack([model.weight_matrix(l) for l in range(model.rows)])[line])
+    print("与直接矩阵乘一致:", np.array_equal(y, ref))
@@ -0,0 +1,194 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from cim_array_model import CimArrayModel
+from generate_array_netlists import weight_file
+
+
+# CIM阵列激活的能耗/延迟解析模型
+#
+# 一次Arr激活 = 选中一条line，输入向量按位串行送入bits个周期。每个周期：
+#   所有Cell_out预充；输入为1且所选line权重为1的Cell放电，放电时还要拉低mid_out{g}上所有下拉器件的结电容
+#   （器件数 = 该Cell第g组16行中权重为1的行数，即网表中接mid_out{g}的NMOS个数）；
+#   IN翻转驱动本IC所有Cell的门控；row_en1/row_en2驱动全部Cell；
+#   AdderTree_domino（5位）/AdderTree_sign_domino（6位，最高位列）对放电的Cell计数；Bit_shifter_full每OC一次。
+# 能耗对各器件常数是线性的：energy = features @ 常数，可以用SPICE结果按最小二乘标定（calibrate）。
+# 延迟：每周期 = 预充 + 放电(随所选组mid_out上的器件数增加) + 加法树 + 移位器，一次激活为bits个周期。
+
+ENERGY_TERMS = ['precharge', 'discharge', 'mid_load', 'in_toggle', 'row_enable', 'sign_count', 'tree', 'shifter']
+
+# 能耗常数(fJ)：每Cell每周期预充、每次放电、放电时每个mid_out器件、IN翻转时每个扇出Cell、
+# 行使能每周期每个Cell、符号列每计数一次的附加能耗、每个加法树每周期、每个OC每周期的移位器
+DEFAULT_ENERGY = {'precharge': 0.5, 'discharge': 1.0, 'mid_load': 0.05, 'in_toggle': 0.2, 'row_enable': 0.1,
+                  'sign_count': 0.3, 'tree': 5.0, 'shifter': 20.0}
+
+# 延迟常数(ps)
+DEFAULT_TIMING = {'precharge': 200.0, 'eval': 150.0, 'eval_per_device': 8.0, 'adder5': 250.0, 'adder6': 300.0,
+                  'shifter': 200.0}
+
+
+class CimCostModel:
+    """
+    整个宏（多个Arr）的能耗/延迟模型
+
+    参数:
+    w_bits: (阵列数, rows, IC, OC, bits)的0/1数组，bit维LSB在前（与CimArrayModel.w_bits一致）
+    energy, timing: 器件常数，缺省的项使用DEFAULT_ENERGY/DEFAULT_TIMING
+    """
+    def __init__(self, w_bits, group=16, energy=None, timing=None):
+        w = np.asarray(w_bits, dtype=np.int64)
+        self.n_arrays, self.rows, self.ICn, self.OCn, self.bits = w.shape
+        self.group = group
+        self.energy = dict(DEFAULT_ENERGY, **(energy or {}))
+        self.timing = dict(DEFAULT_TIMING, **(timing or {}))
+        levels = self.rows // group
+
+        # 每个Cell第g组中权重为1的行数，即mid_out{g}上的下拉器件数
+        ndev = w.reshape(self.n_arrays, levels, group, self.ICn, self.OCn, self.bits).sum(axis=2)
+        ndev_row = np.repeat(ndev, group, axis=1)
+        # 每条line、每个IC在输入位为1时的放电数、mid_out器件负载、符号列计数（每周期）
+        self.coef = np.stack([w.sum(axis=(3, 4)),
+                              (w * ndev_row).sum(axis=(3, 4)),
+                              w[..., -1].sum(axis=3)], axis=-1).astype(np.float64)
+        # 每条line的周期：所选组中器件最多的mid_out决定放电时间
+        worst = (ndev_row * w).max(axis=(2, 3, 4))
+        t = self.timing
+        adder = max(t['adder5'], t['adder6'])
+        self.cycle_ps = t['precharge'] + t['eval'] + t['eval_per_device'] * worst + adder + t['shifter']
+
+    @classmethod
+    def from_models(cls, models, **kwargs):
+        return cls(np.stack([m.w_bits for m in models]), models[0].group, **kwargs)
+
+    @classmethod
+    def from_weight_data(cls, weight_data, **kwargs):
+        """由权重张量[阵列行][阵列列][line][IC][OC][bit]（bit维MSB在前）构造，阵列编号按行优先"""
+        w = np.asarray(weight_data, dtype=np.uint8)
+        return cls(w.reshape((-1,) + w.shape[2:])[..., ::-1], **kwargs)
+
+    def activity(self, x):
+        """
+        (B, IC)有符号输入的位平面活动
+
+        返回:
+        (ones, toggles): ones为(B, IC)每个IC在bits个周期中为1的次数，toggles为(B,)全部IN的翻转次数（第一个周期前为0）
+        """
+        x_u = np.asarray(x, dtype=np.int64) & ((1 << self.bits) - 1)
+        table = np.array([bin(v).count('1') for v in range(1 << (self.bits + 1))], dtype=np.int64)
+        return table[x_u], table[(x_u ^ (x_u << 1)) & ((1 << self.bits) - 1)].sum(axis=1)
+
+    def features(self, arr, line, ones, toggles, cycles=None):
+        """
+        每次激活的能耗特征
+
+        参数:
+        arr, line: (B,)的阵列号和line号
+        ones, toggles: activity()的结果
+        cycles: 每次激活的周期数，默认bits
+
+        返回:
+        (B, len(ENERGY_TERMS))，与ENERGY_TERMS顺序一致
+        """
+        cycles = self.bits if cycles is None else cycles
+        ones = np.asarray(ones, dtype=np.float64)
+        load = np.einsum('bi,bik->bk', ones, self.coef[np.asarray(arr), np.asarray(line)])
+        cells = self.ICn * self.OCn * self.bits
+        f = np.empty((len(ones), len(ENERGY_TERMS)))
+        f[:, 0] = cells * cycles
+        f[:, 1] = load[:, 0]
+        f[:, 2] = load[:, 1]
+        f[:, 3] = np.asarray(toggles) * self.OCn * self.bits
+        f[:, 4] = cells * cycles
+        f[:, 5] = load[:, 2]
+        f[:, 6] = self.OCn * self.bits * cycles
+        f[:, 7] = self.OCn * cycles
+        return f
+
+    def constants(self):
+        return np.array([self.energy[k] for k in ENERGY_TERMS])
+
+    def activation_energy(self, arr, line, x):
+        """每次激活的能耗(fJ)，x为(B, IC)的有符号输入"""
+        return self.features(arr, line, *self.activity(x)) @ self.constants()
+
+    def activation_latency(self, arr, line):
+        """每次激活的延迟(ps)"""
+        return self.cycle_ps[np.asarray(arr), np.asarray(line)] * self.bits
+
+    def stream_energy(self, arr, stream):
+        """
+        input_encoder.BitPlaneStream的能耗，每bits个周期为一次激活
+
+        返回:
+        (激活数,)的能耗(fJ)
+        """
+        IN = stream.IN.reshape(-1, self.bits, self.ICn).astype(np.int64)
+        line = (stream.row_en2.argmax(axis=1) * self.group + stream.row_en1.argmax(axis=1))[::self.bits]
+        toggles = np.abs(np.diff(IN, axis=1, prepend=0)).sum(axis=(1, 2))
+        return self.features(np.broadcast_to(arr, len(IN)), line, IN.sum(axis=1), toggles) @ self.constants()
+
+    def summary(self, arr, line, x, parallel=True, chunk=1 << 16):
+        """
+        一组激活的总能耗和总延迟（分块计算，内存占用与激活数无关）
+
+        参数:
+        parallel: 不同阵列的激活是否同时进行；为True时总延迟按每个阵列各自的延迟之和取最大
+
+        返回:
+        dict: energy_fJ, latency_ps, breakdown_fJ（各能耗项）
+        """
+        arr = np.asarray(arr)
+        line = np.broadcast_to(np.asarray(line), arr.shape)
+        totals = np.zeros(len(ENERGY_TERMS))
+        for i in range(0, len(arr), chunk):
+            sl = slice(i, i + chunk)
+            totals += self.features(arr[sl], line[sl], *self.activity(x[sl])).sum(axis=0)
+        consts = self.constants()
+        lat = self.activation_latency(arr, line)
+        total_lat = np.bincount(arr, weights=lat, minlength=self.n_arrays).max() if parallel else lat.sum()
+        return {'energy_fJ': float(totals @ consts), 'latency_ps': float(total_lat),
+                'breakdown_fJ': dict(zip(ENERGY_TERMS, totals * consts))}
+
+
+def calibrate(features, measured, terms=ENERGY_TERMS):
+    """
+    由仿真得到的每次激活能耗标定能耗常数（最小二乘，结果截断为非负）
+
+    参数:
+    features: (n, len(terms))，CimCostModel.features()的结果
+    measured: (n,)的能耗(fJ)
+
+    返回:
+    {项: 常数}；每次激活为常数的项(precharge、row_enable、tree、shifter)彼此无法区分，按最小范数解分配，
+    需要分开时应固定其中几项后对残差标定
+    """
+    coef, *_ = np.linalg.lstsq(np.asarray(features, dtype=float), np.asarray(measured, dtype=float), rcond=None)
+    return dict(zip(terms, np.maximum(coef, 0.0)))
+
+
+# main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='CIM宏的能耗/延迟估计')
+    parser.add_argument('-n', '--activations', type=int, default=1000000, help='随机激活次数')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    files = [weight_file(i) for i in range(1, 17)]
+    if all(os.path.exists(f) for f in files):
+        model = CimCostModel.from_models([CimArrayModel.from_file(f) for f in files])
+    else:
+        model = CimCostModel(rng.integers(0, 2, (16, 96, 16, 16, 8)))
+
+    start = time.time()
+    arr = rng.integers(0, model.n_arrays, args.activations)
+    line = rng.integers(0, model.rows, args.activations)
+    x = rng.integers(-128, 128, (args.activations, model.ICn))
+    s = model.summary(arr, line, x)
+    print(f"{args.activations}次激活: {time.time() - start:.2f}s")
+    print(f"总能耗: {s['energy_fJ'] / 1e6:.3f} nJ  每次激活: {s['energy_fJ'] / args.activations:.1f} fJ  "
+          f"总延迟(16阵列并行): {s['latency_ps'] / 1e6:.3f} us")
+    for k, v in s['breakdown_fJ'].items():
+        print(f"  {k:12s} {v / s['energy_fJ']:6.1%}")
@@ -0,0 +1,216 @@
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from cim_array_model import CimArrayModel
+
+
+# CIM阵列的Monte Carlo非理想仿真（在CimArrayModel的行为级结构上注入误差）
+#
+# 每次试验对应一颗芯片实例，试验内对samples组输入做向量化的位串行矩阵乘：
+#   Cell电流失配: 每个权重为1的下拉NMOS驱动能力 d~N(1, sigma)，d < 1-margin 时在求值窗口内放电失败（该试验内固定）；
+#   漏电误放电: 输入为1、权重为0的Cell在每次求值时以p_leak的概率误放电（按列计数做二项分布抽样）；
+#   加法树饱和: 每列计数超过adder_max时饱和（None表示不饱和，AdderTree_domino本身可表示0~16）；
+#   移位器截断: Bit_shifter_full输出去掉trunc_bits个低位，并饱和到sum_width位补码。
+# 误差 = 非理想输出 - 理想输出（整数LSB），按试验汇总统计并累加直方图。
+
+_model = None
+
+
+def build_model(mats, rows=96, bits=8):
+    """
+    由每条line的有符号权重矩阵构造CimArrayModel
+
+    参数:
+    mats: (lines, IC, OC)的整数数组，lines<=rows，其余line为0
+    """
+    mats = np.asarray(mats, dtype=np.int64)
+    lines, ICn, OCn = mats.shape
+    full = np.zeros((rows, ICn, OCn), dtype=np.int64)
+    full[:lines] = mats
+    u = full & ((1 << bits) - 1)
+    w = (u[..., None] >> np.arange(bits - 1, -1, -1)) & 1
+    # output_{i}.txt格式：行 IC*rows+line，列 OC*bits+bit（MSB在前）
+    return CimArrayModel(w.transpose(1, 0, 2, 3).reshape(ICn * rows, OCn * bits), ICn, OCn, rows, bits)
+
+
+def noisy_matvec(model, x, line, fail, rng, p_leak=0.0, adder_max=None, trunc_bits=0):
+    """
+    带非理想因素的位串行矩阵乘
+
+    参数:
+    x: (B, IC)的有符号整数输入
+    line: 权重行号
+    fail: (IC, OC, bits)的bool数组，放电失败的Cell
+
+    返回:
+    (B, OC)的整数结果
+    """
+    x = np.asarray(x, dtype=np.int64)
+    B = len(x)
+    w = model.w_bits[line].astype(bool)
+    w_eff = (w & ~fail).reshape(model.ICn, -1).astype(np.float32)
+    w_zero = (~w).reshape(model.ICn, -1).astype(np.float32)
+    x_u = x & ((1 << model.bits) - 1)
+    half = 1 << (model.sum_width - 1)
+    y = np.zeros((B, model.OCn), dtype=np.int64)
+    for t in range(model.bits):
+        IN = ((x_u >> t) & 1).astype(np.float32)
+        hits = (IN @ w_eff).astype(np.int64)
+        if p_leak:
+            hits += _leaks(rng, (IN @ w_zero).astype(np.int64), p_leak)
+        if adder_max is not None:
+            hits = np.minimum(hits, adder_max)
+        # 符号位周期(cnt_b7)内所有输入为1的IC贡献取负
+        if t == model.bits - 1:
+            hits = -hits
+        s = hits.reshape(B, model.OCn, model.bits) @ model.bit_weights
+        if trunc_bits:
+            s = (s >> trunc_bits) << trunc_bits
+        y += np.clip(s, -half, half - 1) << t
+    return y
+
+
+def _leaks(rng, n, p):
+    """
+    每列n个候选Cell各自以概率p误放电，返回每列的误放电数（与逐列二项分布抽样同分布）
+    p很小时先抽总数，再在全部候选Cell中无放回地选出发生误放电的Cell，避免逐列抽样
+    """
+    cum = np.cumsum(n.ravel())
+    total = int(cum[-1]) if len(cum) else 0
+    k = rng.binomial(total, p)
+    if not k:
+        return np.zeros_like(n)
+    cells = rng.choice(total, k, replace=False)
+    return np.bincount(np.searchsorted(cum, cells, side='right'), minlength=n.size).reshape(n.shape)
+
+
+def _init_worker(weights, geometry):
+    global _model
+    _model = CimArrayModel(weights, *geometry)
+
+
+def _trial_chunk(args):
+    seeds, x, line, sigma, margin, p_leak, adder_max, trunc_bits, hist_range = args
+    model = _model
+    w = model.w_bits[line].astype(bool)
+    ideal = model.matvec(x, line)
+    stats = []
+    hist = np.zeros(2 * hist_range + 3, dtype=np.int64)
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        fail = w & (rng.normal(1.0, sigma, w.shape) < 1.0 - margin) if sigma else np.zeros_like(w)
+        err = noisy_matvec(model, x, line, fail, rng, p_leak, adder_max, trunc_bits) - ideal
+        stats.append((int(fail.sum()), np.abs(err).mean(), np.sqrt((err.astype(float) ** 2).mean()),
+                      int(np.abs(err).max()), (err != 0).mean()))
+        # 直方图：中间为-hist_range~hist_range，两端为溢出
+        hist += np.bincount(np.clip(err, -hist_range - 1, hist_range + 1).ravel() + hist_range + 1,
+                            minlength=len(hist))
+    return np.array(stats), hist
+
+
+def run(model, x, line=0, trials=1000, sigma=0.05, margin=0.2, p_leak=0.0, adder_max=None, trunc_bits=0,
+        jobs=None, seed=0, hist_range=64, chunk=50):
+    """
+    多进程Monte Carlo
+
+    参数:
+    model: CimArrayModel
+    x: (samples, IC)的输入，所有试验共用
+    jobs: 进程数，None为全部CPU核；1时在本进程内执行
+    seed: 根种子，每次试验由SeedSequence派生独立的随机流，结果与进程数无关
+
+    返回:
+    dict: trials（每次试验[失败Cell数, 平均绝对误差, RMS误差, 最大绝对误差, 出错比例]）、
+          hist（误差直方图，下标0/最后为溢出）、edges（直方图对应的误差值）、ideal（理想输出）
+    """
+    seeds = np.random.SeedSequence(seed).spawn(trials)
+    tasks = [(seeds[i:i + chunk], x, line, sigma, margin, p_leak, adder_max, trunc_bits, hist_range)
+             for i in range(0, trials, chunk)]
+    geometry = (model.ICn, model.OCn, model.rows, model.bits, model.group)
+    # 还原为output_{i}.txt格式传给子进程
+    weights = model.w_bits[..., ::-1].transpose(1, 0, 2, 3).reshape(model.ICn * model.rows, -1)
+    if jobs == 1:
+        _init_worker(weights, geometry)
+        results = [_trial_chunk(t) for t in tasks]
+    else:
+        with Pool(jobs, initializer=_init_worker, initargs=(weights, geometry)) as pool:
+            results = pool.map(_trial_chunk, tasks)
+    return {'trials': np.concatenate([r[0] for r in results]),
+            'hist': sum(r[1] for r in results),
+            'edges': np.arange(-hist_range - 1, hist_range + 2),
+            'ideal': model.matvec(x, line)}
+
+
+def fft_workload(samples, seed=0):
+    """
+    FFT负载：16点DFT块实部（dft_weight_compiler的量化方式）作用于量化后的复数采样实部
+
+    返回:
+    (model, x, line)
+    """
+    from dft_weight_compiler import complex_tiles, real_weights, to_codes
+    from input_encoder import quantize, to_vectors
+    tiles, _ = complex_tiles(16)
+    W = to_codes(real_weights(tiles), 8)[0, :16, :16]
+    rng = np.random.default_rng(seed)
+    frames = rng.uniform(-1, 1, samples * 16) + 1j * rng.uniform(-1, 1, samples * 16)
+    x = to_vectors(quantize(frames * 0.5)[0])
+    return build_model(W[None]), x, 0
+
+
+def nn_workload(samples, filename=None, line=0, seed=0):
+    """NN负载：网表源权重文件（generate_array_netlists.weight_file）中的权重（或随机int8权重）与随机int8激活"""
+    rng = np.random.default_rng(seed)
+    if filename:
+        model = CimArrayModel.from_file(filename)
+    else:
+        model = build_model(rng.integers(-128, 128, (1, 16, 16)))
+        line = 0
+    return model, rng.integers(-128, 128, (samples, model.ICn)), line
+
+
+# main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='CIM阵列Monte Carlo非理想仿真')
+    parser.add_argument('--workload', choices=['fft', 'nn'], default='fft')
+    parser.add_argument('--file', help='nn负载使用的源权重文件，如Weight_schematic/output_1.txt')
+    parser.add_argument('--line', type=int, default=0)
+    parser.add_argument('-t', '--trials', type=int, default=1000)
+    parser.add_argument('-s', '--samples', type=int, default=1000, help='每次试验的输入向量数')
+    parser.add_argument('--sigma', type=float, default=0.05, help='Cell驱动能力的相对标准差')
+    parser.add_argument('--margin', type=float, default=0.2, help='放电时序裕量（相对驱动能力）')
+    parser.add_argument('--p-leak', type=float, default=0.0, help='权重为0的Cell误放电概率')
+    parser.add_argument('--adder-max', type=int, default=None, help='加法树计数饱和值')
+    parser.add_argument('--trunc', type=int, default=0, help='移位器截断的低位数')
+    parser.add_argument('-j', '--jobs', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.workload == 'fft':
+        model, x, line = fft_workload(args.samples, args.seed)
+    else:
+        model, x, line = nn_workload(args.samples, args.file, args.line, args.seed)
+
+    start = time.time()
+    res = run(model, x, line, args.trials, args.sigma, args.margin, args.p_leak, args.adder_max, args.trunc,
+              args.jobs, args.seed)
+    elapsed = time.time() - start
+    stats = res['trials']
+    power = (res['ideal'].astype(float) ** 2).mean()
+    print(f"{args.trials}次试验 x {len(x)}组输入: {elapsed:.2f}s（{os.cpu_count()}核）")
+    print(f"失败Cell数/试验: 平均{stats[:, 0].mean():.2f} 最大{int(stats[:, 0].max())}")
+    print(f"平均绝对误差: {stats[:, 1].mean():.4f} LSB  RMS误差: {stats[:, 2].mean():.4f} LSB  "
+          f"最大误差: {int(stats[:, 3].max())} LSB  出错比例: {stats[:, 4].mean():.4%}")
+    rms = np.sqrt((stats[:, 2] ** 2).mean())
+    if rms > 0:
+        print(f"SNR: {10 * np.log10(power / rms ** 2):.2f} dB")
+    for p in (50, 90, 99, 99.9):
+        print(f"  RMS误差的{p}%分位: {np.percentile(stats[:, 2], p):.4f} LSB")
+    nz = np.flatnonzero(res['hist'])
+    print("误差直方图（两端为溢出）:")
+    for k in nz:
+        print(f"  {res['edges'][k]:5d}: {res['hist'][k]}")
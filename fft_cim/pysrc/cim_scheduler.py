@@ -0,0 +1,275 @@
+import argparse
+import time
+
+import numpy as np
+
+from dft_block import TILE, plan
+from dft_weight_compiler import complex_tiles, real_weights, to_codes, unique_tiles, compile_dft
+
+
+# FFT在CIM宏上的调度与利用率估计
+#
+# 执行模型（与dft_weight_compiler的映射一致）：
+#   4x4阵列分为4个2x2块组，每个复数块占一个块组的一条line；
+#   一次块运算 = 选中该line，输入向量[x_re, x_im]按位串行送入，占用该块组in_bits个周期；
+#   不同块组可同时运行各自的块运算，同一块组同一时刻只能选中一条line。
+#   每一级的全部块运算完成后才开始下一级（级间在阵列外做部分和相加与重排）。
+# 块数超过容量时按首次使用顺序分成若干权重集，切换权重集时计入重载的line数与周期。
+#
+# 数字流水线fft_multipoint.v：每周期输入1个复数采样，每帧占用3N/2个周期。
+
+
+def digital_cycles(N, batch=1):
+    """fft_multipoint.v处理batch帧所需周期数（帧间背靠背）"""
+    return batch * 3 * N // 2
+
+
+class CimSchedule:
+    """
+    N点FFT在CIM宏上的调度
+
+    参数:
+    N: FFT点数
+    batch: 一次处理的帧数
+    bits: 权重量化位数（决定块去重结果）
+    in_bits: 输入位数，即每次块运算占用的周期数
+    reload_cycles: 每重载一条line的周期数（假设值，按逐IC行写入计为16）
+    """
+    def __init__(self, N, batch=1, bits=8, in_bits=8, tile=TILE, lines=96, num_array_rows=4, num_array_cols=4,
+                 dedup=True, reload_cycles=16):
+        self.N, self.batch, self.bits, self.in_bits, self.tile = N, batch, bits, in_bits, tile
+        self.lines, self.reload_cycles = lines, reload_cycles
+        self.num_array_rows, self.num_array_cols = num_array_rows, num_array_cols
+        self.groups = (num_array_rows // 2) * (num_array_cols // 2)
+        self.radices = plan(N, tile)
+
+        tiles, self.info = complex_tiles(N, tile)
+        self.order, self.index = unique_tiles(to_codes(real_weights(tiles), bits), dedup)
+
+        # 每个块在本级需要的块运算次数：每次运算处理tile//r个长度为r的向量
+        rows = batch * np.cumprod([1] + self.radices[:-1])
+        self.ops = np.empty(len(self.info), dtype=np.int64)
+        for t, (level, n2, per_tile) in enumerate(self.info):
+            r = self.radices[level]
+            m = N // int(np.prod(self.radices[:level + 1]))
+            distinct = min(per_tile, m - n2)
+            self.ops[t] = -(-rows[level] * distinct // per_tile)
+        self.placement = self._place()
+
+    @staticmethod
+    def _split(n, k):
+        """n次运算尽量平均地分给k份副本"""
+        return [n // k + (i < n % k) for i in range(k)]
+
+    def _loads(self, placement):
+        """各级各块组的运算次数，形状(级数, 块组数)"""
+        capacity = self.groups * self.lines
+        load = np.zeros((len(self.radices), self.groups), dtype=np.int64)
+        for t, (level, _, _) in enumerate(self.info):
+            slots = placement[self.index[t]]
+            for slot, n in zip(slots, self._split(self.ops[t], len(slots))):
+                load[level, (slot % capacity) // self.lines] += n
+        return load
+
+    def _place(self):
+        """
+        把不同的块分配到(权重集, 块组, line)
+        1. 按首次使用顺序放置，同一级的块优先放到该级累计运算数最少且仍有空line的块组
+        2. 只有一个权重集时，用剩余的line复制负载最重的块，使每一级各块组的运算数更均衡
+
+        返回:
+        每个不同块的位置列表，位置为 权重集*容量 + 块组*lines + line
+        """
+        capacity = self.groups * self.lines
+        load = np.zeros((len(self.radices), self.groups), dtype=np.int64)
+        used = np.zeros(self.groups, dtype=np.int64)
+        unique_ops = np.bincount(self.index, weights=self.ops).astype(np.int64)
+        placement = []
+        weight_set = 0
+        for u, t in enumerate(self.order):
+            if (used >= self.lines).all():
+                weight_set += 1
+                used[:] = 0
+                load[:] = 0
+            level = self.info[t, 0]
+            free = np.flatnonzero(used < self.lines)
+            g = free[np.argmin(load[level, free])]
+            placement.append([weight_set * capacity + g * self.lines + used[g]])
+            used[g] += 1
+            load[level, g] += unique_ops[u]
+        if weight_set == 0:
+            self._replicate(placement, used)
+        return placement
+
+    def _replicate(self, placement, used):
+        # 贪心：每次在总周期(各级最大块组运算数之和)下降最多的地方增加一份副本
+        tiles_of = [np.flatnonzero(self.info[:, 0] == level) for level in range(len(self.radices))]
+        while (used < self.lines).any():
+            load = self._loads(placement)
+            best = None
+            for level, tiles in enumerate(tiles_of):
+                g_max = load[level].argmax()
+                # 最重块组上份额最大的块
+                share = [(self.ops[t] // len(placement[self.index[t]]), t) for t in tiles
+                         if any((p // self.lines) == g_max for p in placement[self.index[t]])]
+                if not share:
+                    continue
+                _, t = max(share)
+                u = self.index[t]
+                held = {p // self.lines for p in placement[u]}
+                free = [g for g in np.argsort(load[level]) if used[g] < self.lines and g not in held]
+                if not free:
+                    continue
+                trial = placement[:u] + [placement[u] + [free[0] * self.lines + used[free[0]]]] + placement[u + 1:]
+                gain = load.max(axis=1).sum() - self._loads(trial).max(axis=1).sum()
+                if gain > 0 and (best is None or gain > best[0]):
+                    best = (gain, u, free[0])
+            if best is None:
+                break
+            _, u, g = best
+            placement[u].append(g * self.lines + used[g])
+            used[g] += 1
+
+    def copies(self, t):
+        """第t个块的各副本及分到的运算次数 [(权重集, 块组, line, 运算次数), ...]"""
+        capacity = self.groups * self.lines
+        slots = self.placement[self.index[t]]
+        return [(p // capacity, (p % capacity) // self.lines, p % self.lines, n)
+                for p, n in zip(slots, self._split(self.ops[t], len(slots)))]
+
+    def steps(self):
+        """
+        按级、权重集划分的执行步骤
+
+        返回:
+        [(级号, 权重集, [(块号, 块组, line, 运算次数), ...]), ...]
+        """
+        result = []
+        for level in range(len(self.radices)):
+            by_set = {}
+            for t in np.flatnonzero(self.info[:, 0] == level):
+                for ws, g, line, n in self.copies(t):
+                    if n:
+                        by_set.setdefault(ws, []).append((t, g, line, n))
+            for ws in sorted(by_set):
+                result.append((level, ws, by_set[ws]))
+        return result
+
+    def activations(self):
+        """
+        逐次块运算的激活计划（生成器）
+
+        产生:
+        (起始周期, 块组, line, 级号, 块号, 运算序号)，每次运算占用in_bits个周期
+        运算序号j对应该块负责的第j组输入向量（每组tile//r个长度为r的向量），多份副本按序号连续分段
+        """
+        cycle = 0
+        resident = 0
+        for level, ws, items in self.steps():
+            if ws != resident:
+                cycle += self._reload_lines(ws) * self.reload_cycles
+                resident = ws
+            queues = [[] for _ in range(self.groups)]
+            first = {}
+            for t, g, line, n in items:
+                queues[g].append((line, t, n, first.get(t, 0)))
+                first[t] = first.get(t, 0) + n
+            slots = max(sum(q[2] for q in queue) for queue in queues)
+            for g, queue in enumerate(queues):
+                slot = 0
+                for line, t, n, j0 in queue:
+                    for j in range(n):
+                        yield cycle + (slot + j) * self.in_bits, g, line, level, t, j0 + j
+                    slot += n
+            cycle += slots * self.in_bits
+
+    def _reload_lines(self, weight_set):
+        capacity = self.groups * self.lines
+        return sum(p // capacity == weight_set for slots in self.placement for p in slots)
+
+    def summary(self, clock_ratio=1.0):
+        """
+        调度统计
+
+        参数:
+        clock_ratio: CIM时钟频率 / 数字流水线时钟频率
+
+        返回:
+        dict
+        """
+        cycles = 0
+        busy = 0
+        reload_lines = 0
+        resident = 0
+        for level, ws, items in self.steps():
+            if ws != resident:
+                reload_lines += self._reload_lines(ws)
+                resident = ws
+            per_group = np.zeros(self.groups, dtype=np.int64)
+            for t, g, line, n in items:
+                per_group[g] += n
+            cycles += per_group.max() * self.in_bits
+            busy += per_group.sum() * self.in_bits
+        reload_cyc = reload_lines * self.reload_cycles
+        total = cycles + reload_cyc
+        capacity = self.groups * self.lines
+        ops = int(self.ops.sum())
+        useful = self.batch * self.N * sum(self.radices)
+        t_digital = digital_cycles(self.N, self.batch)
+        last = max(max(slots) for slots in self.placement)
+        return {
+            'N': self.N,
+            'batch': self.batch,
+            'radices': self.radices,
+            'tiles': len(self.info),
+            'unique_tiles': len(self.order),
+            'weight_sets': last // capacity + 1,
+            'lines_used': sum(len(slots) for slots in self.placement),
+            'tile_ops': ops,
+            'array_activations': ops * 4,
+            'cycles': int(total),
+            'compute_cycles': int(cycles),
+            'reload_lines': reload_lines,
+            'reload_cycles': int(reload_cyc),
+            'group_utilization': busy / (self.groups * total) if total else 0.0,
+            'mac_utilization': useful / (ops * self.tile * self.tile) if ops else 0.0,
+            'samples_per_cycle': self.batch * self.N / total,
+            'digital_cycles': t_digital,
+            'speedup': t_digital / (total / clock_ratio),
+        }
+
+    def write_plan(self, filename):
+        """激活计划写为文本，每行: cycle group line level tile op"""
+        plan_rows = np.array(sorted(self.activations()), dtype=np.int64).reshape(-1, 6)
+        with open(filename, 'w') as file:
+            file.write('# cycle group line level tile op\n')
+            np.savetxt(file, plan_rows, fmt='%d')
+
+    def compile(self):
+        """按本调度的放置生成权重（仅单个权重集时可直接写入阵列）"""
+        if max(max(slots) for slots in self.placement) >= self.groups * self.lines:
+            raise ValueError(f"N={self.N}需要多个权重集，无法一次写入阵列")
+        return compile_dft(self.N, self.bits, self.tile, self.lines, self.num_array_rows, self.num_array_cols,
+                           placement=self.placement)
+
+
+# main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='FFT在CIM宏上的调度与利用率估计')
+    parser.add_argument('-b', '--batch', type=int, default=1, help='一次处理的帧数')
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=[8, 16, 32, 64, 128, 256, 512, 1024, 2048])
+    parser.add_argument('--clock-ratio', type=float, default=1.0, help='CIM时钟/数字流水线时钟')
+    parser.add_argument('--plan', metavar='FILE', help='把第一个N的激活计划写入FILE')
+    args = parser.parse_args()
+
+    print(f"{'N':>5} {'分解':<14} {'块':>4} {'去重':>4} {'权重集':>4} {'块运算':>7} {'周期':>9} "
+          f"{'重载line':>8} {'块组利用率':>8} {'MAC利用率':>8} {'采样/周期':>8} {'数字周期':>9} {'加速比':>6}  建议")
+    for N in args.sizes:
+        start = time.time()
+        s = CimSchedule(N, args.batch).summary(args.clock_ratio)
+        print(f"{N:5d} {str(s['radices']):<14} {s['tiles']:4d} {s['unique_tiles']:4d} {s['weight_sets']:4d} "
+              f"{s['tile_ops']:7d} {s['cycles']:9d} {s['reload_lines']:8d} {s['group_utilization']:8.1%} "
+              f"{s['mac_utilization']:8.1%} {s['samples_per_cycle']:8.3f} {s['digital_cycles']:9d} "
+              f"{s['speedup']:6.2f}  {'CIM' if s['speedup'] > 1 else '数字'}")
+    if args.plan:
+        CimSchedule(args.sizes[0], args.batch).write_plan(args.plan)
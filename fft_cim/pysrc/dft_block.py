@@ -0,0 +1,202 @@
+import contextlib
+import io
+import os
+import time
+import importlib.util
+
+import numpy as np
+
+from profiling import profiled, span
+
+
+# N点DFT按CIM阵列尺寸(16 IC x 16 OC)分解：
+#   N = N1 * N2，n = N2*n1 + n2，k = k1 + N1*k2
+#   X[k1 + N1*k2] = sum_n2 W_N2^(n2*k2) * W_N^(n2*k1) * sum_n1 W_N1^(n1*k1) * x[N2*n1 + n2]
+# 每一级：N1(<=16)点DFT块 -> 旋转因子对角阵 -> 对N2递归
+# DFT块以实部/虚部两个平面的实数矩阵做批量matmul，与CIM阵列上的映射方式一致（一次复数块=4次实数块）
+
+TILE = 16
+
+
+def plan(N, tile=TILE):
+    """
+    N点DFT的分解方案：尽量使用tile点的块，最后剩余不足tile的部分作为一个小块
+
+    返回:
+    各级块大小的列表，如2048 -> [16, 16, 8]
+    """
+    radices = []
+    while N > 1:
+        if N % tile == 0:
+            radices.append(tile)
+            N //= tile
+        elif N < tile:
+            radices.append(N)
+            N = 1
+        else:
+            raise ValueError(f"N={N}无法分解为{tile}点块")
+    return radices
+
+
+def dft_matrix(n):
+    k = np.arange(n)
+    return np.exp(-2j * np.pi * np.outer(k, k) / n)
+
+
+@profiled('quantize.plane', items=lambda m, bits: np.size(m))
+def quantize_plane(m, bits):
+    # 按bits位补码、bits-1位小数量化（与twiddle_factors_8_8bits_7frac的格式一致）
+    scale = 1 << (bits - 1)
+    return np.clip(np.round(m * scale), -scale, scale - 1) / scale
+
+
+class BlockDFT:
+    """
+    按16x16块分解的DFT引擎
+
+    参数:
+    N: DFT点数
+    tile: 块大小（CIM阵列的IC/OC数）
+    weight_bits: 不为None时把DFT块和旋转因子量化到该位数，模拟CIM阵列中的定点权重
+    """
+    def __init__(self, N, tile=TILE, weight_bits=None):
+        self.N = N
+        self.tile = tile
+        self.radices = plan(N, tile)
+        self.levels = []
+        n_level = N
+        for r in self.radices:
+            m = n_level // r
+            F = dft_matrix(r)
+            tw = np.exp(-2j * np.pi * np.outer(np.arange(r), np.arange(m)) / n_level)
+            if weight_bits is not None:
+                F = quantize_plane(F.real, weight_bits) + 1j * quantize_plane(F.imag, weight_bits)
+                tw = quantize_plane(tw.real, weight_bits) + 1j * quantize_plane(tw.imag, weight_bits)
+            self.levels.append((r, m, F.real.copy(), F.imag.copy(), tw))
+            n_level = m
+
+    def tile_ops(self):
+        """
+        每帧的CIM块激活次数（复数块按实部/虚部计4次）
+        不足tile点的小块按块对角方式tile//r个拼进一个块
+        """
+        ops = 0
+        for r, _, _, _, _ in self.levels:
+            per_tile = self.tile // r
+            ops += 4 * -(-(self.N // r) // per_tile)
+        return ops
+
+    def __call__(self, x):
+        """
+        x: (B, N)或(N,)复数输入
+
+        返回:
+        与x同形状的DFT结果
+        """
+        x = np.asarray(x, dtype=complex)
+        shape = x.shape
+        xr = np.ascontiguousarray(x.real.reshape(-1, self.N))
+        xi = np.ascontiguousarray(x.imag.reshape(-1, self.N))
+        B = len(xr)
+        rows = B
+        for r, m, Fr, Fi, tw in self.levels:
+            with span('block_dft.stage', items=B * self.N, radix=r):
+                # 块DFT：(r x r)实数矩阵乘以每个n2对应的列向量
+                ar = xr.reshape(rows, r, m)
+                ai = xi.reshape(rows, r, m)
+                yr = np.matmul(Fr, ar) - np.matmul(Fi, ai)
+                yi = np.matmul(Fi, ar) + np.matmul(Fr, ai)
+                # 旋转因子对角阵
+                xr = yr * tw.real - yi * tw.imag
+                xi = yr * tw.imag + yi * tw.real
+            rows *= r
+        # 各级输出下标为k1 + N1*k2，逐级还原为自然顺序
+        with span('block_dft.digit_reversal', items=B * self.N):
+            out = xr + 1j * xi
+            for r, m, _, _, _ in reversed(self.levels):
+                rows //= r
+                out = out.reshape(rows, r, -1).transpose(0, 2, 1)
+            out = out.reshape(shape)
+        return out
+
+
+def _load_script(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# 仓库中已有的蝶形实现：(名称, 相对fft_cim的路径, 函数名)
+BUTTERFLY_ENGINES = [
+    ('基2蝶形', os.path.join('test3', 'test.py'), 'fft_radix2_butterfly'),
+    ('混合基', os.path.join('test2', 'mix_radix.py'), 'mixed_radix_fft'),
+]
+
+
+def load_engines():
+    """按路径加载蝶形实现，缺少依赖（如matplotlib）的跳过"""
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    engines = {}
+    for name, path, func in BUTTERFLY_ENGINES:
+        try:
+            module = _load_script(os.path.join(root, path), 'engine_' + func)
+        except ImportError as e:
+            print(f"跳过{name}({path}): {e}")
+            continue
+        engines[name] = getattr(module, func)
+    return engines
+
+
+def report(sizes=(8, 16, 32, 64, 128, 256, 512, 1024, 2048), batch=64, weight_bits=None, engines=None, frames=4):
+    """
+    与np.fft.fft及仓库中的蝶形实现比较每帧耗时和最大误差
+
+    参数:
+    batch: 块DFT和numpy每次处理的帧数
+    engines: load_engines()的结果，逐帧调用，只测frames帧
+
+    返回:
+    每个N一条记录的列表
+    """
+    rng = np.random.default_rng(0)
+    engines = engines or {}
+    results = []
+    for N in sizes:
+        x = rng.uniform(-1, 1, (batch, N)) + 1j * rng.uniform(-1, 1, (batch, N))
+        ref = np.fft.fft(x)
+        engine = BlockDFT(N, weight_bits=weight_bits)
+        start = time.perf_counter()
+        y = engine(x)
+        t_block = (time.perf_counter() - start) / batch
+        start = time.perf_counter()
+        np.fft.fft(x)
+        t_np = (time.perf_counter() - start) / batch
+        rec = {'N': N, 'plan': engine.radices, 'tile_ops': engine.tile_ops(),
+               'block_us': t_block * 1e6, 'numpy_us': t_np * 1e6,
+               'block_err': float(np.abs(y - ref).max()), 'engines': {}}
+        for name, func in engines.items():
+            try:
+                start = time.perf_counter()
+                # 部分实现会打印中间信息，这里屏蔽
+                with contextlib.redirect_stdout(io.StringIO()):
+                    yb = np.array([func(list(row)) for row in x[:frames]])
+                t = (time.perf_counter() - start) / frames
+            except ValueError:
+                continue
+            rec['engines'][name] = (t * 1e6, float(np.abs(yb - ref[:frames]).max()))
+        results.append(rec)
+    return results
+
+
+# main
+if __name__ == '__main__':
+    engines = load_engines()
+    for bits in (None, 8):
+        print(f"权重位数: {bits if bits else '浮点'}")
+        for rec in report(weight_bits=bits, engines=engines if bits is None else None):
+            line = (f"  N={rec['N']:5d} 分解={rec['plan']} 块激活={rec['tile_ops']:4d} "
+                    f"块DFT {rec['block_us']:7.1f}us/帧 误差{rec['block_err']:.2e}  numpy {rec['numpy_us']:5.1f}us/帧")
+            for name, (t, err) in rec['engines'].items():
+                line += f"  {name} {t:9.1f}us/帧 误差{err:.2e}"
+            print(line)
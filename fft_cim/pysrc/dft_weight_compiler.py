@@ -0,0 +1,206 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from dft_block import BlockDFT, TILE
+from profiling import profiled
+
+
+# DFT块/旋转因子 -> CIM权重编译器
+#
+# 每个复数块M(tile x tile，y = M x)展开为2*tile x 2*tile的实数权重，占2x2个阵列的同一条line：
+#   输入 [x_re(IC 0~15), x_im(IC 16~31)]，输出 [y_re(OC 0~15), y_im(OC 16~31)]
+#   W[n][k] = Re M[k,n]    W[n][16+k] = Im M[k,n]
+#   W[16+n][k] = -Im M[k,n]    W[16+n][16+k] = Re M[k,n]
+# 跨阵列行(IC方向)的部分和在阵列外相加。
+# 旋转因子对角阵融合进块：第n2列的块为 diag(tw[:, n2]) @ F；不足tile点的小块按块对角方式拼接。
+# 4x4阵列分成4个2x2的块组，每个块组96条line，共可放384个复数块。
+#
+# 输出与神经网络层相同：权重/{data_name}.npz中的weight_bits [OC][line][1][IC][8位，MSB在前]，
+# 以及weight.xlsx格式的放置表（base_line,row_begin,row_end,col_begin,col_end,line_num,data_name）。
+
+MANIFEST_COLUMNS = ['base_line', 'row_begin', 'row_end', 'col_begin', 'col_end', 'line_num', 'data_name']
+
+
+@profiled('quantize.weight', items=lambda m, bits: np.size(m))
+def to_codes(m, bits):
+    """实数矩阵 -> bits位补码整数（bits-1位小数，四舍五入后饱和）"""
+    scale = 1 << (bits - 1)
+    return np.clip(np.round(np.asarray(m) * scale), -scale, scale - 1).astype(np.int64)
+
+
+def to_weight_bits(codes, width=8):
+    """有符号整数 -> width位补码的各位，新增最后一维，MSB在前"""
+    u = np.asarray(codes, dtype=np.int64) & ((1 << width) - 1)
+    return ((u[..., None] >> np.arange(width - 1, -1, -1)) & 1).astype(np.uint8)
+
+
+def from_weight_bits(bits):
+    """to_weight_bits()的逆变换"""
+    bits = np.asarray(bits, dtype=np.int64)
+    width = bits.shape[-1]
+    u = bits @ (1 << np.arange(width - 1, -1, -1, dtype=np.int64))
+    return u - ((u >> (width - 1)) << width)
+
+
+def complex_tiles(N, tile=TILE):
+    """
+    N点块DFT各级使用的复数块
+
+    返回:
+    (tiles, info): tiles为(T, tile, tile)复数数组，info为(T, 3)整数数组[级号, 起始n2列, 拼接的块数]
+    拼接的块数为tile//r；块内不同的n2列数为min(tile//r, m - n2)
+    """
+    engine = BlockDFT(N, tile)
+    tiles, info = [], []
+    for level, (r, m, Fr, Fi, tw) in enumerate(engine.levels):
+        F = Fr + 1j * Fi
+        per_tile = tile // r
+        for n2 in range(0, m, per_tile):
+            M = np.zeros((tile, tile), dtype=complex)
+            # 列数不足一个块时（最后一级m=1）用同一组列重复填满，一次处理多个子问题
+            cols = [n2 + c % min(per_tile, m - n2) for c in range(per_tile)]
+            for c, col in enumerate(cols):
+                M[c*r:(c+1)*r, c*r:(c+1)*r] = tw[:, col, None] * F
+            tiles.append(M)
+            info.append((level, n2, len(cols)))
+    return np.array(tiles), np.array(info, dtype=np.int64)
+
+
+def real_weights(tiles):
+    """复数块 (T, tile, tile) -> 实数权重 W[T][IC][OC]，形状(T, 2*tile, 2*tile)"""
+    re = np.swapaxes(tiles.real, 1, 2)
+    im = np.swapaxes(tiles.imag, 1, 2)
+    return np.block([[re, im], [-im, re]])
+
+
+def unique_tiles(codes, dedup=True):
+    """
+    量化块去重
+
+    返回:
+    (order, index): order为各不同块首次出现的下标（按出现顺序），index[t]为第t个块对应order中的序号
+    """
+    if not dedup:
+        return np.arange(len(codes)), np.arange(len(codes))
+    _, first, inverse = np.unique(codes.reshape(len(codes), -1), axis=0, return_index=True, return_inverse=True)
+    order = np.sort(first)
+    rank = np.empty(len(codes), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return order, rank[first[inverse.reshape(-1)]]
+
+
+def compile_dft(N, bits=8, tile=TILE, lines=96, num_array_rows=4, num_array_cols=4, dedup=True, placement=None):
+    """
+    把N点块DFT编译为CIM权重
+
+    参数:
+    bits: 权重量化位数（<=8，不足8位时符号扩展到8位存储）
+    dedup: 量化后完全相同的块只存一份
+    placement: 每个不同块的位置（块组号*lines + line），按unique_tiles()的顺序；
+               元素也可以是位置列表（同一块放多份，tile_map中记录第一份）；None时依次填满各块组
+
+    返回:
+    (blocks, manifest, tile_map)
+    blocks: {data_name: weight_bits数组}，每个块组一个
+    manifest: weight.xlsx格式的DataFrame
+    tile_map: (T, 6)整数数组[级号, 起始n2列, 拼接块数, 块组号, line, 是否与之前的块重复]
+    """
+    if not 1 < bits <= 8:
+        raise ValueError(f"权重位数需在2~8之间: {bits}")
+    tiles, info = complex_tiles(N, tile)
+    codes = to_codes(real_weights(tiles), bits)
+    order, index = unique_tiles(codes, dedup)
+
+    groups_r, groups_c = num_array_rows // 2, num_array_cols // 2
+    capacity = groups_r * groups_c * lines
+    if len(order) > capacity:
+        raise ValueError(f"N={N}需要{len(order)}个复数块，超过阵列容量{capacity}")
+    if placement is None:
+        placement = np.arange(len(order))
+    slots = [np.atleast_1d(p) for p in placement]
+    copy_of = np.repeat(np.arange(len(slots)), [len(p) for p in slots])
+    slot = np.concatenate(slots)
+
+    blocks, rows = {}, []
+    group, line = slot // lines, slot % lines
+    for g in np.unique(group):
+        sel = group == g
+        line_num = line[sel].max() + 1
+        # weight_bits: [OC][line][1][IC][bit]，未使用的line为0
+        w = np.zeros((line_num,) + codes.shape[1:], dtype=np.int64)
+        w[line[sel]] = codes[order[copy_of[sel]]]
+        name = f'dft{N}_q{bits}_g{g}'
+        blocks[name] = np.ascontiguousarray(to_weight_bits(w).transpose(2, 0, 1, 3)[:, :, None])
+        row_begin, col_begin = 2 * (g // groups_c), 2 * (g % groups_c)
+        rows.append((0, row_begin, row_begin + 1, col_begin, col_begin + 1, line_num, name))
+    manifest = pd.DataFrame(rows, columns=MANIFEST_COLUMNS)
+
+    first_use = np.zeros(len(codes), dtype=np.int64)
+    first_use[order] = 1
+    first_slot = np.array([p[0] for p in slots])[index]
+    tile_map = np.column_stack([info, first_slot // lines, first_slot % lines, 1 - first_use])
+    return blocks, manifest, tile_map
+
+
+def save(blocks, manifest, tile_map, manifest_file='dft_weight.xlsx', weight_dir='权重'):
+    """写出npz权重和放置表，npz中除weight_bits外附带tile_map"""
+    os.makedirs(weight_dir, exist_ok=True)
+    for name, weight_bits in blocks.items():
+        np.savez(os.path.join(weight_dir, f'{name}.npz'), weight_bits=weight_bits, tile_map=tile_map)
+    manifest.to_excel(manifest_file, index=False)
+
+
+def place(manifest, blocks=None, ICn=16, OCn=16, lines=96, num_array_rows=4, num_array_cols=4, weight_dir='权重'):
+    """
+    按放置表把权重填入阵列张量，结果与accept_weight.read_weight逐行调用一致
+
+    参数:
+    blocks: {data_name: weight_bits}，为None时从weight_dir读取npz
+
+    返回:
+    uint8数组 [阵列行][阵列列][line][IC][OC][bit]
+    """
+    weight_data = np.zeros((num_array_rows, num_array_cols, lines, ICn, OCn, 8), dtype=np.uint8)
+    for row in manifest.itertuples(index=False):
+        if blocks is not None and row.data_name in blocks:
+            weight = blocks[row.data_name]
+        else:
+            weight = np.load(os.path.join(weight_dir, f'{row.data_name}.npz'))['weight_bits']
+        n_rows = row.row_end - row.row_begin + 1
+        n_cols = row.col_end - row.col_begin + 1
+        # [OC][line][1][IC][bit] -> [阵列行][阵列列][line][IC][OC][bit]
+        w = weight[:n_cols * OCn, :row.line_num, 0, :n_rows * ICn]
+        w = w.reshape(n_cols, OCn, row.line_num, n_rows, ICn, 8).transpose(3, 0, 2, 4, 1, 5)
+        weight_data[row.row_begin:row.row_end + 1, row.col_begin:row.col_end + 1,
+                    row.base_line:row.base_line + row.line_num] = w
+    return weight_data
+
+
+# main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='把N点DFT编译为CIM阵列权重')
+    parser.add_argument('N', type=int, help='DFT点数')
+    parser.add_argument('-b', '--bits', type=int, default=8, help='权重量化位数（<=8）')
+    parser.add_argument('-o', '--manifest', default='dft_weight.xlsx', help='放置表文件名（weight.xlsx格式）')
+    parser.add_argument('--no-dedup', action='store_true', help='不合并相同的块')
+    parser.add_argument('--build', action='store_true', help='编译后直接生成Weight_schematic/output_{i}.txt与阵列网表')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='--build时的进程数')
+    args = parser.parse_args()
+
+    start = time.time()
+    blocks, manifest, tile_map = compile_dft(args.N, args.bits, dedup=not args.no_dedup)
+    save(blocks, manifest, tile_map, args.manifest)
+    n_unique = int((tile_map[:, 5] == 0).sum())
+    print(f"N={args.N}: {len(tile_map)}个复数块，去重后{n_unique}个，占用{len(blocks)}个块组，"
+          f"编译耗时{time.time() - start:.3f}s")
+    print(manifest.to_string(index=False))
+
+    if args.build:
+        from parallel_build import build_parallel
+        start = time.time()
+        build_parallel(place(manifest, blocks), args.jobs)
+        print(f"权重文件与网表生成完成: {time.time() - start:.2f}s")
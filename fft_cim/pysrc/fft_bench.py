@@ -0,0 +1,341 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+
+import profiling
+from dft_block import BlockDFT, _load_script
+from profiling import span
+
+
+# 仓库中各FFT实现的统一基准测试：
+#   每个(实现, 模式, N, 批大小)测每帧耗时、吞吐、峰值内存(tracemalloc)和相对np.fft.fft的最大误差
+#   结果写成JSON（附commit），--compare与旧结果比较，用于跟踪提交之间的性能/精度回退
+# 模式:
+#   float: 复数输入，实部/虚部均匀分布在[-1, 1)
+#   fixed: 定点路径（Q15黄金模型、8位权重的块DFT），输入按Q15量化且按1/N缩放避免饱和，
+#          误差换算回[-1, 1)的输入单位，与float模式可直接比较
+# 实现不支持的模式或N（如只做8点的fft_8point、只有浮点的脚本）不出现在结果中
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+SIZES = [8, 16, 32, 64, 128, 256, 512, 1024, 2048]
+BATCHES = [1, 64]
+MODES = ['float', 'fixed']
+
+# 启用剖析（--profile或FFT_PROFILE）时给加载的脚本打桩的入口: 脚本 -> {函数名: (段名, items函数)}
+_samples = lambda data, *args, **kwargs: len(data)
+_elements = lambda x, *args, **kwargs: np.size(x)
+PROFILE_POINTS = {
+    'fft_8point': {'bit_reverse': ('fft.bit_reversal', _samples)},
+    'mixed_radix': {'mixed_radix_fft_stage': ('fft.stage', _samples)},
+    'butterfly2': {'fft_butterfly_stage': ('fft.stage', _samples)},
+    'butterfly4': {'radix4_fft_stage': ('fft.stage', _samples)},
+    'fft_model': {
+        'bitrev': ('fft.bit_reversal', lambda n_bits: 1 << n_bits),
+        'complex_add': ('fft.stage.add', _elements),
+        'complex_sub': ('fft.stage.sub', _elements),
+        'complex_mult': ('fft.stage.mult', _elements),
+        'negate': ('fft.stage.neg', _elements),
+    },
+}
+
+
+def _quiet(func):
+    # 部分实现会打印中间信息（如mixed_radix_fft的分解结构），计时时屏蔽
+    def run(*args):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func(*args)
+    return run
+
+
+def _per_frame(func):
+    """逐帧调用的列表实现 -> 批处理函数"""
+    func = _quiet(func)
+    return lambda x: np.array([func(list(row)) for row in x])
+
+
+def _bitrev(N):
+    bits = N.bit_length() - 1
+    idx = np.arange(N)
+    rev = np.zeros_like(idx)
+    for b in range(bits):
+        rev |= ((idx >> b) & 1) << (bits - 1 - b)
+    return rev
+
+
+def _digitrev4(N):
+    digits = (N.bit_length() - 1) // 2
+    idx = np.arange(N)
+    rev = np.zeros_like(idx)
+    for d in range(digits):
+        rev = rev * 4 + ((idx >> (2 * d)) & 3)
+    return rev
+
+
+def _stages_radix2(module):
+    # butterfly2.fft_butterfly_stage按DIF组织（第0级1组、每组N点）：自然顺序输入，逐级后按位反转输出
+    def factory(N):
+        stage, order = _quiet(module.fft_butterfly_stage), _bitrev(N)
+
+        def run(x):
+            out = []
+            for row in x:
+                y = list(row)
+                for s in range(N.bit_length() - 1):
+                    y = stage(y, s, N)
+                out.append(np.array(y)[order])
+            return np.array(out)
+        return run
+    return factory
+
+
+def _stages_radix4(module):
+    # butterfly4.radix4_fft_stage同样按DIF组织：N = 4^k，自然顺序输入，逐级后按4进制数字反转输出
+    def factory(N):
+        stage, order = _quiet(module.radix4_fft_stage), _digitrev4(N)
+
+        def run(x):
+            out = []
+            for row in x:
+                y = list(row)
+                for s in range((N.bit_length() - 1) // 2):
+                    y = stage(y, N, s)
+                out.append(np.array(y)[order])
+            return np.array(out)
+        return run
+    return factory
+
+
+def _golden(module, func):
+    # Q15黄金模型：输入乘以32767//N取整，输出除回同一比例
+    def factory(N):
+        model, rom = getattr(module, func), module.load_twiddles()
+
+        def run(x):
+            amp = 32767 // N
+            y_re, y_im = model(np.round(x.real * amp).astype(np.int64), np.round(x.imag * amp).astype(np.int64),
+                               'ideal', rom)
+            return (y_re + 1j * y_im) / amp
+        return run
+    return factory
+
+
+def _fixed_size(n, factory):
+    return lambda N: factory(N) if N == n else None
+
+
+def _power_of_4(factory):
+    return lambda N: factory(N) if (N.bit_length() - 1) % 2 == 0 else None
+
+
+def load_implementations():
+    """
+    加载仓库中的FFT实现，缺少依赖（如matplotlib）的记录跳过原因
+
+    返回:
+    ({名称: {模式: factory(N) -> run(x)或None(该N不适用)}}, {名称: 跳过原因})
+    """
+    sources = {
+        'fft_8point': os.path.join(ROOT, 'fft_cim', 'fft_8point.py'),
+        'radix2_8': os.path.join(ROOT, 'fft_cim', 'test3', 'radix2_8.py'),
+        'radix2': os.path.join(ROOT, 'fft_cim', 'test3', 'test.py'),
+        'mixed_radix': os.path.join(ROOT, 'fft_cim', 'test2', 'mix_radix.py'),
+        'butterfly2': os.path.join(ROOT, 'fft_cim', 'test2', 'butterfly2.py'),
+        'butterfly4': os.path.join(ROOT, 'fft_cim', 'test2', 'butterfly4.py'),
+        'fft_model': os.path.join(ROOT, 'fft_test', 'tb', 'fft_model.py'),
+    }
+    modules, skipped = {}, {}
+    for name, path in sources.items():
+        try:
+            modules[name] = _load_script(path, 'bench_' + name)
+            profiling.instrument(modules[name], PROFILE_POINTS.get(name, {}))
+        except ImportError as e:
+            skipped[name] = str(e)
+
+    impls = {
+        'numpy': {'float': lambda N: np.fft.fft},
+        'block_dft': {'float': lambda N: BlockDFT(N), 'fixed': lambda N: BlockDFT(N, weight_bits=8)},
+    }
+    m = modules.get
+    if m('fft_8point'):
+        impls['fft_8point'] = {'float': _fixed_size(8, lambda N: _per_frame(m('fft_8point').fft_8point))}
+    if m('radix2_8'):
+        impls['radix2_8'] = {'float': _fixed_size(8, lambda N: _per_frame(m('radix2_8').fft_radix2_butterfly))}
+    if m('radix2'):
+        impls['radix2'] = {'float': lambda N: _per_frame(m('radix2').fft_radix2_butterfly)}
+    if m('mixed_radix'):
+        impls['mixed_radix'] = {'float': lambda N: _per_frame(m('mixed_radix').mixed_radix_fft)}
+    if m('butterfly2'):
+        impls['butterfly2_4point'] = {'float': _fixed_size(4, lambda N: _per_frame(m('butterfly2').simple_fft_4point))}
+        impls['butterfly2_stage'] = {'float': _stages_radix2(m('butterfly2'))}
+    if m('butterfly4'):
+        impls['radix4_stage'] = {'float': _power_of_4(_stages_radix4(m('butterfly4')))}
+    if m('fft_model'):
+        impls['golden_r2sdf'] = {'fixed': _golden(m('fft_model'), 'fft')}
+        impls['golden_r22sdf'] = {'fixed': _golden(m('fft_model'), 'fft_r22')}
+    for name in skipped:
+        print(f"跳过{name}: {skipped[name]}")
+    return impls, skipped
+
+
+def measure(run, x, min_time=0.05, max_repeat=50):
+    """
+    run(x)的每次耗时（重复到累计min_time秒，最多max_repeat次取平均）和一次运行的峰值内存
+
+    返回:
+    (输出, 每次耗时秒数, 峰值字节数)
+    """
+    y = run(x)
+    reps, total = 0, 0.0
+    while reps < max_repeat and (reps == 0 or total < min_time):
+        start = time.perf_counter()
+        run(x)
+        total += time.perf_counter() - start
+        reps += 1
+    # tracemalloc会拖慢Python代码，峰值内存单独跑一次（剖析已开启tracemalloc时不关闭它）
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    run(x)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    if not tracing:
+        tracemalloc.stop()
+    return y, total / reps, peak
+
+
+def benchmark(sizes=SIZES, batches=BATCHES, modes=MODES, names=None, seed=0, min_time=0.05):
+    """
+    对每个(实现, 模式, N, 批大小)计时
+
+    返回:
+    记录列表，不适用或出错的组合带status说明
+    """
+    impls, skipped = load_implementations()
+    results = [{'impl': name, 'status': f'skipped: {reason}'} for name, reason in skipped.items()]
+    for N in sizes:
+        for batch in batches:
+            # 输入只由(seed, N, 批大小)决定，不同的-n/-b组合之间误差可比
+            rng = np.random.default_rng([seed, N, batch])
+            x = rng.uniform(-1, 1, (batch, N)) + 1j * rng.uniform(-1, 1, (batch, N))
+            ref = np.fft.fft(x)
+            for name, per_mode in impls.items():
+                if names and name not in names:
+                    continue
+                for mode in modes:
+                    rec = {'impl': name, 'mode': mode, 'N': N, 'batch': batch}
+                    factory = per_mode.get(mode)
+                    run = factory(N) if factory else None
+                    if run is None:
+                        continue
+                    try:
+                        with span('bench.' + name, items=batch * N, mode=mode, N=N, batch=batch):
+                            y, t, peak = measure(run, x, min_time)
+                    except (ValueError, IndexError, ZeroDivisionError) as e:
+                        rec['status'] = f'error: {e}'
+                        results.append(rec)
+                        continue
+                    rec.update({
+                        'status': 'ok',
+                        'time_per_frame_us': t / batch * 1e6,
+                        'frames_per_s': batch / t,
+                        'msamples_per_s': batch * N / t / 1e6,
+                        'peak_bytes': peak,
+                        'max_err': float(np.abs(np.asarray(y).reshape(batch, N) - ref).max()),
+                    })
+                    results.append(rec)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(results, filename, **config):
+    with open(filename, 'w') as file:
+        json.dump({'commit': _git_commit(), 'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                   'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+                   'config': config, 'results': results}, file, indent=1)
+
+
+def compare(old, new, time_tol=0.2, err_tol=1e-9):
+    """
+    比较两次基准结果（save()写出的字典）
+
+    返回:
+    回退列表：同一(实现, 模式, N, 批大小)下耗时增加超过time_tol比例，或最大误差增加超过err_tol
+    """
+    key = lambda r: (r['impl'], r.get('mode'), r.get('N'), r.get('batch'))
+    before = {key(r): r for r in old['results'] if r['status'] == 'ok'}
+    regressions = []
+    for r in new['results']:
+        o = before.get(key(r))
+        if o is None:
+            continue
+        if r['status'] != 'ok':
+            regressions.append((key(r), 'status', o['status'], r['status']))
+            continue
+        if r['time_per_frame_us'] > o['time_per_frame_us'] * (1 + time_tol):
+            regressions.append((key(r), 'time_per_frame_us', o['time_per_frame_us'], r['time_per_frame_us']))
+        if r['max_err'] > o['max_err'] + err_tol:
+            regressions.append((key(r), 'max_err', o['max_err'], r['max_err']))
+    return regressions
+
+
+def print_table(results):
+    print(f"{'impl':<18} {'mode':<5} {'N':>5} {'batch':>5} {'us/frame':>11} {'Msample/s':>9} {'peak KiB':>9} "
+          f"{'max_err':>9}")
+    for r in results:
+        if r['status'] != 'ok':
+            print(f"{r['impl']:<18} {r.get('mode', '-'):<5} {r.get('N', 0):5d} {r.get('batch', 0):5d} {r['status']}")
+            continue
+        print(f"{r['impl']:<18} {r['mode']:<5} {r['N']:5d} {r['batch']:5d} {r['time_per_frame_us']:11.1f} "
+              f"{r['msamples_per_s']:9.3f} {r['peak_bytes'] / 1024:9.1f} {r['max_err']:9.2e}")
+
+
+# main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='仓库中各FFT实现的耗时/吞吐/内存/误差基准')
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('-b', '--batches', type=int, nargs='+', default=BATCHES, help='每次调用的帧数')
+    parser.add_argument('-m', '--modes', nargs='+', default=MODES, choices=MODES)
+    parser.add_argument('-i', '--impls', nargs='+', help='只测这些实现（默认全部）')
+    parser.add_argument('--min-time', type=float, default=0.05, help='每个组合累计计时的最短秒数')
+    parser.add_argument('-o', '--output', default='fft_bench.json')
+    parser.add_argument('--compare', metavar='OLD_JSON', help='与旧结果比较，有回退时返回1')
+    parser.add_argument('--time-tol', type=float, default=0.2, help='耗时回退阈值（比例）')
+    parser.add_argument('--profile', metavar='TRACE_JSON', help='逐段剖析，退出时写出Chrome trace并打印汇总（见profiling.py）')
+    parser.add_argument('--profile-alloc', action='store_true',
+                        help='--profile时同时记录每段的净分配和峰值内存（也可设置FFT_PROFILE_ALLOC=1）')
+    args = parser.parse_args()
+
+    if args.profile:
+        profiling.enable(args.profile, alloc=args.profile_alloc or os.environ.get('FFT_PROFILE_ALLOC') == '1')
+
+    start = time.time()
+    results = benchmark(args.sizes, args.batches, args.modes, args.impls, min_time=args.min_time)
+    print_table(results)
+    save(results, args.output, sizes=args.sizes, batches=args.batches, modes=args.modes, min_time=args.min_time)
+    print(f"{len(results)}条结果写入{args.output}，用时{time.time() - start:.1f}s")
+    if args.compare:
+        with open(args.compare) as file:
+            old = json.load(file)
+        with open(args.output) as file:
+            new = json.load(file)
+        regressions = compare(old, new, args.time_tol)
+        print(f"与{args.compare}（commit {old.get('commit')}）相比：{len(regressions)}处回退")
+        for k, field, before, after in regressions:
+            print(f"  {k}: {field} {before} -> {after}")
+        raise SystemExit(1 if regressions else 0)
@@ -1,155 +1,519 @@
 import pandas as pd
 import numpy as np
 import time
-def generate_netlist(input_filename,i_arr):
-    #读取仅包含0和1的txt文件，并转换为二维列表
-    weights = []
-    with open(input_filename, 'r') as file:
-        for line in file:
-            # 去除行末换行符，并将每行转换为整数列表
-            row = [int(char) for char in line.strip()]
-            weights.append(row)
+import os
+import json
+import shutil
+import hashlib
 
+from profiling import profiled, span
+
+
+# 网表的源权重：WEIGHT_DIR/output_{i}.txt，行 IC*96+line，列 OC*8+bit（每个OC的8位MSB在前）
+# 由weight_rd_final_for_schematic.py或parallel_build.py写出；所有读取源权重的模块和命令行默认值都用weight_file()
+# （weight_rd.py在当前目录写出的output_{i}.txt是ROM排布，不是网表的源权重）
+WEIGHT_DIR = './Weight_schematic'
+
+
+def weight_file(i_arr, weight_dir=WEIGHT_DIR):
+    return os.path.join(weight_dir, f'output_{i_arr}.txt')
+
+
+@profiled('netlist.read_weights')
+def read_weights(input_filename):
+    #读取仅包含0和1的txt文件，整体按字节解析为二维uint8数组（行数 x 每行字符数）
+    with open(input_filename, 'rb') as file:
+        raw = file.read()
+    width = len(raw.split(b'\n', 1)[0].strip())
+    data = np.frombuffer(raw, dtype=np.uint8)
+    # 去掉换行符等空白字符，只保留'0'/'1'
+    data = data[(data != ord('\n')) & (data != ord('\r')) & (data != ord(' ')) & (data != ord('\t'))] - ord('0')
+    if width == 0 or data.size % width or (data > 1).any():
+        raise ValueError(f"{input_filename} 不是每行等长的0/1文本")
+    return data.reshape(-1, width)
+
+
+STAR_LINE = '************************************************************************\n'
+
+
+def _pininfo(tokens, first=6, per_line=None):
+    # 按原网表的换行方式输出*.PININFO
+    lines = [tokens[:first]]
+    rest = tokens[first:]
+    while rest:
+        n = per_line(rest)
+        lines.append(rest[:n])
+        rest = rest[n:]
+    return ''.join('*.PININFO ' + ' '.join(line) + '\n' for line in lines)
+
+
+class NetlistTemplate:
+    """
+    阵列网表模板：固定的引脚/实例块在构造时预编译一次，生成时只填入阵列号、OC号和Cell名
+
+    参数:
+    ICn: 每列的IC数（加法树输入数）
+    OCn: 每个阵列的OC数
+    rows: 每个Cell的行数（line数）
+    bits: 权重位数
+    group: 每组行数（row_en宽度，同时也是Cell的IN宽度），rows//group为row_2level宽度
+    """
+    def __init__(self, ICn=16, OCn=16, rows=96, bits=8, group=16):
+        self.ICn, self.OCn, self.rows, self.bits, self.group = ICn, OCn, rows, bits, group
+        levels = rows // group
+        tree = ICn.bit_length()           # AdderTree_domino输出位数，16输入为5位
+        sum_w = bits + tree               # 每个OC的SUM位数，8bit为13位
+        in_w = ICn * group
+        self.sum_width = sum_w
+
+        # Cell: 每行一个NMOS，权重为1接mid_out，为0接悬空的net{k}
+        self.dev_one = np.array([f'MNM{k} mid_out{k//group} row_en<{k%group}> IN<{k%group}> VSS nhvt09_ckt m=1 l=40n w=100n\n'
+                                 for k in range(rows)], dtype=object)
+        self.dev_zero = np.array([f'MNM{k} net{k} row_en<{k%group}> IN<{k%group}> VSS nhvt09_ckt m=1 l=40n w=100n\n'
+                                  for k in range(rows)], dtype=object)
+        pins = ([f'IN<0:{group-1}>:I', 'Reset_:I', 'VDD:I', 'VSS:I'] + [f'row_2level<{g}>:I' for g in range(levels)]
+                + [f'row_en<{r}>:I' for r in range(group)] + ['Cell_out:O'])
+        self.cell_head = ('****Sub-Circuit for {name}, May 12 2025*****\n'
+                          '.SUBCKT {name} Cell_out IN<0:' + str(group-1) + '> \n+ RSTN VDD VSS \n'
+                          '+ row_2level<0:' + str(levels-1) + '> \n+ row_en<0:' + str(group-1) + '>\n'
+                          + _pininfo(pins, per_line=lambda rest: 4 if rest[0].startswith('row_2level') else 5))
+        self.cell_tail = ('MPM1 Cell_out RSTN VDD VDD plvt09_ckt m=1 l=40n w=100n\n'
+                          + ''.join(f'MNM{rows+g} Cell_out row_2level<{g}> mid_out{g} VSS nhvt09_ckt m=1 l=40n w=100n\n'
+                                    for g in range(levels))
+                          + '.ENDS\n')
+
+        # Col: ICn个Cell + 加法树，j=0(MSB)使用带符号加法树
+        ctrl = f'RSTN VDD VSS row_2level<0:{levels-1}> row_en<0:{group-1}>'
+        cells = ''.join(f'XI{i} Cell_out<{i}> IN<{i*group}:{i*group+group-1}> {ctrl} / {{c[{i}]}}\n' for i in range(ICn))
+        self.col = []
+        for out_w, tree_name in ((tree + 1, 'AdderTree_sign_domino'), (tree, 'AdderTree_domino')):
+            self.col.append((STAR_LINE
+                             + '.SUBCKT Col{b}_arr{a}_oc{w} OUT<0:' + str(out_w-1) + f'> IN<0:{in_w-1}>\n'
+                             + f'+ {ctrl} sign_inv<0:{ICn-1}>\n'
+                             + f'*.PININFO IN<0:{in_w-1}>:I RSTN:I VDD:I VSS:I row_2level<0:{levels-1}>:I row_en<0:{group-1}>:I sign_inv<0:{ICn-1}>:I\n'
+                             + f'*.PININFO OUT<0:{out_w-1}>:O\n'
+                             + cells
+                             + f'XI{ICn} OUT<0:{out_w-1}> Cell_out<0:{ICn-1}> VDD VSS sign_inv<0:{ICn-1}> / {tree_name}\n'
+                             + '.ENDS\n'))
+
+        # 8Cols: bits个Col + 移位相加，输出SUM<0:sum_w-1>
+        col_ctrl = f'IN<0:{in_w-1}> RSTN VDD VSS row_en2<0:{levels-1}> row_en1<0:{group-1}> sign_inv<0:{ICn-1}>'
+        outs = [f'SUM<0>,b0<1:{tree-1}>'] + [f'b{b}<0:{tree-1}>' for b in range(1, bits-1)] + [f'b{bits-1}<0:{tree}>']
+        self.cols = (STAR_LINE
+                     + '.SUBCKT ' + str(bits) + 'Cols_arr{a}_oc{w} SUM<0:' + str(sum_w-1) + f'> IN<0:{in_w-1}> RSTN row_en1<0:{group-1}> row_en2<0:{levels-1}> sign_inv<0:{ICn-1}> VDD VSS\n'
+                     + f'*.PININFO IN<0:{in_w-1}>:I RSTN:I VDD:I VSS:I row_en2<0:{levels-1}>:I row_en1<0:{group-1}>:I sign_inv<0:{ICn-1}>:I SUM<0:{sum_w-1}>:O\n'
+                     + ''.join(f'XI{b} {outs[b]} {col_ctrl} / Col{b}_arr{{a}}_oc{{w}}\n' for b in range(bits))
+                     + f'XI{bits} SUM<1:{sum_w-1}> b0<1:{tree-1}> ' + ' '.join(o for o in outs[1:]) + ' VDD VSS / Bit_shifter_full\n'
+                     + '.ENDS\n')
+
+        # Arr: OCn个8Cols
+        arr_w = OCn * sum_w
+        self.arr = (STAR_LINE
+                    + '.SUBCKT Arr{a} SUM<0:' + str(arr_w-1) + f'> IN<0:{ICn-1}> RSTN row_en1<0:{group-1}> row_en2<0:{levels-1}> cnt_b{bits-1} VDD VSS\n'
+                    + f'*.PININFO IN<0:{ICn-1}>:I RSTN:I VDD:I VSS:I row_en2<0:{levels-1}>:I row_en1<0:{group-1}>:I cnt_b{bits-1}:I SUM<0:{arr_w-1}>:O\n'
+                    + ''.join(f'XI{w} SUM<{w*sum_w}:{w*sum_w+sum_w-1}> IN_N_BUF<0:{in_w-1}> RSTN row_en1<0:{group-1}> row_en2<0:{levels-1}> sign_inv<0:{ICn-1}> VDD VSS / {bits}Cols_arr{{a}}_oc{w}\n'
+                              for w in range(OCn))
+                    # XI18<0> in_buf<0> IN_N_BUF<0:255> VDD VSS row_en1<0:15> / IN_gate
+                    # XI18<1> in_buf<1> IN_N_BUF<0:255> VDD VSS row_en1<0:15> / IN_gate
+                    # XI38<0:15> IN<0:15> cnt_msb VDD VDD VSS VSS sign_inv<0:15> / AND2V1_140P7T40H
+                    # XI26<0:15> IN<0:15> VDD VDD VSS VSS IN_N<0:15> / INV1_140P7T40H
+                    # XI20<0:15> IN_N<0:15> VDD VDD VSS VSS in_buf<0:15> / BUFV16_140P7T40H
+                    + STAR_LINE + STAR_LINE)
+
+    def cell_view(self, weights):
+        """
+        权重矩阵 -> [OC][bit(MSB在前)][IC][row]的Cell列视图（不拷贝数据）
+        weights: ICn*rows行 x OCn*bits列的0/1矩阵，cell_view(weights)[w, j, i]即第i个IC、第w*bits+j列的Cell
+        """
+        w = np.asarray(weights, dtype=np.uint8).reshape(self.ICn, self.rows, self.OCn, self.bits)
+        return w.transpose(2, 3, 0, 1)
+
+    def cell_columns(self, weights):
+        # 按生成顺序(OC, bit, IC)展平的Cell列，形状(OCn*bits*ICn, rows)
+        return self.cell_view(weights).reshape(-1, self.rows)
+
+    def render_cells(self, columns, names):
+        # 批量渲染Cell子电路：每行的晶体管语句按权重从两组预生成语句中选取
+        if len(columns) == 0:
+            return []
+        body = np.empty((len(columns), self.rows + 2), dtype=object)
+        body[:, 1:-1] = np.where(columns.astype(bool), self.dev_one, self.dev_zero)
+        body[:, 0] = [self.cell_head.format(name=name) for name in names]
+        body[:, -1] = self.cell_tail
+        return [''.join(row) for row in body]
+
+    def render(self, weights, i_arr, dedup=True):
+        """
+        渲染一个阵列的网表主体（不含front/back）
+
+        返回:
+        (网表文本, Cell映射表行列表, Cell子电路数)
+        """
+        columns = self.cell_columns(weights)
+        n = len(columns)
+        names = [f'Cell_arr{i_arr}_ic{i}_col{self.bits-1-j}_oc{w}'
+                 for w in range(self.OCn) for j in range(self.bits) for i in range(self.ICn)]
+        if dedup:
+            emit, uid = _dedup(columns)
+            refs = [f'Cell_arr{i_arr}_u{u}' for u in uid]
+            cell_map = [f'{name} {ref}\n' for name, ref in zip(names, refs)]
+        else:
+            emit = np.ones(n, dtype=bool)
+            refs = names
+            cell_map = []
+        rendered = iter(self.render_cells(columns[emit], [r for r, e in zip(refs, emit) if e]))
+
+        parts = []
+        for w in range(self.OCn):
+            for j in range(self.bits):
+                base = (w * self.bits + j) * self.ICn
+                parts.extend(next(rendered) for k in range(base, base + self.ICn) if emit[k])
+                parts.append(self.col[0 if j == 0 else 1].format(b=self.bits-1-j, a=i_arr, w=w, c=refs[base:base + self.ICn]))
+            parts.append(self.cols.format(a=i_arr, w=w))
+        parts.append(self.arr.format(a=i_arr))
+        return ''.join(parts), cell_map, int(emit.sum())
+
+    def render_oc(self, weights, i_arr, w, dedup=True):
+        """
+        只渲染第w个OC（Cell + bits个Col + {bits}Cols_arr{i_arr}_oc{w}），用于分区输出
+        去重范围限定在本OC内，共享子电路名为Cell_arr{i_arr}_oc{w}_u{n}，各分区文件互不依赖
+
+        返回:
+        (网表文本, Cell映射表行列表, Cell子电路数)
+        """
+        columns = self.cell_view(weights)[w].reshape(-1, self.rows)
+        names = [f'Cell_arr{i_arr}_ic{i}_col{self.bits-1-j}_oc{w}' for j in range(self.bits) for i in range(self.ICn)]
+        if dedup:
+            emit, uid = _dedup(columns)
+            refs = [f'Cell_arr{i_arr}_oc{w}_u{u}' for u in uid]
+            cell_map = [f'{name} {ref}\n' for name, ref in zip(names, refs)]
+        else:
+            emit = np.ones(len(columns), dtype=bool)
+            refs = names
+            cell_map = []
+        rendered = iter(self.render_cells(columns[emit], [r for r, e in zip(refs, emit) if e]))
+
+        parts = []
+        for j in range(self.bits):
+            base = j * self.ICn
+            parts.extend(next(rendered) for k in range(base, base + self.ICn) if emit[k])
+            parts.append(self.col[0 if j == 0 else 1].format(b=self.bits-1-j, a=i_arr, w=w, c=refs[base:base + self.ICn]))
+        parts.append(self.cols.format(a=i_arr, w=w))
+        return ''.join(parts), cell_map, int(emit.sum())
+
+    def oc_ports(self, i_arr=0, w=0):
+        """{bits}Cols_arr{a}_oc{w}子电路的(名字, 端口列表)，所有OC分区一致"""
+        return _subckt_ports(self.cols.format(a=i_arr, w=w))
+
+    def arr_ports(self, i_arr=0):
+        """Arr{a}子电路的(名字, 端口列表)"""
+        return _subckt_ports(self.arr.format(a=i_arr))
+
+
+def _dedup(columns):
+    # 按96bit图样哈希：相同图样共享一个子电路，编号按首次出现顺序
+    # 返回(是否为首次出现, 每列的共享编号)
+    packed = np.ascontiguousarray(np.packbits(columns, axis=1))
+    keys = packed.view(f'V{packed.shape[1]}').ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    emit = np.zeros(len(columns), dtype=bool)
+    emit[first] = True
+    return emit, rank[inverse.ravel()]
+
+
+def _subckt_ports(text):
+    # 解析第一个.SUBCKT语句（含+续行）的子电路名和端口
+    lines = text.split('\n')
+    start = next(k for k, line in enumerate(lines) if line.startswith('.SUBCKT'))
+    tokens = lines[start].split()[1:]
+    for line in lines[start + 1:]:
+        if not line.startswith('+'):
+            break
+        tokens += line[1:].split()
+    return tokens[0], tokens[1:]
+
+
+DEFAULT_TEMPLATE = NetlistTemplate()
+
+
+def generate_netlist(input_filename,i_arr,dedup=True):
+    return write_netlist(read_weights(input_filename), i_arr, dedup)
+
+@profiled('netlist.write', items=lambda weights, *args, **kwargs: np.size(weights))
+def write_netlist(weights,i_arr,dedup=True,template=DEFAULT_TEMPLATE):
+    # weights: 16*96行 x 16*8列的0/1二维数据（read_weights返回的uint8数组，列表也可）
+    # dedup=True时按96bit权重图样对Cell去重：相同图样只生成一个共享子电路Cell_arr{i_arr}_u{n}，
+    # 各Col通过实例引用，原Cell名到共享子电路名的对应关系写入Array{i_arr}_cellmap.txt
+    # 返回该阵列实际生成的Cell子电路数
     # 生成网表文件
     with open('array_netlist_front.txt', 'r', encoding='utf-8') as file1:
         content1 = file1.read()
     with open('array_netlist_back.txt', 'r', encoding='utf-8') as file3:
         content3 = file3.read()
-    
+
+    with span('netlist.render', items=np.size(weights)):
+        body, cell_map, n_cells = template.render(weights, i_arr, dedup)
     with open(f'./Array_netlists_40n/Array{i_arr}', 'w', encoding='utf-8') as output_file:
+        output_file.write(content1 + STAR_LINE + STAR_LINE + body + content3)
 
-        output_file.write(content1)
-        output_file.write(f'************************************************************************\n')
-        output_file.write(f'************************************************************************\n')
-
-        for w in range(16): #OC
-            # with open(f'./8bCols_netlists/8Cols_arr{i_arr}_oc{k}', 'w', encoding='utf-8') as output_file:
-            for j in range(8): #8bit   msb-lsb j=0->msb,j=7->lsb
-                for i in range(16):  #IC
-                    w_cell = [row[w*8+j] for row in weights[i*96:(i+1)*96]] #第w*8+j列 第0-15行，中括号左闭右开，行列索引从0开始
-                    
-                    output_file.write(f"****Sub-Circuit for Cell_arr{i_arr}_ic{i}_col{7-j}_oc{w}, May 12 2025*****\n")
-                    output_file.write(f".SUBCKT Cell_arr{i_arr}_ic{i}_col{7-j}_oc{w} Cell_out IN<0:15> \n+ RSTN VDD VSS \n+ row_2level<0:5> \n+ row_en<0:15>\n")
-                    output_file.write(f'*.PININFO IN<0:15>:I Reset_:I VDD:I VSS:I row_2level<0>:I row_2level<1>:I\n')
-                    output_file.write(f'*.PININFO row_2level<2>:I row_2level<3>:I row_2level<4>:I row_2level<5>:I\n')
-                    output_file.write(f'*.PININFO row_en<0>:I row_en<1>:I row_en<2>:I row_en<3>:I row_en<4>:I\n')
-                    output_file.write(f'*.PININFO row_en<5>:I row_en<6>:I row_en<7>:I row_en<8>:I row_en<9>:I\n')
-                    output_file.write(f'*.PININFO row_en<10>:I row_en<11>:I row_en<12>:I row_en<13>:I row_en<14>:I\n')
-                    output_file.write(f'*.PININFO row_en<15>:I Cell_out:O\n')
-                    for k in range(96):
-                        if w_cell[k]==1:
-                            output_file.write(f'MNM{k} mid_out{k//16} row_en<{k%16}> IN<{k%16}> VSS nhvt09_ckt m=1 l=40n w=100n\n')
-                        elif w_cell[k]==0 :
-                            output_file.write(f'MNM{k} net{k} row_en<{k%16}> IN<{k%16}> VSS nhvt09_ckt m=1 l=40n w=100n\n')
-                    
-                    output_file.write(f'MPM1 Cell_out RSTN VDD VDD plvt09_ckt m=1 l=40n w=100n\n')
-                    output_file.write(f'MNM96 Cell_out row_2level<0> mid_out0 VSS nhvt09_ckt m=1 l=40n w=100n\n')
-                    output_file.write(f'MNM97 Cell_out row_2level<1> mid_out1 VSS nhvt09_ckt m=1 l=40n w=100n\n')
-                    output_file.write(f'MNM98 Cell_out row_2level<2> mid_out2 VSS nhvt09_ckt m=1 l=40n w=100n\n')
-                    output_file.write(f'MNM99 Cell_out row_2level<3> mid_out3 VSS nhvt09_ckt m=1 l=40n w=100n\n')
-                    output_file.write(f'MNM100 Cell_out row_2level<4> mid_out4 VSS nhvt09_ckt m=1 l=40n w=100n\n')
-                    output_file.write(f'MNM101 Cell_out row_2level<5> mid_out5 VSS nhvt09_ckt m=1 l=40n w=100n\n')
-                    output_file.write(f'.ENDS\n')
-                if j==0:
-                    output_file.write(f'************************************************************************\n')
-                    output_file.write(f'.SUBCKT Col{7-j}_arr{i_arr}_oc{w} OUT<0:5> IN<0:255>\n')
-                    output_file.write(f'+ RSTN VDD VSS row_2level<0:5> row_en<0:15> sign_inv<0:15>\n')
-                    output_file.write(f'*.PININFO IN<0:255>:I RSTN:I VDD:I VSS:I row_2level<0:5>:I row_en<0:15>:I sign_inv<0:15>:I\n')
-                    output_file.write(f'*.PININFO OUT<0:5>:O\n')
-                    output_file.write(f'XI0 Cell_out<0> IN<0:15> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic0_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI1 Cell_out<1> IN<16:31> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic1_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI2 Cell_out<2> IN<32:47> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic2_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI3 Cell_out<3> IN<48:63> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic3_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI4 Cell_out<4> IN<64:79> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic4_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI5 Cell_out<5> IN<80:95> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic5_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI6 Cell_out<6> IN<96:111> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic6_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI7 Cell_out<7> IN<112:127> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic7_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI8 Cell_out<8> IN<128:143> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic8_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI9 Cell_out<9> IN<144:159> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic9_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI10 Cell_out<10> IN<160:175> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic10_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI11 Cell_out<11> IN<176:191> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic11_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI12 Cell_out<12> IN<192:207> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic12_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI13 Cell_out<13> IN<208:223> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic13_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI14 Cell_out<14> IN<224:239> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic14_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI15 Cell_out<15> IN<240:255> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic15_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI16 OUT<0:5> Cell_out<0:15> VDD VSS sign_inv<0:15> / AdderTree_sign_domino\n')
-                    output_file.write(f'.ENDS\n')
-                else :
-                    output_file.write(f'************************************************************************\n')
-                    output_file.write(f'.SUBCKT Col{7-j}_arr{i_arr}_oc{w} OUT<0:4> IN<0:255>\n')
-                    output_file.write(f'+ RSTN VDD VSS row_2level<0:5> row_en<0:15> sign_inv<0:15>\n')
-                    output_file.write(f'*.PININFO IN<0:255>:I RSTN:I VDD:I VSS:I row_2level<0:5>:I row_en<0:15>:I sign_inv<0:15>:I\n')
-                    output_file.write(f'*.PININFO OUT<0:4>:O\n')
-                    output_file.write(f'XI0 Cell_out<0> IN<0:15> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic0_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI1 Cell_out<1> IN<16:31> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic1_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI2 Cell_out<2> IN<32:47> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic2_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI3 Cell_out<3> IN<48:63> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic3_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI4 Cell_out<4> IN<64:79> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic4_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI5 Cell_out<5> IN<80:95> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic5_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI6 Cell_out<6> IN<96:111> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic6_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI7 Cell_out<7> IN<112:127> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic7_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI8 Cell_out<8> IN<128:143> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic8_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI9 Cell_out<9> IN<144:159> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic9_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI10 Cell_out<10> IN<160:175> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic10_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI11 Cell_out<11> IN<176:191> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic11_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI12 Cell_out<12> IN<192:207> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic12_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI13 Cell_out<13> IN<208:223> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic13_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI14 Cell_out<14> IN<224:239> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic14_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI15 Cell_out<15> IN<240:255> RSTN VDD VSS row_2level<0:5> row_en<0:15> / Cell_arr{i_arr}_ic15_col{7-j}_oc{w}\n')
-                    output_file.write(f'XI16 OUT<0:4> Cell_out<0:15> VDD VSS sign_inv<0:15> / AdderTree_domino\n')
-                    output_file.write(f'.ENDS\n')
-            output_file.write(f'************************************************************************\n')
-            output_file.write(f'.SUBCKT 8Cols_arr{i_arr}_oc{w} SUM<0:12> IN<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS\n')
-            output_file.write(f'*.PININFO IN<0:255>:I RSTN:I VDD:I VSS:I row_en2<0:5>:I row_en1<0:15>:I sign_inv<0:15>:I SUM<0:12>:O\n')
-            output_file.write(f'XI0 SUM<0>,b0<1:4> IN<0:255> RSTN VDD VSS row_en2<0:5> row_en1<0:15> sign_inv<0:15> / Col0_arr{i_arr}_oc{w}\n')
-            output_file.write(f'XI1 b1<0:4> IN<0:255> RSTN VDD VSS row_en2<0:5> row_en1<0:15> sign_inv<0:15> / Col1_arr{i_arr}_oc{w}\n')
-            output_file.write(f'XI2 b2<0:4> IN<0:255> RSTN VDD VSS row_en2<0:5> row_en1<0:15> sign_inv<0:15> / Col2_arr{i_arr}_oc{w}\n')
-            output_file.write(f'XI3 b3<0:4> IN<0:255> RSTN VDD VSS row_en2<0:5> row_en1<0:15> sign_inv<0:15> / Col3_arr{i_arr}_oc{w}\n')
-            output_file.write(f'XI4 b4<0:4> IN<0:255> RSTN VDD VSS row_en2<0:5> row_en1<0:15> sign_inv<0:15> / Col4_arr{i_arr}_oc{w}\n')
-            output_file.write(f'XI5 b5<0:4> IN<0:255> RSTN VDD VSS row_en2<0:5> row_en1<0:15> sign_inv<0:15> / Col5_arr{i_arr}_oc{w}\n')
-            output_file.write(f'XI6 b6<0:4> IN<0:255> RSTN VDD VSS row_en2<0:5> row_en1<0:15> sign_inv<0:15> / Col6_arr{i_arr}_oc{w}\n')
-            output_file.write(f'XI7 b7<0:5> IN<0:255> RSTN VDD VSS row_en2<0:5> row_en1<0:15> sign_inv<0:15> / Col7_arr{i_arr}_oc{w}\n')
-            output_file.write(f'XI8 SUM<1:12> b0<1:4> b1<0:4> b2<0:4> b3<0:4> b4<0:4> b5<0:4> b6<0:4> b7<0:5> VDD VSS / Bit_shifter_full\n')
-            output_file.write(f'.ENDS\n')
-        output_file.write(f'************************************************************************\n')
-        output_file.write(f'.SUBCKT Arr{i_arr} SUM<0:207> IN<0:15> RSTN row_en1<0:15> row_en2<0:5> cnt_b7 VDD VSS\n')
-        output_file.write(f'*.PININFO IN<0:15>:I RSTN:I VDD:I VSS:I row_en2<0:5>:I row_en1<0:15>:I cnt_b7:I SUM<0:207>:O\n')
-        output_file.write(f'XI0 SUM<0:12> IN_N_BUF<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS / 8Cols_arr{i_arr}_oc0\n')
-        output_file.write(f'XI1 SUM<13:25> IN_N_BUF<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS / 8Cols_arr{i_arr}_oc1\n')
-        output_file.write(f'XI2 SUM<26:38> IN_N_BUF<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS / 8Cols_arr{i_arr}_oc2\n')
-        output_file.write(f'XI3 SUM<39:51> IN_N_BUF<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS / 8Cols_arr{i_arr}_oc3\n')
-        output_file.write(f'XI4 SUM<52:64> IN_N_BUF<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS / 8Cols_arr{i_arr}_oc4\n')
-        output_file.write(f'XI5 SUM<65:77> IN_N_BUF<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS / 8Cols_arr{i_arr}_oc5\n')
-        output_file.write(f'XI6 SUM<78:90> IN_N_BUF<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS / 8Cols_arr{i_arr}_oc6\n')
-        output_file.write(f'XI7 SUM<91:103> IN_N_BUF<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS / 8Cols_arr{i_arr}_oc7\n')
-        output_file.write(f'XI8 SUM<104:116> IN_N_BUF<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS / 8Cols_arr{i_arr}_oc8\n')
-        output_file.write(f'XI9 SUM<117:129> IN_N_BUF<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS / 8Cols_arr{i_arr}_oc9\n')
-        output_file.write(f'XI10 SUM<130:142> IN_N_BUF<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS / 8Cols_arr{i_arr}_oc10\n')
-        output_file.write(f'XI11 SUM<143:155> IN_N_BUF<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS / 8Cols_arr{i_arr}_oc11\n')
-        output_file.write(f'XI12 SUM<156:168> IN_N_BUF<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS / 8Cols_arr{i_arr}_oc12\n')
-        output_file.write(f'XI13 SUM<169:181> IN_N_BUF<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS / 8Cols_arr{i_arr}_oc13\n')
-        output_file.write(f'XI14 SUM<182:194> IN_N_BUF<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS / 8Cols_arr{i_arr}_oc14\n')
-        output_file.write(f'XI15 SUM<195:207> IN_N_BUF<0:255> RSTN row_en1<0:15> row_en2<0:5> sign_inv<0:15> VDD VSS / 8Cols_arr{i_arr}_oc15\n')
-        # output_file.write(f'XI18<0> in_buf<0> IN_N_BUF<0:255> VDD VSS row_en1<0:15> / IN_gate\n')
-        # output_file.write(f'XI18<1> in_buf<1> IN_N_BUF<0:255> VDD VSS row_en1<0:15> / IN_gate\n')
-        # output_file.write(f'XI38<0:15> IN<0:15> cnt_msb VDD VDD VSS VSS sign_inv<0:15> / AND2V1_140P7T40H\n')
-        # output_file.write(f'XI26<0:15> IN<0:15> VDD VDD VSS VSS IN_N<0:15> / INV1_140P7T40H\n')
-        # output_file.write(f'XI20<0:15> IN_N<0:15> VDD VDD VSS VSS in_buf<0:15> / BUFV16_140P7T40H\n')
-
-                
-        output_file.write(f'************************************************************************\n')
-        output_file.write(f'************************************************************************\n')
-        output_file.write(content3)
+    if dedup:
+        with open(f'./Array_netlists_40n/Array{i_arr}_cellmap.txt', 'w', encoding='utf-8') as map_file:
+            map_file.write(''.join(cell_map))
+    return n_cells
 
 
 
-# main
-for i in range(1,17):
-    input_filename = f'output_{i}.txt'
-    generate_netlist(input_filename,i)
+@profiled('netlist.concat', items=lambda num_arrays=16: num_arrays)
+def concat_arrays(num_arrays=16):
+    # 按文件流拼接，支持sendfile的平台在内核中直接拷贝，不经过Python缓冲
+    with open(f'./Array_netlists_40n/Array_all', 'wb') as outfile:
+        for i in range(1,num_arrays+1):
+            with open(f'./Array_netlists_40n/Array{i}', 'rb') as infile:
+                _copy_file(infile, outfile)
+
+
+def _copy_file(infile, outfile):
+    if hasattr(os, 'sendfile'):
+        outfile.flush()
+        size = os.fstat(infile.fileno()).st_size
+        offset = 0
+        try:
+            while offset < size:
+                sent = os.sendfile(outfile.fileno(), infile.fileno(), offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            outfile.seek(0, os.SEEK_END)
+            return
+        except OSError:
+            infile.seek(offset)
+    shutil.copyfileobj(infile, outfile, 1 << 20)
 
 
-with open(f'./Array_netlists_40n/Array_all', 'w', encoding='utf-8') as outfile:
-    for i in range(1,17):
-        with open(f'./Array_netlists_40n/Array{i}', 'r', encoding='utf-8') as infile:
-            outfile.write(infile.read())  # 直接写入全部内容
\ No newline at end of file
+def file_hash(filename):
+    h = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+CACHE_FILE = './Array_netlists_40n/build_cache.json'
+
+
+def _outputs(i_arr, dedup):
+    # write_netlist为一个阵列生成的文件
+    names = [f'./Array_netlists_40n/Array{i_arr}']
+    if dedup:
+        names.append(f'./Array_netlists_40n/Array{i_arr}_cellmap.txt')
+    return names
+
+
+def _stamp(filename):
+    # 输出文件的(大小, 修改时间)，文件不存在时为None；被删除或被其他途径改写后与缓存不一致
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _common(dedup, template):
+    # front/back和生成参数变化时所有阵列都要重新生成
+    return {
+        'front': file_hash('array_netlist_front.txt'),
+        'back': file_hash('array_netlist_back.txt'),
+        'dedup': dedup,
+        'geometry': [template.ICn, template.OCn, template.rows, template.bits, template.group],
+    }
+
+
+def _array_entry(i_arr, digest, dedup):
+    return {'input': digest, 'outputs': {name: _stamp(name) for name in _outputs(i_arr, dedup)}}
+
+
+def _save_cache(common, arrays):
+    with open(CACHE_FILE, 'w', encoding='utf-8') as file:
+        json.dump({'common': common, 'arrays': arrays, 'all': _stamp('./Array_netlists_40n/Array_all')}, file, indent=1)
+
+
+def build_all(num_arrays=16, dedup=True, force=False, template=DEFAULT_TEMPLATE, weight_dir=WEIGHT_DIR):
+    """
+    增量生成网表：缓存weight_dir/output_{i}.txt与array_netlist_front/back.txt的内容哈希以及各输出文件的(大小, 修改时间)，
+    只重新生成输入发生变化或输出缺失/被改写的阵列，有阵列更新或Array_all不一致时重新拼接Array_all
+
+    返回:
+    重新生成的阵列编号列表
+    """
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        cache = {}
+
+    common = _common(dedup, template)
+    if force or cache.get('common') != common:
+        cache = {}
+    arrays = cache.get('arrays', {})
+
+    rebuilt = []
+    for i in range(1, num_arrays+1):
+        input_filename = weight_file(i, weight_dir)
+        digest = file_hash(input_filename)
+        entry = arrays.get(str(i))
+        if entry == _array_entry(i, digest, dedup) and None not in entry['outputs'].values():
+            continue
+        write_netlist(read_weights(input_filename), i, dedup, template)
+        arrays[str(i)] = _array_entry(i, digest, dedup)
+        rebuilt.append(i)
+
+    if rebuilt or cache.get('all') is None or cache.get('all') != _stamp('./Array_netlists_40n/Array_all'):
+        concat_arrays(num_arrays)
+    _save_cache(common, arrays)
+    return rebuilt
+
+
+def record_build(num_arrays=16, dedup=True, template=DEFAULT_TEMPLATE, weight_dir=WEIGHT_DIR):
+    """
+    其他途径（parallel_build.build_parallel）生成全部阵列网表和Array_all之后，按当前的源权重和输出重写缓存，
+    使之后的build_all以这次生成的结果为准
+    """
+    arrays = {str(i): _array_entry(i, file_hash(weight_file(i, weight_dir)), dedup) for i in range(1, num_arrays+1)}
+    _save_cache(_common(dedup, template), arrays)
+
+
+PARTITION_DIR = './Array_netlists_40n/partitioned'
+
+
+@profiled('netlist.write_partitioned', items=lambda weights, *args, **kwargs: np.size(weights))
+def write_partitioned(weights, i_arr, dedup=True, template=DEFAULT_TEMPLATE, out_dir=PARTITION_DIR):
+    """
+    分区输出一个阵列：每个OC一个自包含的文件arr{i}_oc{w}.sp，阵列文件arr{i}.sp通过.INCLUDE引用各OC文件并定义Arr{i}
+    front/back不重复写入，由write_shared()写一次
+
+    返回:
+    该阵列各分区的清单（字典列表）
+    """
+    jobs = []
+    includes = []
+    sum_w = template.sum_width
+    for w in range(template.OCn):
+        body, cell_map, n_cells = template.render_oc(weights, i_arr, w, dedup)
+        filename = f'arr{i_arr}_oc{w}.sp'
+        with open(os.path.join(out_dir, filename), 'w', encoding='utf-8') as file:
+            file.write(body)
+        if dedup:
+            with open(os.path.join(out_dir, f'arr{i_arr}_oc{w}_cellmap.txt'), 'w', encoding='utf-8') as file:
+                file.write(''.join(cell_map))
+        subckt, ports = template.oc_ports(i_arr, w)
+        jobs.append({'kind': 'oc', 'array': i_arr, 'oc': w, 'file': filename, 'subckt': subckt, 'ports': ports,
+                     'cells': n_cells, 'sum_bits': [w * sum_w, w * sum_w + sum_w - 1]})
+        includes.append(f".INCLUDE '{filename}'\n")
+
+    filename = f'arr{i_arr}.sp'
+    with open(os.path.join(out_dir, filename), 'w', encoding='utf-8') as file:
+        file.write(''.join(includes) + template.arr.format(a=i_arr))
+    subckt, ports = template.arr_ports(i_arr)
+    jobs.append({'kind': 'array', 'array': i_arr, 'file': filename, 'subckt': subckt, 'ports': ports,
+                 'includes': [job['file'] for job in jobs]})
+    return jobs
+
+
+def write_shared(out_dir=PARTITION_DIR):
+    """front/back各写一次：header.sp、footer.sp"""
+    os.makedirs(out_dir, exist_ok=True)
+    shutil.copyfile('array_netlist_front.txt', os.path.join(out_dir, 'header.sp'))
+    shutil.copyfile('array_netlist_back.txt', os.path.join(out_dir, 'footer.sp'))
+
+
+def build_partitioned(num_arrays=16, dedup=True, template=DEFAULT_TEMPLATE, out_dir=PARTITION_DIR, weight_dir=WEIGHT_DIR):
+    """
+    生成全部阵列的分区网表和清单manifest.json（sources记录各阵列源权重的内容哈希，供netlist_verify核对）
+    每个OC分区可作为独立的仿真任务：header.sp + arr{i}_oc{w}.sp + footer.sp，端口列表一致
+
+    返回:
+    清单字典
+    """
+    write_shared(out_dir)
+    jobs = []
+    sources = {}
+    for i in range(1, num_arrays+1):
+        input_filename = weight_file(i, weight_dir)
+        jobs += write_partitioned(read_weights(input_filename), i, dedup, template, out_dir)
+        sources[str(i)] = file_hash(input_filename)
+    manifest = {
+        'header': 'header.sp',
+        'footer': 'footer.sp',
+        'geometry': [template.ICn, template.OCn, template.rows, template.bits, template.group],
+        'sum_width': template.sum_width,
+        'dedup': dedup,
+        'sources': sources,
+        'jobs': jobs,
+    }
+    with open(os.path.join(out_dir, 'manifest.json'), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=1)
+    return manifest
+
+
+def merge_results(out_dir=PARTITION_DIR, results_dir=None, suffix='.csv'):
+    """
+    合并各OC分区的仿真结果为每个阵列一个文件
+
+    每个OC任务的结果为results_dir/arr{i}_oc{w}{suffix}，逗号分隔，首行为表头，
+    第一列为时间，其后为该OC的SUM<0>~SUM<sum_width-1>；
+    合并结果results_dir/arr{i}{suffix}的列为时间和Arr{i}的SUM<0>~SUM<OCn*sum_width-1>。
+    各OC结果的时间列必须一致。
+
+    返回:
+    合并后的文件列表
+    """
+    results_dir = results_dir or out_dir
+    with open(os.path.join(out_dir, 'manifest.json'), 'r', encoding='utf-8') as file:
+        manifest = json.load(file)
+    by_array = {}
+    for job in manifest['jobs']:
+        if job['kind'] == 'oc':
+            by_array.setdefault(job['array'], []).append(job)
+
+    merged = []
+    for i_arr, jobs in sorted(by_array.items()):
+        jobs.sort(key=lambda job: job['oc'])
+        data = [np.loadtxt(os.path.join(results_dir, job['file'][:-3] + suffix), delimiter=',', skiprows=1, ndmin=2)
+                for job in jobs]
+        t = data[0][:, 0]
+        for job, d in zip(jobs, data):
+            if len(d) != len(t) or not np.array_equal(d[:, 0], t):
+                raise ValueError(f"{job['file']}的时间点与其他OC不一致")
+        table = np.column_stack([t] + [d[:, 1:] for d in data])
+        width = table.shape[1] - 1
+        filename = os.path.join(results_dir, f'arr{i_arr}{suffix}')
+        np.savetxt(filename, table, delimiter=',', fmt='%.12g', comments='',
+                   header=','.join(['time'] + [f'SUM<{n}>' for n in range(width)]))
+        merged.append(filename)
+    return merged
+
+
+# main
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='生成CIM阵列网表（增量）')
+    parser.add_argument('--force', action='store_true', help='忽略缓存，全部重新生成')
+    parser.add_argument('--no-dedup', action='store_true', help='不对相同Cell去重')
+    parser.add_argument('--partition', action='store_true', help='按阵列/OC分区输出，并写manifest.json')
+    parser.add_argument('--merge', metavar='RESULTS_DIR', help='合并RESULTS_DIR中各OC分区的仿真结果')
+    args = parser.parse_args()
+
+    start = time.time()
+    if args.merge:
+        merged = merge_results(results_dir=args.merge)
+        print(f'合并完成: {len(merged)}个阵列，耗时{time.time() - start:.2f}s')
+        raise SystemExit
+    if args.partition:
+        manifest = build_partitioned(dedup=not args.no_dedup)
+        print(f'分区网表: {len(manifest["jobs"])}个文件，耗时{time.time() - start:.2f}s')
+        raise SystemExit
+    rebuilt = build_all(dedup=not args.no_dedup, force=args.force)
+    print(f'重新生成的阵列: {rebuilt if rebuilt else "无"}，耗时{time.time() - start:.2f}s')
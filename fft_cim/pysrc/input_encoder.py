@@ -0,0 +1,196 @@
+import numpy as np
+
+from profiling import profiled
+
+
+# CIM阵列输入激励编码：把量化后的激活值/FFT采样转换为按周期的位平面流
+# 每个输入向量占bits个周期，LSB在前；最后一个周期是符号位，cnt_b7=1
+# 每个周期的信号：IN<0:15>(每个IC一位)、row_en1<0:15>、row_en2<0:5>(两级选中第16*g+r行)、cnt_b7
+# 与cim_array_model.CimArrayModel的端口约定一致
+
+
+@profiled('quantize.input', items=lambda data, *args, **kwargs: np.size(data))
+def quantize(data, bits=8, frac_bits=7):
+    """
+    把实数/复数数据量化为bits位补码整数（四舍五入，超出范围时饱和）
+
+    参数:
+    data: 实数或复数数组
+    bits: 总位数（含符号位）
+    frac_bits: 小数位数
+
+    返回:
+    实数输入返回同形状的int64数组；复数输入返回形状(2, ...)的数组，[0]为实部，[1]为虚部
+    """
+    data = np.asarray(data)
+    if np.iscomplexobj(data):
+        data = np.stack([data.real, data.imag])
+    q = np.round(data * (1 << frac_bits))
+    return np.clip(q, -(1 << (bits - 1)), (1 << (bits - 1)) - 1).astype(np.int64)
+
+
+def to_vectors(samples, ICn=16):
+    """把一维采样序列按ICn个一组切成输入向量，不足部分补0，返回(B, ICn)"""
+    samples = np.asarray(samples).reshape(-1)
+    pad = (-len(samples)) % ICn
+    return np.concatenate([samples, np.zeros(pad, dtype=samples.dtype)]).reshape(-1, ICn)
+
+
+class BitPlaneStream:
+    """
+    按周期的输入激励，每个属性的第0维为周期
+
+    IN: (C, ICn), row_en1: (C, group), row_en2: (C, levels), cnt_b7: (C,)，均为uint8
+    """
+    def __init__(self, IN, row_en1, row_en2, cnt_b7):
+        self.IN, self.row_en1, self.row_en2, self.cnt_b7 = IN, row_en1, row_en2, cnt_b7
+
+    def __len__(self):
+        return len(self.cnt_b7)
+
+    def ports(self):
+        """按CimArrayModel.sums()的参数顺序返回各信号"""
+        return self.IN, self.row_en1, self.row_en2, self.cnt_b7
+
+    def columns(self):
+        """所有单比特信号，(信号名列表, (C, 信号数)的0/1矩阵)"""
+        names = ([f'IN<{i}>' for i in range(self.IN.shape[1])]
+                 + [f'row_en1<{r}>' for r in range(self.row_en1.shape[1])]
+                 + [f'row_en2<{g}>' for g in range(self.row_en2.shape[1])]
+                 + ['cnt_b7'])
+        return names, np.hstack([self.IN, self.row_en1, self.row_en2, self.cnt_b7[:, None]])
+
+
+def encode(x, line, bits=8, group=16, levels=6):
+    """
+    把输入向量编码为位串行的位平面流
+
+    参数:
+    x: (B, ICn)的有符号整数输入（bits位补码）
+    line: 每个向量使用的权重行号，整数或(B,)数组
+    bits: 输入位数
+
+    返回:
+    BitPlaneStream，共B*bits个周期
+    """
+    x = np.asarray(x, dtype=np.int64)
+    B, ICn = x.shape
+    x_u = x & ((1 << bits) - 1)
+    IN = ((x_u[:, None, :] >> np.arange(bits)[None, :, None]) & 1).astype(np.uint8).reshape(B * bits, ICn)
+
+    line = np.repeat(np.broadcast_to(np.asarray(line), (B,)), bits)
+    row_en1 = np.zeros((B * bits, group), dtype=np.uint8)
+    row_en2 = np.zeros((B * bits, levels), dtype=np.uint8)
+    row_en1[np.arange(B * bits), line % group] = 1
+    row_en2[np.arange(B * bits), line // group] = 1
+    cnt_b7 = np.tile((np.arange(bits) == bits - 1).astype(np.uint8), B)
+    return BitPlaneStream(IN, row_en1, row_en2, cnt_b7)
+
+
+def pack(stream):
+    """
+    每个周期的全部信号打包为一个整数：IN在低位，其后依次为row_en1、row_en2、cnt_b7
+
+    返回:
+    (C,)的uint64数组
+    """
+    _, cols = stream.columns()
+    return cols.astype(np.uint64) @ (np.uint64(1) << np.arange(cols.shape[1], dtype=np.uint64))
+
+
+def write_binary(filename, stream):
+    """
+    紧凑二进制格式：每个周期按pack()的位序取最少的整字节数，小端存放
+    16+16+6+1=39位时每周期5字节
+    """
+    _, cols = stream.columns()
+    n_bytes = (cols.shape[1] + 7) // 8
+    words = pack(stream).astype('<u8').view(np.uint8).reshape(-1, 8)[:, :n_bytes]
+    with open(filename, 'wb') as file:
+        file.write(words.tobytes())
+
+
+def read_binary(filename, ICn=16, group=16, levels=6):
+    """读取write_binary()写出的文件，返回BitPlaneStream"""
+    width = ICn + group + levels + 1
+    n_bytes = (width + 7) // 8
+    raw = np.fromfile(filename, dtype=np.uint8).reshape(-1, n_bytes)
+    bits = np.unpackbits(raw, axis=1, bitorder='little')[:, :width]
+    return BitPlaneStream(bits[:, :ICn], bits[:, ICn:ICn + group],
+                          bits[:, ICn + group:ICn + group + levels], bits[:, -1])
+
+
+def write_vectors(filename, stream):
+    """
+    表格式向量文件：首行为信号名，之后每周期一行，各信号的0/1字符以空格分隔
+    """
+    names, cols = stream.columns()
+    C, n = cols.shape
+    buf = np.full((C, 2 * n), ord(' '), dtype=np.uint8)
+    buf[:, 0::2] = cols + ord('0')
+    buf[:, -1] = ord('\n')
+    with open(filename, 'wb') as file:
+        file.write(('# ' + ' '.join(names) + '\n').encode())
+        file.write(buf.tobytes())
+
+
+def _digits(values, width):
+    # 非负整数数组 -> 定宽十进制字符(前补0)，形状(n, width)
+    values = np.asarray(values, dtype=np.int64)
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    return ((values[:, None] // powers) % 10 + ord('0')).astype(np.uint8)
+
+
+def write_pwl(filename, stream, period=10e-9, rise=0.1e-9, vdd=0.9):
+    """
+    SPICE PWL激励：每个单比特信号一个电压源，只在电平变化处写拐点
+
+    参数:
+    period: 每个周期的时长(s)
+    rise: 上升/下降时间(s)
+    vdd: 高电平电压(V)
+    """
+    names, cols = stream.columns()
+    period_ps = int(round(period * 1e12))
+    rise_ps = int(round(rise * 1e12))
+    width = len(str(len(cols) * period_ps + rise_ps))
+    volts = np.array([list(f'{0.0:<8g}'.encode()), list(f'{vdd:<8g}'.encode())], dtype=np.uint8)
+    with open(filename, 'wb') as file:
+        for k, name in enumerate(names):
+            col = cols[:, k].astype(np.int64)
+            # 电平变化的周期：t=c*period开始翻转，t+rise到达新电平
+            change = np.flatnonzero(np.diff(col)) + 1
+            times = np.concatenate([[0], np.stack([change * period_ps, change * period_ps + rise_ps], axis=1).ravel()])
+            levels = np.concatenate([[col[0]], np.stack([col[change - 1], col[change]], axis=1).ravel()])
+            lines = np.empty((len(times), 2 + width + 2 + 8 + 1), dtype=np.uint8)
+            lines[:, 0:2] = list(b'+ ')
+            lines[:, 2:2 + width] = _digits(times, width)
+            lines[:, 2 + width:4 + width] = list(b'p ')
+            lines[:, 4 + width:12 + width] = volts[levels]
+            lines[:, -1] = ord('\n')
+            src = name.replace('<', '_').replace('>', '')
+            file.write(f'V{src} {name} 0 PWL(\n'.encode())
+            file.write(lines.tobytes())
+            file.write(b'+ )\n')
+
+
+# main
+if __name__ == '__main__':
+    import time
+    rng = np.random.default_rng(0)
+    # FFT采样示例：复数帧量化后实部、虚部各作为一组输入向量
+    frame = rng.uniform(-1, 1, 2048) + 1j * rng.uniform(-1, 1, 2048)
+    q = quantize(frame)
+    x = np.concatenate([to_vectors(q[0]), to_vectors(q[1])])
+    x = np.tile(x, (1000, 1))
+
+    start = time.time()
+    stream = encode(x, line=rng.integers(0, 96, len(x)))
+    print(f"{len(stream)}个周期编码: {time.time() - start:.3f}s")
+    start = time.time()
+    write_binary('cim_stimulus.bin', stream)
+    write_vectors('cim_stimulus.vec', stream)
+    print(f"二进制/向量文件: {time.time() - start:.3f}s")
+    start = time.time()
+    write_pwl('cim_stimulus.pwl', encode(x[:1000], line=0))
+    print(f"PWL(8000周期): {time.time() - start:.3f}s")
@@ -0,0 +1,209 @@
+import argparse
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from generate_array_netlists import WEIGHT_DIR, NetlistTemplate, file_hash, read_weights, weight_file
+
+
+# 网表反标校验：从生成的Array{i}/Array_all（或分区网表）中还原每个Cell的96位权重图样，与源权重逐列比较
+#
+# 流式逐行解析，只保留当前阵列的Cell图样：
+#   .SUBCKT Cell...            开始一个Cell，MNM{k}接mid_out为1、接net{k}为0（k < rows）
+#   .SUBCKT Col{b}_arr{a}_oc{w} 记录XI{i}引用的Cell名（去重时为共享的Cell_arr{a}_u{n}），.ENDS时与源权重比较
+#   .SUBCKT Arr{a}              一个阵列结束，清空Cell图样
+# 内存占用只与单个阵列的Cell数有关，与阵列数、文件大小无关。
+
+_SUBCKT = re.compile(rb'\.SUBCKT\s+(\S+)')
+_COL = re.compile(rb'Col(\d+)_arr(\d+)_oc(\d+)$')
+_ARR = re.compile(rb'Arr(\d+)$')
+_INST = re.compile(rb'XI(\d+)\s.*/\s*(\S+)\s*$')
+
+
+def load_sources(num_arrays=16, weight_dir=WEIGHT_DIR):
+    """源权重：weight_dir/output_{i}.txt（默认即生成网表时读取的文件），返回{阵列号: 0/1矩阵}"""
+    return {i: read_weights(weight_file(i, weight_dir)) for i in range(1, num_arrays + 1)}
+
+
+def recorded_sources(netlists):
+    """
+    生成网表时记录的源权重哈希：网表所在目录的build_cache.json（Array_all/Array{i}）或manifest.json（分区网表）
+
+    返回:
+    {阵列号: sha256}，没有记录时为空
+    """
+    recorded = {}
+    for directory in {os.path.dirname(os.path.abspath(f)) for f in netlists}:
+        for name, key in (('build_cache.json', 'arrays'), ('manifest.json', 'sources')):
+            try:
+                with open(os.path.join(directory, name), 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                continue
+            for a, entry in data.get(key, {}).items():
+                recorded[int(a)] = entry['input'] if isinstance(entry, dict) else entry
+    return recorded
+
+
+def stale_sources(recorded, num_arrays=16, weight_dir=WEIGHT_DIR):
+    """内容与生成网表时不同（或不存在）的源权重文件的阵列号；这时的不一致来自源文件而不是网表"""
+    stale = []
+    for i in range(1, num_arrays + 1):
+        if i not in recorded:
+            continue
+        try:
+            if file_hash(weight_file(i, weight_dir)) != recorded[i]:
+                stale.append(i)
+        except OSError:
+            stale.append(i)
+    return stale
+
+
+def sources_from_weight_data(weight_data):
+    """源权重：权重张量[阵列行][阵列列][line][IC][OC][bit]，阵列号按行优先从1开始"""
+    from parallel_build import schematic_rows
+    w = np.asarray(weight_data, dtype=np.uint8)
+    w = w.reshape((-1,) + w.shape[2:])
+    return {i + 1: schematic_rows(arr) for i, arr in enumerate(w)}
+
+
+class NetlistVerifier:
+    """
+    参数:
+    sources: {阵列号: ICn*rows行 x OCn*bits列的0/1矩阵}
+    template: 生成网表时使用的NetlistTemplate（只用到几何参数）
+    """
+    def __init__(self, sources, template=None):
+        self.template = template or NetlistTemplate()
+        self.views = {a: self.template.cell_view(w) for a, w in sources.items()}
+        t = self.template
+        self.seen = {a: np.zeros((t.OCn, t.bits), dtype=bool) for a in sources}
+        # 网表中出现过的阵列（.SUBCKT Arr{a}）和OC（Col{b}_arr{a}_oc{w}），只对这些报告缺失的Col，
+        # 这样单独校验一个Array{i}或一个分区网表arr{i}_oc{w}.sp时不会把其余阵列/OC算作缺失
+        self.arrays = set()
+        self.ocs = set()
+        self.mismatches = []
+        self.errors = []
+        self.cells = 0
+
+    def feed(self, lines):
+        """解析一个网表的行（bytes，可以是文件对象），可对多个文件依次调用"""
+        rows = self.template.rows
+        patterns = {}
+        cell = col = None
+        for line in lines:
+            if cell is not None:
+                if line.startswith(b'MNM'):
+                    sp = line.index(b' ')
+                    k = int(line[3:sp])
+                    if k < rows:
+                        cell[1][k] = line[sp + 1] == 109     # b'm': mid_out
+                    continue
+                if line.startswith(b'.ENDS'):
+                    patterns[cell[0]] = bytes(cell[1])
+                    cell = None
+                continue
+            if col is not None:
+                if line.startswith(b'XI'):
+                    m = _INST.match(line)
+                    if m and m.group(2).startswith(b'Cell'):
+                        col[1][int(m.group(1))] = m.group(2)
+                elif line.startswith(b'.ENDS'):
+                    self._check_col(col, patterns)
+                    col = None
+                continue
+            if not line.startswith(b'.SUBCKT'):
+                continue
+            name = _SUBCKT.match(line).group(1)
+            if name.startswith(b'Cell'):
+                cell = (name, bytearray(rows))
+            elif _COL.match(name):
+                col = (tuple(int(v) for v in _COL.match(name).groups()), {})
+            elif _ARR.match(name):
+                self.arrays.add(int(_ARR.match(name).group(1)))
+                patterns = {}
+
+    def _check_col(self, col, patterns):
+        (b, a, w), refs = col
+        t = self.template
+        if a not in self.views:
+            self.errors.append(f'Col{b}_arr{a}_oc{w}: 没有阵列{a}的源权重')
+            return
+        self.ocs.add((a, w))
+        missing = [refs.get(i) for i in range(t.ICn) if patterns.get(refs.get(i)) is None]
+        if missing:
+            self.errors.append(f'Col{b}_arr{a}_oc{w}: 引用的Cell未定义或缺失 {missing}')
+            return
+        got = np.frombuffer(b''.join(patterns[refs[i]] for i in range(t.ICn)), dtype=np.uint8).reshape(t.ICn, t.rows)
+        want = self.views[a][w, t.bits - 1 - b]
+        for i in np.flatnonzero((got != want).any(axis=1)):
+            self.mismatches.append((a, w, b, int(i), np.flatnonzero(got[i] != want[i]).tolist()))
+        self.seen[a][w, t.bits - 1 - b] = True
+        self.cells += t.ICn
+
+    def result(self):
+        """
+        返回:
+        dict: ok, cells（已比较的Cell数）, mismatches [(阵列, OC, Col号b, IC, [不一致的line])],
+              missing [(阵列, OC, Col号b)]（网表中出现的阵列/OC里，源权重中有但网表中没有的Col）, errors
+        """
+        t = self.template
+        missing = [(a, int(w), t.bits - 1 - int(j)) for a, seen in self.seen.items() for w, j in np.argwhere(~seen)
+                   if a in self.arrays or (a, int(w)) in self.ocs]
+        errors = self.errors if self.arrays or self.ocs else self.errors + ['网表中没有找到任何阵列']
+        return {'ok': not (self.mismatches or missing or errors), 'cells': self.cells,
+                'mismatches': self.mismatches, 'missing': missing, 'errors': errors}
+
+
+def verify(netlists, sources, template=None):
+    """
+    流式校验网表文件
+
+    参数:
+    netlists: 网表文件列表（Array_all、Array{i}或分区网表arr{i}_oc{w}.sp）
+    sources: {阵列号: 源权重}；可以多于网表中的阵列（如只校验一个Array{i}），只比较网表中出现的阵列
+
+    返回:
+    NetlistVerifier.result()
+    """
+    verifier = NetlistVerifier(sources, template)
+    for filename in netlists:
+        with open(filename, 'rb', buffering=1 << 20) as file:
+            verifier.feed(file)
+    return verifier.result()
+
+
+# main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='从生成的网表还原Cell权重并与源权重比较')
+    parser.add_argument('netlists', nargs='*', default=['./Array_netlists_40n/Array_all'])
+    parser.add_argument('-n', '--num-arrays', type=int, default=16)
+    parser.add_argument('--weight-dir', default=WEIGHT_DIR, help='output_{i}.txt所在目录，默认为生成网表时读取的目录')
+    parser.add_argument('--weight-data', help='权重张量.npy [阵列行][阵列列][line][IC][OC][bit]，代替output_{i}.txt')
+    args = parser.parse_args()
+
+    start = time.time()
+    if args.weight_data:
+        sources = sources_from_weight_data(np.load(args.weight_data))
+    else:
+        recorded = recorded_sources(args.netlists)
+        if not recorded:
+            print('未找到生成网表时的源权重记录，不核对源文件')
+        stale = stale_sources(recorded, args.num_arrays, args.weight_dir)
+        if stale:
+            print(f'源权重与生成网表时不一致: 阵列{stale}（{args.weight_dir}不是生成网表用的目录，或源权重更新后没有重新生成网表）')
+            raise SystemExit(2)
+        sources = load_sources(args.num_arrays, args.weight_dir)
+    res = verify(args.netlists, sources)
+    print(f"校验{res['cells']}个Cell，耗时{time.time() - start:.2f}s")
+    for a, w, b, i, lines in res['mismatches'][:20]:
+        print(f'  不一致: Arr{a} OC{w} Col{b} IC{i} line {lines}')
+    for a, w, b in res['missing'][:20]:
+        print(f'  缺失: Col{b}_arr{a}_oc{w}')
+    for e in res['errors'][:20]:
+        print(f'  {e}')
+    print('通过' if res['ok'] else f"失败: {len(res['mismatches'])}处不一致，{len(res['missing'])}个Col缺失")
+    raise SystemExit(0 if res['ok'] else 1)
@@ -0,0 +1,313 @@
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import os
+from functools import wraps
+
+import numpy as np
+
+from dft_block import _load_script
+
+
+# 蝶形内核的运算计数（可选插桩）
+#
+# 内核源码不动：counting()期间把各脚本模块里的蝶形函数换成计数包装，退出时换回原函数，不计数时没有任何开销。
+# 包装把数据参数换成Counted值，内核里的每次+/-/*由Counted记到当前级：
+#   cadd: 复数加/减（2次实数加）
+#   cmul: 乘非平凡系数（一般复数4次实数乘+2次实数加，纯实/纯虚系数2次实数乘）
+#   trivial: 乘±1/±j（硬件里只是交换/取反，不占乘法器）
+#   fetch: 调用方传入的旋转因子（w开头的参数）中被非平凡地乘到数据上的个数，即ROM读取次数
+# 同一次蝶形里同一数据乘同一系数只算一次（如radix2_butterfly的w * x1写了两遍，硬件只需一个乘法器）。
+# 级 = 1 + 输入数据的最大级数（输入信号为第0级），与各实现怎样划分阶段无关。
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# 含蝶形内核的脚本: 名称 -> (相对fft_cim的路径, 内核函数名)
+KERNELS = {
+    'mix_radix': (os.path.join('test2', 'mix_radix.py'), ['radix2_butterfly', 'radix3_butterfly', 'radix4_butterfly']),
+    'butterfly2': (os.path.join('test2', 'butterfly2.py'), ['butterfly_operation', 'radix2_butterfly']),
+    'butterfly4': (os.path.join('test2', 'butterfly4.py'), ['radix4_butterfly']),
+    'radix2_8': (os.path.join('test3', 'radix2_8.py'), ['butterfly']),
+}
+OPS = ['butterflies', 'cadd', 'cmul', 'trivial', 'rmul', 'radd', 'fetch']
+TRIVIAL = (1, -1, 1j, -1j)
+SIZES = [8, 16, 32, 64, 128, 256, 512, 1024, 2048]
+
+_modules = {}
+_active = None  # 正在执行的蝶形所属的OpCounter，内核之外为None
+
+
+def load_kernels():
+    """加载（并缓存）含蝶形内核的脚本，返回{名称: 模块}；计数只对这些模块对象生效"""
+    for name, (path, _) in KERNELS.items():
+        if name not in _modules:
+            _modules[name] = _load_script(os.path.join(ROOT, path), 'ops_' + name)
+    return _modules
+
+
+class OpCounter:
+    """
+    按级累计运算次数
+
+    stages: {级: {运算: 次数}}，级从1开始
+    """
+    def __init__(self):
+        self.stages = {}
+        self._ops = None
+
+    def begin(self, stage, twiddles):
+        self._ops = self.stages.setdefault(stage, dict.fromkeys(OPS, 0))
+        self._ops['butterflies'] += 1
+        self._twiddles = twiddles
+        self._products = {}
+        self._fetched = set()
+
+    def end(self):
+        self._ops = None
+
+    def add(self):
+        self._ops['cadd'] += 1
+        self._ops['radd'] += 2
+
+    def mul(self):
+        self._ops['cmul'] += 1
+        self._ops['rmul'] += 4
+        self._ops['radd'] += 2
+
+    def scale(self, x, coef):
+        """数据x乘系数coef，返回乘积（本次蝶形内已算过的直接复用）"""
+        c = complex(coef)
+        key = (id(x), c)
+        if key in self._products:
+            return self._products[key][1]
+        if any(abs(c - t) < 1e-12 for t in TRIVIAL):
+            self._ops['trivial'] += 1
+        else:
+            if abs(c.real) < 1e-12 or abs(c.imag) < 1e-12:
+                self._ops['cmul'] += 1
+                self._ops['rmul'] += 2
+            else:
+                self.mul()
+            if any(coef is w for w in self._twiddles) and id(coef) not in self._fetched:
+                self._fetched.add(id(coef))
+                self._ops['fetch'] += 1
+        product = Counted(x.value * c, x.depth)
+        self._products[key] = (x, product)  # 持有x，保证id在本次蝶形内不被复用
+        return product
+
+    def totals(self):
+        return {op: sum(s[op] for s in self.stages.values()) for op in OPS}
+
+
+def _value(v):
+    return v.value if isinstance(v, Counted) else v
+
+
+def _depth(*args):
+    return max((v.depth for v in args if isinstance(v, Counted)), default=0)
+
+
+class Counted:
+    """计数期间代替复数在内核中流动的数据值，depth为产生它的级"""
+    __slots__ = ('value', 'depth')
+    __array_ufunc__ = None  # numpy标量与Counted运算时交给Counted处理
+
+    def __init__(self, value, depth=0):
+        self.value, self.depth = complex(value), depth
+
+    def __add__(self, other):
+        if _active is not None and (isinstance(other, Counted) or other != 0):
+            _active.add()
+        return Counted(self.value + _value(other), _depth(self, other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if _active is not None and (isinstance(other, Counted) or other != 0):
+            _active.add()
+        return Counted(self.value - _value(other), _depth(self, other))
+
+    def __rsub__(self, other):
+        if _active is not None:
+            _active.add()
+        return Counted(_value(other) - self.value, self.depth)
+
+    def __mul__(self, other):
+        if isinstance(other, Counted):
+            if _active is not None:
+                _active.mul()
+            return Counted(self.value * other.value, _depth(self, other))
+        if _active is not None:
+            return _active.scale(self, other)
+        return Counted(self.value * other, self.depth)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Counted(-self.value, self.depth)
+
+    def __pos__(self):
+        return self
+
+    def __complex__(self):
+        return self.value
+
+    def __repr__(self):
+        return f'Counted({self.value}, depth={self.depth})'
+
+
+def _map(v, func):
+    if isinstance(v, (list, tuple)):
+        return type(v)(_map(e, func) for e in v)
+    return func(v)
+
+
+def _leaves(v):
+    if isinstance(v, (list, tuple)):
+        for e in v:
+            yield from _leaves(e)
+    else:
+        yield v
+
+
+def _counting(func, counter):
+    # w开头的参数是旋转因子，其余是数据
+    is_coef = [p.startswith('w') for p in inspect.signature(func).parameters]
+
+    @wraps(func)
+    def run(*args):
+        global _active
+        args = [a if w else _map(a, lambda v: v if isinstance(v, Counted) else Counted(v)) for a, w in zip(args, is_coef)]
+        data = [v for a, w in zip(args, is_coef) if not w for v in _leaves(a)]
+        stage = 1 + _depth(*data)
+        counter.begin(stage, [v for a, w in zip(args, is_coef) if w for v in _leaves(a)])
+        _active = counter
+        try:
+            out = func(*args)
+        finally:
+            _active = None
+            counter.end()
+        return _map(out, lambda v: Counted(_value(v), stage))
+    return run
+
+
+@contextlib.contextmanager
+def counting(counter=None, modules=None):
+    """
+    with块内给蝶形内核计数，退出时恢复原函数
+
+    参数:
+    counter: 累计到已有的OpCounter，默认新建
+    modules: 要插桩的{名称: 模块}，默认load_kernels()；被测函数须来自这些模块对象
+
+    返回（as）:
+    OpCounter
+    """
+    counter = OpCounter() if counter is None else counter
+    modules = load_kernels() if modules is None else modules
+    saved = []
+    for name, module in modules.items():
+        for func in KERNELS[name][1]:
+            saved.append((module, func, getattr(module, func)))
+            setattr(module, func, _counting(getattr(module, func), counter))
+    try:
+        yield counter
+    finally:
+        for module, func, original in saved:
+            setattr(module, func, original)
+
+
+def count_transform(func, x, modules=None):
+    """
+    运行一次变换func(x)并计数
+
+    返回:
+    (输出列表, OpCounter)
+    """
+    with counting(modules=modules) as counter, contextlib.redirect_stdout(io.StringIO()):
+        y = func(list(x))
+    return _map(list(y), _value), counter
+
+
+def parse_plan(plan, N):
+    """
+    基数方案 -> 各级基数列表
+
+    plan: 'auto'（mix_radix.get_radix_structure）、'radix2'、'radix4'（4的幂之外末级为2），或基数列表如[4, 4, 2]
+    """
+    if plan == 'auto':
+        return load_kernels()['mix_radix'].get_radix_structure(N)
+    if plan in ('radix2', 'radix4'):
+        bits = N.bit_length() - 1
+        if N != 1 << bits:
+            raise ValueError(f'{plan}方案要求N为2的幂，N={N}')
+        return [2] * bits if plan == 'radix2' else [4] * (bits // 2) + [2] * (bits % 2)
+    radices = [int(r) for r in plan]
+    if int(np.prod(radices)) != N:
+        raise ValueError(f'基数{radices}之积不等于N={N}')
+    return radices
+
+
+def plan_cost(N, plan='auto', seed=0):
+    """
+    用mix_radix.mixed_radix_fft_stage按方案逐级计算一次N点变换并计数
+
+    返回:
+    (各级基数, OpCounter)
+    """
+    mix = load_kernels()['mix_radix']
+    radices = parse_plan(plan, N)
+
+    def run(data):
+        processed = 1
+        for radix in radices:
+            data = mix.mixed_radix_fft_stage(data, radix, processed * radix)
+            processed *= radix
+        return data
+
+    rng = np.random.default_rng(seed)
+    _, counter = count_transform(run, rng.uniform(-1, 1, N) + 1j * rng.uniform(-1, 1, N))
+    return radices, counter
+
+
+def cost_table(sizes=SIZES, plan='auto'):
+    """
+    各N按方案的逐级运算量及合计
+
+    每行的cmul_per_sample/fetch_per_sample即每样本1个时钟的流水线在该级需要的复数乘法器数和ROM读带宽（字/周期）
+    """
+    rows = []
+    for N in sizes:
+        radices, counter = plan_cost(N, plan)
+        staged = [(stage, radices[stage - 1], counter.stages[stage]) for stage in sorted(counter.stages)]
+        for stage, radix, ops in staged + [('total', None, counter.totals())]:
+            rows.append({'N': N, 'plan': radices, 'stage': stage, 'radix': radix, **ops,
+                         'cmul_per_sample': ops['cmul'] / N, 'fetch_per_sample': ops['fetch'] / N})
+    return rows
+
+
+def print_table(rows):
+    print(f"{'N':>5} {'stage':>5} {'radix':>5} " + ' '.join(f'{op:>11}' for op in OPS) + f" {'cmul/smp':>8} {'fetch/smp':>9}")
+    for r in rows:
+        radix = '-' if r['radix'] is None else r['radix']
+        print(f"{r['N']:5d} {r['stage']:>5} {radix:>5} " + ' '.join(f'{r[op]:11d}' for op in OPS)
+              + f" {r['cmul_per_sample']:8.3f} {r['fetch_per_sample']:9.3f}")
+
+
+# main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='按基数方案统计FFT各级的乘法/加法/旋转因子读取次数')
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('-p', '--plan', default='auto',
+                        help="auto（get_radix_structure）、radix2、radix4，或逗号分隔的基数如4,4,2（只对一个N有效）")
+    parser.add_argument('-o', '--output', help='运算量表写成JSON')
+    args = parser.parse_args()
+
+    plan = args.plan if args.plan in ('auto', 'radix2', 'radix4') else args.plan.split(',')
+    rows = cost_table(args.sizes, plan)
+    print_table(rows)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'plan': args.plan, 'rows': rows}, file, indent=1)
+        print(f'{len(rows)}行写入{args.output}')
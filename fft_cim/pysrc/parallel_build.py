@@ -0,0 +1,143 @@
+import argparse
+import os
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from generate_array_netlists import WEIGHT_DIR, concat_arrays, record_build, weight_file, write_netlist
+
+
+# 16个阵列相互独立：权重提取、ROM文本、网表生成按阵列分发到进程池并行执行
+# 权重张量通过共享内存传给子进程，不做pickle拷贝
+# 权重张量格式：[阵列行][阵列列][line][IC][OC][bit]，与accept_weight.weight_data一致
+
+_shm = None
+_weights = None
+
+
+def share_weights(weight_data):
+    """
+    将权重张量拷贝到共享内存
+
+    参数:
+    weight_data: accept_weight.weight_data（嵌套列表或numpy数组）
+
+    返回:
+    (SharedMemory对象, 共享内存上的uint8数组视图)
+    """
+    arr = np.asarray(weight_data, dtype=np.uint8)
+    shm = shared_memory.SharedMemory(create=True, size=arr.nbytes)
+    view = np.ndarray(arr.shape, dtype=np.uint8, buffer=shm.buf)
+    view[...] = arr
+    return shm, view
+
+
+def _init_worker(shm_name, shape):
+    global _shm, _weights
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    _weights = np.ndarray(shape, dtype=np.uint8, buffer=_shm.buf)
+
+
+def schematic_rows(arr):
+    """
+    单个阵列权重 [line][IC][OC][bit] -> 网表生成器使用的0/1矩阵
+    行: IC*96+line，列: OC*8+bit（与weight_rd_final_for_schematic.py的输出一致）
+    """
+    lines, ICn, OCn, bits = arr.shape
+    return np.swapaxes(arr, 0, 1).reshape(ICn * lines, OCn * bits)
+
+
+def rom_rows(arr):
+    """
+    单个阵列权重 [line][IC][OC][bit] -> weight_rom_final.txt中的ROM矩阵
+    每个IC为16行，每个Column(96*1)按列优先reshape成16*6后横向拼接，列顺序为bit*16+OC
+    """
+    lines, ICn, OCn, bits = arr.shape
+    cols = np.transpose(arr, (1, 3, 2, 0)).reshape(ICn, bits * OCn, lines // 16, 16)
+    return cols.transpose(0, 3, 1, 2).reshape(ICn * 16, bits * OCn * (lines // 16))
+
+
+def bits_to_text(rows, sep=b''):
+    """
+    把0/1矩阵整体转换为文本（每行一条记录，不逐位循环）
+
+    参数:
+    rows: 二维0/1数组
+    sep: 同一行内的分隔符，b''或单字节如b' '
+
+    返回:
+    bytes文本，行间以换行分隔，末尾无换行
+    """
+    rows = np.asarray(rows, dtype=np.uint8)
+    n_rows, n_cols = rows.shape
+    step = 1 + len(sep)
+    buf = np.empty((n_rows, n_cols * step + (1 - len(sep))), dtype=np.uint8)
+    buf[:, 0:n_cols * step:step] = rows + ord('0')
+    if sep:
+        buf[:, 1:n_cols * step:step] = ord(sep)
+    buf[:, -1] = ord('\n')
+    return buf.tobytes()[:-1]
+
+
+def _build_array(idx):
+    m, n = divmod(idx, _weights.shape[1])
+    arr = _weights[m, n]
+    i_arr = idx + 1
+    rows = schematic_rows(arr)
+    with open(weight_file(i_arr), 'wb') as file:
+        file.write(bits_to_text(rows))
+    write_netlist(rows, i_arr)
+    return bits_to_text(rom_rows(arr), sep=b' ')
+
+
+def build_parallel(weight_data, jobs=None):
+    """
+    并行生成所有阵列的权重文本、ROM文本和网表
+
+    参数:
+    weight_data: 权重张量 [阵列行][阵列列][line][IC][OC][bit]
+    jobs: 进程数，None表示使用全部CPU核
+
+    输出文件（内容与阵列处理顺序无关，结果确定）:
+    WEIGHT_DIR/output_{i}.txt（网表的源权重）, weight_rom_final.txt,
+    ./Array_netlists_40n/Array{i}, ./Array_netlists_40n/Array_all
+    """
+    os.makedirs(WEIGHT_DIR, exist_ok=True)
+    os.makedirs('./Array_netlists_40n', exist_ok=True)
+    shm, view = share_weights(weight_data)
+    num_rows, num_cols = view.shape[:2]
+    try:
+        with Pool(jobs, initializer=_init_worker, initargs=(shm.name, view.shape)) as pool:
+            roms = pool.map(_build_array, range(num_rows * num_cols))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    # 按阵列顺序拼接ROM文本，格式与weight_rd.py一致
+    with open('weight_rom_final.txt', 'wb') as file:
+        for m in range(num_rows):
+            for n in range(num_cols):
+                file.write(roms[m * num_cols + n] + b'\n')
+                file.write(b'one array finished\n\n')
+            file.write(b'new array row\n\n')
+
+    concat_arrays(num_rows * num_cols)
+    # 改写了Array{i}，同步build_all的增量缓存
+    record_build(num_rows * num_cols)
+
+
+# main
+if __name__ == '__main__':
+    from weight_rd import read_weight
+
+    parser = argparse.ArgumentParser(description='并行生成CIM阵列权重文件与网表')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='进程数，默认使用全部CPU核')
+    args = parser.parse_args()
+
+    start = time.time()
+    weight_data = read_weight()
+    print(f"读取权重完成: {time.time() - start:.2f}s")
+    start = time.time()
+    build_parallel(weight_data, args.jobs)
+    print(f"并行生成完成: {time.time() - start:.2f}s")
@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from weight_rd import FC_LAYER, FC_LINES
+
+
+# 层 -> 阵列的自动放置（生成weight.xlsx格式的放置表）
+#
+# 每层权重weight_bits为[OC][kw][1][IC][8]（全连接层为[OC][IC][8]，视为kw=1）。
+# 一层占用 ceil(IC/16) 个阵列行 x ceil(OC/16) 个阵列列，以及从base_line开始的kw条line。
+# 超出4x4网格时沿line方向折叠：OC/IC分成若干段，每段占一条line（与原来FC层放在82~83行的方式相同），
+# 折叠后（或IC/OC不是16的整数倍需要补0）的权重另存为权重/{name}_packed.npz，放置表中的data_name指向该文件。
+#
+# 目标（按优先级）：有效阵列数最少 -> 使用的line数最少 -> 输入广播次数最少。
+# 输入广播：同一输入的层放在相同阵列行、相同line上时，一次输入可同时送给这些层，按(输入, 阵列行, line)去重计数。
+
+MANIFEST_COLUMNS = ['base_line', 'row_begin', 'row_end', 'col_begin', 'col_end', 'line_num', 'data_name']
+
+
+class Layer:
+    """
+    待放置的层
+
+    参数:
+    name: 权重文件名（不含.npz）
+    IC, OC, kw: 输入通道、输出通道、卷积核宽度
+    input: 输入数据的名字，相同输入的层可共享输入广播；None表示不共享
+    """
+    def __init__(self, name, IC, OC, kw=1, input=None, flat=False):
+        self.name, self.IC, self.OC, self.kw, self.input = name, IC, OC, kw, input
+        # 权重文件是否为全连接层的[OC][IC][8]格式
+        self.flat = flat
+
+    @classmethod
+    def from_npz(cls, name, weight_dir='权重', input=None):
+        shape = np.load(os.path.join(weight_dir, f'{name}.npz'))['weight_bits'].shape
+        if len(shape) == 3:
+            return cls(name, shape[1], shape[0], 1, input, flat=True)
+        return cls(name, shape[3], shape[0], shape[1], input)
+
+    def needs_packing(self, fold_ic, fold_oc, ICn=16, OCn=16):
+        """权重文件不能被read_weight直接使用（折叠、非16整数倍或全连接格式）时需要另存"""
+        return self.flat or (fold_ic, fold_oc) != (1, 1) or self.IC % ICn or self.OC % OCn
+
+    def variants(self, ICn=16, OCn=16, num_array_rows=4, num_array_cols=4, lines=96):
+        """
+        所有可行的折叠方式 (h, w, fold_ic, fold_oc, depth)，占用line少的在前
+        h, w: 占用的阵列行数、列数；depth: 占用的line数
+        """
+        h_full = -(-self.IC // ICn)
+        w_full = -(-self.OC // OCn)
+        result = []
+        for fold_ic in sorted({-(-h_full // h) for h in range(1, min(h_full, num_array_rows) + 1)}):
+            for fold_oc in sorted({-(-w_full // w) for w in range(1, min(w_full, num_array_cols) + 1)}):
+                h, w = -(-h_full // fold_ic), -(-w_full // fold_oc)
+                depth = self.kw * fold_ic * fold_oc
+                if depth <= lines:
+                    result.append((h, w, fold_ic, fold_oc, depth))
+        return sorted(result, key=lambda v: (v[4], -v[0] * v[1]))
+
+
+def fold_weight(weight, h, w, fold_ic, fold_oc, ICn=16, OCn=16):
+    """
+    按折叠方式重排权重
+
+    参数:
+    weight: [OC][kw][1][IC][8]或[OC][IC][8]
+
+    返回:
+    [w*OCn][kw*fold_oc*fold_ic][1][h*ICn][8]，line序号 = (k*fold_oc + 第几段OC)*fold_ic + 第几段IC
+    """
+    weight = np.asarray(weight)
+    if weight.ndim == 3:
+        weight = weight[:, None, None]
+    OC, kw, _, IC, bits = weight.shape
+    padded = np.zeros((fold_oc * w * OCn, kw, 1, fold_ic * h * ICn, bits), dtype=weight.dtype)
+    padded[:OC, :, :, :IC] = weight
+    padded = padded.reshape(fold_oc, w * OCn, kw, fold_ic, h * ICn, bits)
+    return np.ascontiguousarray(padded.transpose(1, 2, 0, 3, 4, 5).reshape(w * OCn, kw * fold_oc * fold_ic, 1, h * ICn, bits))
+
+
+class Packer:
+    """
+    4x4阵列网格上的贪心放置（每个阵列维护已用到的line，类似skyline）
+
+    参数:
+    reserved: 保留不用的line区间列表[(起始, 结束)]，闭区间
+    """
+    def __init__(self, ICn=16, OCn=16, lines=96, num_array_rows=4, num_array_cols=4, reserved=()):
+        self.ICn, self.OCn, self.lines = ICn, OCn, lines
+        self.num_array_rows, self.num_array_cols = num_array_rows, num_array_cols
+        self.blocked = np.zeros(lines, dtype=bool)
+        for begin, end in reserved:
+            self.blocked[begin:end + 1] = True
+
+    def _base(self, used, depth):
+        # 不与保留区间重叠的最低起始line
+        base = used
+        while base + depth <= self.lines:
+            hit = np.flatnonzero(self.blocked[base:base + depth])
+            if not len(hit):
+                return base
+            base += hit[-1] + 1
+        return None
+
+    def pack(self, layers):
+        """
+        放置所有层
+
+        返回:
+        [(layer, (h, w, fold_ic, fold_oc, depth), row_begin, col_begin, base_line), ...]，顺序与layers一致
+        """
+        used = np.zeros((self.num_array_rows, self.num_array_cols), dtype=np.int64)
+        shared = set()
+        placed = {}
+        # 体积大的层先放
+        order = sorted(range(len(layers)), key=lambda i: -min(h * w * d for h, w, _, _, d in self._variants(layers[i])))
+        for i in order:
+            layer = layers[i]
+            best = None
+            # 折叠最少的方式优先，放不下时才继续折叠
+            for var in self._variants(layer):
+                if best is not None:
+                    break
+                h, w, _, _, depth = var
+                for r in range(self.num_array_rows - h + 1):
+                    for c in range(self.num_array_cols - w + 1):
+                        rect = used[r:r + h, c:c + w]
+                        base = self._base(int(rect.max()), depth)
+                        if base is None:
+                            continue
+                        new_arrays = int((rect == 0).sum())
+                        top = max(int(used.max()), base + depth)
+                        rows = {(layer.input, rr, base + d) for rr in range(r, r + h) for d in range(depth)}
+                        broadcast = len(rows - shared) if layer.input is not None else len(rows)
+                        gap = int((base - rect).sum())
+                        cost = (new_arrays, top, broadcast, gap, h * w, r, c)
+                        if best is None or cost < best[0]:
+                            best = (cost, var, r, c, base)
+            if best is None:
+                raise ValueError(f"{layer.name}无法放入阵列（IC={layer.IC}, OC={layer.OC}, kw={layer.kw}）")
+            _, var, r, c, base = best
+            h, w, _, _, depth = var
+            used[r:r + h, c:c + w] = base + depth
+            if layer.input is not None:
+                shared |= {(layer.input, rr, base + d) for rr in range(r, r + h) for d in range(depth)}
+            placed[i] = (layer, var, r, c, base)
+        return [placed[i] for i in range(len(layers))]
+
+    def _variants(self, layer):
+        return layer.variants(self.ICn, self.OCn, self.num_array_rows, self.num_array_cols, self.lines)
+
+
+def manifest(placements, ICn=16, OCn=16):
+    """放置结果 -> weight.xlsx格式的DataFrame，附加layer/fold_ic/fold_oc列（read_excel_data不读取这些列）"""
+    rows = []
+    for layer, (h, w, fold_ic, fold_oc, depth), r, c, base in placements:
+        packed = layer.needs_packing(fold_ic, fold_oc, ICn, OCn)
+        rows.append((base, r, r + h - 1, c, c + w - 1, depth,
+                     f'{layer.name}_packed' if packed else layer.name, layer.name, fold_ic, fold_oc))
+    return pd.DataFrame(rows, columns=MANIFEST_COLUMNS + ['layer', 'fold_ic', 'fold_oc'])
+
+
+def report(placements, num_array_rows=4, num_array_cols=4):
+    """有效阵列数、使用的line数、输入广播次数、每帧阵列激活次数，以及每个阵列用到的line"""
+    used = np.zeros((num_array_rows, num_array_cols), dtype=np.int64)
+    broadcasts = set()
+    activations = 0
+    for n, (layer, (h, w, _, _, depth), r, c, base) in enumerate(placements):
+        used[r:r + h, c:c + w] = np.maximum(used[r:r + h, c:c + w], base + depth)
+        key = layer.input if layer.input is not None else ('layer', n)
+        broadcasts |= {(key, rr, base + d) for rr in range(r, r + h) for d in range(depth)}
+        activations += h * w * depth
+    return {'active_arrays': int((used > 0).sum()), 'lines': int(used.max()), 'broadcasts': len(broadcasts),
+            'array_activations': activations, 'used': used}
+
+
+def write_packed(placements, weight_dir='权重', ICn=16, OCn=16):
+    """为需要折叠或补齐的层写出权重/{name}_packed.npz"""
+    for layer, (h, w, fold_ic, fold_oc, depth), r, c, base in placements:
+        if not layer.needs_packing(fold_ic, fold_oc, ICn, OCn):
+            continue
+        weight = np.load(os.path.join(weight_dir, f'{layer.name}.npz'))['weight_bits']
+        np.savez(os.path.join(weight_dir, f'{layer.name}_packed.npz'),
+                 weight_bits=fold_weight(weight, h, w, fold_ic, fold_oc, ICn, OCn))
+
+
+def missing_weights(placements, weight_dir='权重', ICn=16, OCn=16):
+    """需要折叠或补齐、但权重/{name}.npz不存在的层名（write_packed无法为它们写出_packed权重）"""
+    return [layer.name for layer, (h, w, fold_ic, fold_oc, depth), r, c, base in placements
+            if layer.needs_packing(fold_ic, fold_oc, ICn, OCn)
+            and not os.path.exists(os.path.join(weight_dir, f'{layer.name}.npz'))]
+
+
+def default_reserved(layers, reserved=()):
+    """待放置的层中没有全连接层时，保留read_weight()固定写入FC权重的line，避免被覆盖"""
+    reserved = [tuple(r) for r in reserved]
+    if all(layer.name != FC_LAYER for layer in layers) and FC_LINES not in reserved:
+        reserved.append(FC_LINES)
+    return reserved
+
+
+def load_spec(filename):
+    """JSON层描述: [{"name": ..., "IC": ..., "OC": ..., "kw": ..., "input": ...}, ...]"""
+    with open(filename, encoding='utf-8') as file:
+        return [Layer(d['name'], d['IC'], d['OC'], d.get('kw', 1), d.get('input')) for d in json.load(file)]
+
+
+# main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='自动生成层到CIM阵列的放置表')
+    parser.add_argument('layers', nargs='*', help='权重/下的npz文件名（不含.npz）')
+    parser.add_argument('--spec', help='JSON层描述文件，代替npz文件名')
+    parser.add_argument('-o', '--output', help='输出的放置表（须显式指定，避免覆盖现有的weight.xlsx）')
+    parser.add_argument('--plan-only', action='store_true', help='只打印放置结果和统计，不写放置表和_packed权重')
+    parser.add_argument('--reserve', nargs=2, type=int, action='append', default=[], metavar=('BEGIN', 'END'),
+                        help=f'保留不用的line区间（闭区间），可多次指定；层中没有{FC_LAYER}时自动保留'
+                             f'{FC_LINES[0]}~{FC_LINES[1]}')
+    args = parser.parse_args()
+    if not (args.output or args.plan_only):
+        parser.error('须用-o指定输出的放置表，或用--plan-only只做规划')
+
+    layers = load_spec(args.spec) if args.spec else [Layer.from_npz(name) for name in args.layers]
+    placements = Packer(reserved=default_reserved(layers, args.reserve)).pack(layers)
+    table = manifest(placements)
+    if not args.plan_only:
+        # --spec时层的权重可能还不存在：放置表中的{name}_packed必须有对应的npz，否则read_weight()读不到
+        missing = missing_weights(placements)
+        if missing:
+            parser.exit(1, f'{missing}需要折叠或补齐，但权重/下没有对应的npz，无法写出_packed权重；'
+                           f'补齐权重文件，或用--plan-only只做规划\n')
+        write_packed(placements)
+        table.to_excel(args.output, index=False)
+
+    print(table.to_string(index=False))
+    stats = report(placements)
+    print(f"有效阵列: {stats['active_arrays']}  使用line: {stats['lines']}  输入广播: {stats['broadcasts']}  "
+          f"每帧阵列激活: {stats['array_activations']}")
+    print("各阵列用到的line:")
+    print(stats['used'])
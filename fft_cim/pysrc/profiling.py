@@ -0,0 +1,231 @@
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+
+# 轻量级分段剖析：span()上下文管理器、profiled()装饰器、instrument()给按路径加载的脚本模块打桩
+# 每段记录墙钟时间、处理的条目数，开启alloc时用tracemalloc记录净分配和峰值内存（单线程下准确，会明显变慢）
+# 未启用时span()返回同一个空上下文，profiled()的包装只多一次全局判断，instrument()不打桩
+# 启用：enable()，或设置环境变量FFT_PROFILE=trace.json（FFT_PROFILE_ALLOC=1同时记录内存），
+#       进程退出时写出Chrome trace（chrome://tracing或ui.perfetto.dev打开）并打印按自身时间排序的汇总表
+# 段名按'类别.名称'命名（如fft.bit_reversal、netlist.write），trace中的cat取第一个'.'之前的部分
+
+_enabled = False
+_alloc = False
+_records = []  # (名称, 线程, 开始(s), 时长(s), 自身时长(s), 条目数, 净分配, 峰值, args)
+_local = threading.local()
+_origin = time.perf_counter()
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class _Span:
+    __slots__ = ('name', 'items', 'args', 'start', 'child', 'mem', 'peak')
+
+    def __init__(self, name, items=None, args=None):
+        self.name, self.items, self.args = name, items, args
+
+    def __enter__(self):
+        stack = _stack()
+        if _alloc:
+            current, peak = tracemalloc.get_traced_memory()
+            # tracemalloc的峰值是全局的：重置前把到目前为止的峰值交给外层段
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.mem = self.peak = current
+        self.child = 0.0
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        stack = _stack()
+        stack.pop()
+        duration = end - self.start
+        alloc = peak = None
+        if _alloc:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self.peak)
+            alloc, self.peak = current - self.mem, peak
+            peak -= self.mem
+        if stack:
+            stack[-1].child += duration
+            if _alloc:
+                stack[-1].peak = max(stack[-1].peak, self.peak)
+        _records.append((self.name, threading.get_ident(), self.start - _origin, duration, duration - self.child,
+                         self.items, alloc, peak, self.args))
+        return False
+
+
+class _NullSpan:
+    """未启用时span()返回的空上下文；可以照常给items赋值"""
+    __slots__ = ()
+    items = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL = _NullSpan()
+
+
+def enabled():
+    return _enabled
+
+
+def enable(filename=None, alloc=False):
+    """
+    开始记录
+
+    参数:
+    filename: 不为None时在进程退出时写出Chrome trace并打印汇总
+    alloc: 同时用tracemalloc记录每段的净分配和峰值内存
+    """
+    global _enabled, _alloc
+    _enabled, _alloc = True, alloc
+    if alloc and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if filename:
+        atexit.register(_finish, filename)
+
+
+def disable():
+    global _enabled, _alloc
+    _enabled = _alloc = False
+
+
+def reset():
+    """清空已记录的段"""
+    _records.clear()
+
+
+def _finish(filename):
+    export_chrome_trace(filename)
+    print_summary()
+    print(f'trace写入{filename}')
+
+
+def span(name, items=None, **args):
+    """
+    with span('fft.stage', items=N) as s: ...
+    items为该段处理的条目数（样本、单元、行……），也可以在块内给s.items赋值；args原样写入trace
+    """
+    if not _enabled:
+        return _NULL
+    return _Span(name, items, args)
+
+
+def profiled(name=None, items=None):
+    """
+    函数装饰器：每次调用记为一段
+
+    参数:
+    name: 段名，默认函数的__qualname__
+    items: 以调用参数计算条目数的函数，如lambda m, bits: m.size
+    """
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(label, items(*args, **kwargs) if items else None):
+                return func(*args, **kwargs)
+        return run
+    return decorate
+
+
+def instrument(module, points):
+    """
+    给按路径加载的脚本模块（不便直接修改的test2/test3脚本、fft_test/tb/fft_model.py）中的函数打桩
+    未启用时不做任何事，模块保持原样
+
+    参数:
+    points: {函数名: 段名或(段名, items函数)}，模块中不存在的函数跳过
+    """
+    if not _enabled:
+        return
+    for func, point in points.items():
+        original = getattr(module, func, None)
+        if original is None:
+            continue
+        name, items = point if isinstance(point, tuple) else (point, None)
+        setattr(module, func, profiled(name, items)(original))
+
+
+def summary():
+    """
+    按段名汇总
+
+    返回:
+    字典列表：name, calls, total_s, self_s, mean_s, max_s, items, items_per_s, alloc_bytes, peak_bytes（未记录内存时为None）
+    """
+    rows = {}
+    for name, _, _, duration, own, items, alloc, peak, _ in _records:
+        row = rows.setdefault(name, {'name': name, 'calls': 0, 'total_s': 0.0, 'self_s': 0.0, 'max_s': 0.0,
+                                     'items': 0, 'alloc_bytes': None, 'peak_bytes': None})
+        row['calls'] += 1
+        row['total_s'] += duration
+        row['self_s'] += own
+        row['max_s'] = max(row['max_s'], duration)
+        row['items'] += items or 0
+        if alloc is not None:
+            row['alloc_bytes'] = (row['alloc_bytes'] or 0) + alloc
+            row['peak_bytes'] = max(row['peak_bytes'] or 0, peak)
+    for row in rows.values():
+        row['mean_s'] = row['total_s'] / row['calls']
+        row['items_per_s'] = row['items'] / row['total_s'] if row['total_s'] > 0 else 0.0
+    return sorted(rows.values(), key=lambda r: -r['self_s'])
+
+
+def print_summary(rows=None):
+    rows = summary() if rows is None else rows
+    wall = sum(r['self_s'] for r in rows)
+    print(f"{'name':<28} {'calls':>7} {'total(ms)':>10} {'self(ms)':>10} {'self%':>6} {'mean(ms)':>9} "
+          f"{'items':>10} {'items/s':>10} {'alloc KiB':>10} {'peak KiB':>10}")
+    for r in rows:
+        mem = (f"{r['alloc_bytes'] / 1024:10.1f} {r['peak_bytes'] / 1024:10.1f}" if r['alloc_bytes'] is not None
+               else f"{'-':>10} {'-':>10}")
+        print(f"{r['name']:<28} {r['calls']:7d} {r['total_s'] * 1e3:10.2f} {r['self_s'] * 1e3:10.2f} "
+              f"{100 * r['self_s'] / wall if wall else 0:6.1f} {r['mean_s'] * 1e3:9.3f} {r['items']:10d} "
+              f"{r['items_per_s']:10.3g} {mem}")
+
+
+def export_chrome_trace(filename):
+    """写出Chrome trace事件格式的JSON（完整事件ph='X'，时间单位us）"""
+    pid = os.getpid()
+    events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+               'args': {'name': os.path.basename(sys.argv[0]) or 'python'}}]
+    for name, tid, start, duration, own, items, alloc, peak, args in _records:
+        info = dict(args or {}, self_us=own * 1e6)
+        if items is not None:
+            info['items'] = int(items)
+        if alloc is not None:
+            info.update(alloc_bytes=alloc, peak_bytes=peak)
+        events.append({'name': name, 'cat': name.split('.', 1)[0], 'ph': 'X', 'ts': start * 1e6,
+                       'dur': duration * 1e6, 'pid': pid, 'tid': tid, 'args': info})
+    with open(filename, 'w') as file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+
+if os.environ.get('FFT_PROFILE'):
+    enable(os.environ['FFT_PROFILE'], alloc=os.environ.get('FFT_PROFILE_ALLOC') == '1')
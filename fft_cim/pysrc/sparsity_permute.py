@@ -0,0 +1,164 @@
+import argparse
+import os
+
+import numpy as np
+
+
+# 稀疏感知的IC/OC重排
+#
+# 网表中权重位为1的Cell才有放电NMOS，为0的只是悬空的net{k}器件。一层权重[OC][kw][1][IC][8]按16个IC一组放到阵列行、
+# 16个OC一组放到阵列列。对某条line：
+#   - 一个阵列的16x16个权重全为0时，这次激活整块可以跳过（不送输入、不预充）；
+#   - 一个IC行对本阵列16个OC的权重全为0时，这一行(16个OC x 8位 = 128个Cell)可以通过把IN<i>门控为0跳过。
+# 对IC、OC做置换不改变1的总数，但可以把0聚到同一个阵列/同一行里，使可跳过的单元变多。
+# 置换后输入按ic_perm重排送入，输出按oc_perm还原：
+#   W'[oc'][..][ic'] = W[oc_perm[oc']][..][ic_perm[ic']]，x' = x[..., ic_perm]，y[..., oc_perm] = y'
+
+
+def support(weight_bits):
+    """
+    权重非零的位置
+
+    参数:
+    weight_bits: [OC][kw][1][IC][8]或[OC][IC][8]
+
+    返回:
+    (OC, kw, IC)的bool数组
+    """
+    w = np.asarray(weight_bits)
+    if w.ndim == 3:
+        w = w[:, None, None]
+    return w.any(axis=-1)[:, :, 0]
+
+
+def _pad(supp, ICn, OCn):
+    OC, kw, IC = supp.shape
+    padded = np.zeros((-(-OC // OCn) * OCn, kw, -(-IC // ICn) * ICn), dtype=bool)
+    padded[:OC, :, :IC] = supp
+    return padded
+
+
+def active_units(supp, ICn=16, OCn=16, bits=8):
+    """
+    一次遍历该层全部line时的有效单元数
+
+    返回:
+    dict: array_lines（需要激活的阵列次数）、row_groups（需要送输入的IC行数）、cells（其中的Cell数），
+          以及不做跳过时的对应总数*_total
+    """
+    s = _pad(supp, ICn, OCn)
+    OC, kw, IC = s.shape
+    # [OC块][OC][kw][IC块][IC]
+    blocks = s.reshape(OC // OCn, OCn, kw, IC // ICn, ICn)
+    rows = blocks.any(axis=1)
+    array_lines = int(rows.any(axis=-1).sum())
+    row_groups = int(rows.sum())
+    total_rows = rows.size
+    return {'array_lines': array_lines, 'array_lines_total': rows[..., 0].size,
+            'row_groups': row_groups, 'row_groups_total': total_rows,
+            'cells': row_groups * OCn * bits, 'cells_total': total_rows * OCn * bits}
+
+
+def _partition(feat, block):
+    """
+    把feat的各行分成每组block个，使各组特征并集大小之和尽量小（贪心）
+
+    参数:
+    feat: (n, d)的bool数组
+
+    返回:
+    长度为n的置换，相邻block个为一组
+    """
+    n = len(feat)
+    left = list(np.argsort(-feat.sum(axis=1), kind='stable'))
+    order = []
+    while left:
+        seed = left.pop(0)
+        union = feat[seed].copy()
+        group = [seed]
+        while len(group) < block and left:
+            cand = np.array(left)
+            growth = (feat[cand] & ~union).sum(axis=1)
+            # 新增非零位置最少的优先，相同时选本身非零更多的（剩下的更稀疏）
+            pick = np.lexsort((-feat[cand].sum(axis=1), growth))[0]
+            idx = left.pop(int(pick))
+            group.append(idx)
+            union |= feat[idx]
+        order += group
+    return np.array(order[:n])
+
+
+def search(supp, ICn=16, OCn=16, iters=4):
+    """
+    交替优化OC与IC的分组
+
+    返回:
+    (ic_perm, oc_perm)，按active_units()的cells最少保留最好的一组
+    """
+    s = _pad(supp, ICn, OCn)
+    OC, kw, IC = s.shape
+    ic_perm = np.arange(IC)
+    oc_perm = np.arange(OC)
+    best = (active_units(s, ICn, OCn)['cells'], ic_perm, oc_perm)
+    for _ in range(iters):
+        # OC分组：特征为(line, IC)的非零位置，并集大小即该OC块需要送输入的IC行数
+        oc_perm = _partition(s[:, :, ic_perm].reshape(OC, -1), OCn)
+        # IC分组：特征为(OC块, line)是否非零，并集大小即该IC块需要激活的阵列次数
+        rows = s[oc_perm].reshape(OC // OCn, OCn, kw, IC).any(axis=1)
+        ic_perm = _partition(rows.transpose(2, 0, 1).reshape(IC, -1), ICn)
+        cells = active_units(s[oc_perm][:, :, ic_perm], ICn, OCn)['cells']
+        if cells < best[0]:
+            best = (cells, ic_perm, oc_perm)
+    return best[1], best[2]
+
+
+def apply(weight_bits, ic_perm, oc_perm, ICn=16, OCn=16):
+    """按置换重排权重（IC/OC先补0到16的整数倍），返回[OC][kw][1][IC][8]"""
+    w = np.asarray(weight_bits)
+    if w.ndim == 3:
+        w = w[:, None, None]
+    OC, kw, _, IC, bits = w.shape
+    padded = np.zeros((len(oc_perm), kw, 1, len(ic_perm), bits), dtype=w.dtype)
+    padded[:OC, :, :, :IC] = w
+    return padded[oc_perm][:, :, :, ic_perm]
+
+
+def remap_inputs(x, ic_perm):
+    """输入(..., IC) -> 置换后阵列的输入顺序（补0）"""
+    x = np.asarray(x)
+    padded = np.zeros(x.shape[:-1] + (len(ic_perm),), dtype=x.dtype)
+    padded[..., :x.shape[-1]] = x
+    return padded[..., ic_perm]
+
+
+def restore_outputs(y, oc_perm, OC=None):
+    """置换后阵列的输出(..., OC') -> 原始OC顺序，OC为原始输出通道数（去掉补0部分）"""
+    y = np.asarray(y)
+    out = np.empty_like(y)
+    out[..., oc_perm] = y
+    return out[..., :OC] if OC is not None else out
+
+
+# main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='稀疏感知的IC/OC重排')
+    parser.add_argument('layers', nargs='+', help='权重/下的npz文件名（不含.npz）')
+    parser.add_argument('--iters', type=int, default=4, help='OC/IC交替优化的轮数')
+    parser.add_argument('--positions', type=int, default=1, help='每次推理中每条line的输入向量数（卷积的滑动位置数）')
+    args = parser.parse_args()
+
+    total_before = total_after = 0
+    for name in args.layers:
+        weight = np.load(os.path.join('权重', f'{name}.npz'))['weight_bits']
+        supp = support(weight)
+        ic_perm, oc_perm = search(supp, iters=args.iters)
+        permuted = apply(weight, ic_perm, oc_perm)
+        before = active_units(supp)
+        after = active_units(support(permuted))
+        np.savez(os.path.join('权重', f'{name}_perm.npz'), weight_bits=permuted, ic_perm=ic_perm, oc_perm=oc_perm)
+        total_before += before['cells'] * args.positions
+        total_after += after['cells'] * args.positions
+        print(f"{name}: 阵列激活 {before['array_lines']}->{after['array_lines']}/{before['array_lines_total']}  "
+              f"IC行 {before['row_groups']}->{after['row_groups']}/{before['row_groups_total']}  "
+              f"有效Cell {before['cells']}->{after['cells']} ({1 - after['cells'] / max(before['cells'], 1):.1%})")
+    print(f"每次推理有效Cell: {total_before} -> {total_after}，减少{1 - total_after / max(total_before, 1):.1%}")
@@ -0,0 +1,213 @@
+import argparse
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from cim_array_model import CimArrayModel, from_sum_bits
+
+
+# Arr{i}瞬态仿真结果的后处理：SUM<0:207>波形 -> 每周期每个OC的13位有符号SUM
+#
+# 波形来源：
+#   CSV: 首行为信号名（time列 + 含SUM<n>的列，如SUM<3>、v(xarr1.sum<3>)），pandas整体读入；
+#   ngspice raw（二进制）: 按文件头解析变量表后用np.memmap映射数据区，只读取采样时刻附近的点。
+# 采样时刻与input_encoder.write_pwl()的周期对应：第c个周期在 (c + phase) * period 处采样（默认周期末尾），
+# 采样值为相邻两点的线性插值，按 vdd * frac 判决为0/1，再由from_sum_bits译码。
+
+_SUM = re.compile(r'sum<(\d+)>', re.IGNORECASE)
+
+
+def _sum_columns(names, prefix=None):
+    """
+    在信号名中找出SUM<n>列
+
+    返回:
+    按n从0开始排好序的列下标
+    """
+    found = {}
+    for k, name in enumerate(names):
+        m = _SUM.search(name)
+        if m and (prefix is None or prefix.lower() in name.lower()):
+            found[int(m.group(1))] = k
+    if not found:
+        raise ValueError('波形中没有SUM<n>信号')
+    if sorted(found) != list(range(len(found))):
+        raise ValueError(f'SUM位不连续: 共{len(found)}个，最大为SUM<{max(found)}>')
+    return np.array([found[n] for n in range(len(found))])
+
+
+def load_csv(filename, prefix=None, sep=','):
+    """
+    读取CSV波形
+
+    参数:
+    prefix: 波形中有多个阵列时，只取信号名中含prefix的SUM列（如'xarr1.'）
+
+    返回:
+    (t, v): t为(P,)的时间，v为(P, n)的SUM<0>~SUM<n-1>电压
+    """
+    names = pd.read_csv(filename, sep=sep, nrows=0).columns.str.strip()
+    cols = _sum_columns(names, prefix)
+    df = pd.read_csv(filename, sep=sep, usecols=[0] + cols.tolist(), dtype=np.float64, engine='c')
+    # usecols按文件中的列顺序返回，重新按SUM序号排列
+    order = np.argsort(np.argsort(cols))
+    data = df.to_numpy()
+    return data[:, 0], data[:, 1:][:, order]
+
+
+def load_raw(filename, prefix=None):
+    """
+    内存映射读取ngspice二进制raw文件（只处理第一个plot，要求为实数瞬态结果）
+
+    返回:
+    (t, v): 均为np.memmap上的视图，不读入整个文件
+    """
+    with open(filename, 'rb') as file:
+        head = b''
+        while b'Binary:\n' not in head:
+            chunk = file.read(1 << 16)
+            if not chunk:
+                raise ValueError(f'{filename} 不是二进制raw文件（ASCII格式请用set filetype=binary重新输出）')
+            head += chunk
+    offset = head.index(b'Binary:\n') + len(b'Binary:\n')
+    lines = head[:offset].decode('latin-1').splitlines()
+    info = {}
+    names = []
+    in_vars = False
+    for line in lines:
+        if in_vars and line[:1] in ('\t', ' '):
+            names.append(line.split()[1])
+            continue
+        in_vars = False
+        key, _, value = line.partition(':')
+        info[key.strip()] = value.strip()
+        if key.strip() == 'Variables':
+            in_vars = True
+    if 'complex' in info.get('Flags', ''):
+        raise ValueError('只支持实数波形（瞬态仿真）')
+    n_vars = int(info['No. Variables'])
+    points = int(info['No. Points'])
+    data = np.memmap(filename, dtype='<f8', mode='r', offset=offset)
+    # 仿真中断时点数可能少于文件头中的值
+    points = min(points, len(data) // n_vars)
+    data = data[:points * n_vars].reshape(points, n_vars)
+    return data[:, 0], data[:, _sum_columns(names[:n_vars], prefix)]
+
+
+def load(filename, prefix=None):
+    """按扩展名选择load_raw或load_csv"""
+    if filename.lower().endswith('.raw'):
+        return load_raw(filename, prefix)
+    return load_csv(filename, prefix)
+
+
+def instants(cycles, period=10e-9, phase=0.9, start=0.0):
+    """每个周期的采样时刻 (c + phase) * period + start"""
+    return start + (np.arange(cycles) + phase) * period
+
+
+def sample(t, v, at, chunk=1 << 16):
+    """
+    在采样时刻对所有列做线性插值（分块，只访问采样点附近的数据）
+
+    返回:
+    (len(at), n)的电压
+    """
+    t = np.asarray(t)
+    at = np.asarray(at, dtype=np.float64)
+    if len(at) and (at[0] < t[0] or at[-1] > t[-1]):
+        raise ValueError(f'采样时刻超出仿真时间范围 [{t[0]:g}, {t[-1]:g}]')
+    out = np.empty((len(at), v.shape[1]))
+    for i in range(0, len(at), chunk):
+        a = at[i:i + chunk]
+        hi = np.clip(np.searchsorted(t, a), 1, len(t) - 1)
+        lo = hi - 1
+        t0, t1 = t[lo], t[hi]
+        frac = np.where(t1 > t0, (a - t0) / np.where(t1 > t0, t1 - t0, 1.0), 0.0)
+        v0, v1 = np.asarray(v[lo]), np.asarray(v[hi])
+        out[i:i + chunk] = v0 + (v1 - v0) * frac[:, None]
+    return out
+
+
+def threshold(volts, vdd=0.9, frac=0.5):
+    """电压 -> 0/1"""
+    return (np.asarray(volts) > vdd * frac).astype(np.uint8)
+
+
+def decode(bits, width=13):
+    """(C, OC*width)的SUM位 -> (C, OC)的有符号SUM"""
+    return from_sum_bits(bits, width)
+
+
+def accumulate(sums, bits=8):
+    """每bits个周期的SUM按输入位权移位相加，得到每次激活的结果（与CimArrayModel.matvec一致）"""
+    sums = np.asarray(sums, dtype=np.int64)
+    return (sums.reshape(-1, bits, sums.shape[1]) << np.arange(bits)[None, :, None]).sum(axis=1)
+
+
+def compare(model, stream, sums):
+    """
+    与行为模型逐周期比较
+
+    参数:
+    model: CimArrayModel
+    stream: 仿真使用的input_encoder.BitPlaneStream
+    sums: decode()的结果，周期数可以少于stream（仿真提前结束）
+
+    返回:
+    dict: cycles, mismatches（出错的(周期, OC)数）, first（第一个出错的周期，无则为None）, expected
+    """
+    C = len(sums)
+    IN, row_en1, row_en2, cnt_b7 = (p[:C] for p in stream.ports())
+    expected = model.sums(IN, row_en1, row_en2, cnt_b7)
+    bad = expected != sums
+    rows = np.flatnonzero(bad.any(axis=1))
+    return {'cycles': C, 'mismatches': int(bad.sum()), 'first': int(rows[0]) if len(rows) else None,
+            'expected': expected}
+
+
+def process(filename, cycles=None, period=10e-9, phase=0.9, start=0.0, vdd=0.9, frac=0.5, prefix=None, width=13):
+    """
+    读取波形并译码
+
+    参数:
+    cycles: 周期数，None时取仿真时间内的全部完整周期
+
+    返回:
+    (C, OC)的有符号SUM
+    """
+    t, v = load(filename, prefix)
+    if cycles is None:
+        cycles = int((t[-1] - start) / period - phase) + 1
+    return decode(threshold(sample(t, v, instants(cycles, period, phase, start)), vdd, frac), width)
+
+
+# main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SPICE波形SUM<0:207>的译码与比较')
+    parser.add_argument('waveform', help='CSV或ngspice二进制.raw文件')
+    parser.add_argument('--period', type=float, default=10e-9, help='每个周期的时长(s)，与write_pwl一致')
+    parser.add_argument('--phase', type=float, default=0.9, help='采样点在周期内的位置(0~1)')
+    parser.add_argument('--start', type=float, default=0.0, help='第0个周期的起始时间(s)')
+    parser.add_argument('--vdd', type=float, default=0.9)
+    parser.add_argument('--cycles', type=int, default=None)
+    parser.add_argument('--prefix', help='只取信号名含PREFIX的SUM列')
+    parser.add_argument('--stimulus', help='input_encoder.write_binary()写出的激励文件，用于与模型比较')
+    parser.add_argument('--weights', help='阵列的源权重文件（如Weight_schematic/output_1.txt），用于与模型比较')
+    parser.add_argument('-o', '--output', help='译码结果写入文本文件（每周期一行，16个OC）')
+    args = parser.parse_args()
+
+    begin = time.time()
+    sums = process(args.waveform, args.cycles, args.period, args.phase, args.start, args.vdd, prefix=args.prefix)
+    print(f"{len(sums)}个周期 x {sums.shape[1]}个OC，耗时{time.time() - begin:.2f}s")
+    if args.output:
+        np.savetxt(args.output, sums, fmt='%d')
+    if args.stimulus and args.weights:
+        from input_encoder import read_binary
+        res = compare(CimArrayModel.from_file(args.weights), read_binary(args.stimulus), sums)
+        if res['first'] is None:
+            print(f"与行为模型一致（{res['cycles']}个周期）")
+        else:
+            print(f"不一致: {res['mismatches']}个(周期, OC)，第一个出错周期{res['first']}")
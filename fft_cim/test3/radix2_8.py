@@ -1,6 +1,14 @@
 import numpy as np
 import math
 
+# 蝶形运算函数（模块级，两个8点实现共用；op_count.py计数时替换这一个函数即可）
+def butterfly(a, b, w):
+    """
+    执行蝶形运算
+    """
+    t = w * b
+    return a + t, a - t
+
 def fft_radix2_butterfly(x):
     """
     使用基2蝶形运算计算8点FFT
@@ -15,14 +23,6 @@ def fft_radix2_butterfly(x):
         bit_rev_indices = [0, 4, 2, 6, 1, 5, 3, 7]
         return [x[i] for i in bit_rev_indices]
     
-    # 蝶形运算函数
-    def butterfly(a, b, w):
-        """
-        执行蝶形运算
-        """
-        t = w * b
-        return a + t, a - t
-    
     # 初始化
     x_reordered = bit_reverse_order(x)
     
@@ -62,11 +62,6 @@ def fft_radix2_butterfly_detailed(x):
         bit_rev_indices = [0, 4, 2, 6, 1, 5, 3, 7]
         return [x[i] for i in bit_rev_indices]
     
-    # 蝶形运算函数
-    def butterfly(a, b, w):
-        t = w * b
-        return a + t, a - t
-    
     print("Input sequence:", x)
     
     # 初始化
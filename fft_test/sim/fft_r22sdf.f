@@ -0,0 +1,9 @@
++define+FFT_TOP=fft_r22sdf
+./../src/shiftreg.v
+./../src/complex_arithmetic_param.v
+./../src/twiddle_rom.v
+./../src/reverse_bits.v
+./../src/fft_reorder_sram.v
+./../src/r22_reorder.v
+./../src/fft_r22sdf.v
+./../tb/fft_multipoint_tb.v
@@ -0,0 +1,10 @@
++define+FFT_TOP=fft_r22sdf_x2
++define+FFT_LANES=2
+./../src/shiftreg.v
+./../src/complex_arithmetic_param.v
+./../src/twiddle_rom.v
+./../src/reverse_bits.v
+./../src/fft_reorder_sram.v
+./../src/r22_reorder.v
+./../src/fft_r22sdf_x2.v
+./../tb/fft_multipoint_tb.v
@@ -0,0 +1,239 @@
+# regress.py
+# RTL regression for fft_multipoint (--arch r2sdf) or fft_r22sdf (--arch r22sdf) with open-source simulators.
+#
+#   1. build fft_multipoint_tb once (Icarus Verilog, else Verilator) from the architecture's file list
+#   2. generate vectors with ../tb/gen_vectors.py if needed
+#   3. run one simulation per (np, vector set) in parallel worker processes
+#   4. score each output against the golden model (bit-exact) and report SQNR against a float FFT
+#
+# Each job runs in work/<arch>_x<lanes>/<prefix>/ with its own copy of the twiddle ROM hex files; stale outputs are
+# removed first, and a simulation that exits non-zero or writes no outputs is an ERROR.
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+TB_DIR = os.path.join(SIM_DIR, '..', 'tb')
+sys.path.insert(0, TB_DIR)
+
+from fft_model import ARCHS, SIZES, load_twiddles, read_hex, sqnr  # noqa: E402
+from gen_vectors import VECTOR_SETS, generate  # noqa: E402
+
+TOP = 'fft_multipoint_tb'
+TWIDDLE_FILES = ['twiddle_2048_re.hex', 'twiddle_2048_im.hex']
+# file list per architecture; fft_r22sdf*.f are written by ../src/gen_fft_r22sdf.py
+FILELISTS = {'r2sdf': 'fft_multipoint.f', 'r22sdf': 'fft_r22sdf.f'}
+
+
+def filelist(arch='r2sdf', lanes=1):
+    """File list of the core with the given samples per cycle (only r22sdf has multi-lane variants)"""
+    if lanes == 1:
+        return os.path.join(SIM_DIR, FILELISTS[arch])
+    if arch != 'r22sdf':
+        raise ValueError(f'{arch} takes one sample per cycle')
+    return os.path.join(SIM_DIR, f'fft_r22sdf_x{lanes}.f')
+
+
+def find_simulator(prefer=None):
+    """'icarus' or 'verilator', whichever is installed (prefer first); None if neither"""
+    available = {
+        'icarus': shutil.which('iverilog') and shutil.which('vvp'),
+        'verilator': shutil.which('verilator'),
+    }
+    order = [prefer] if prefer else ['icarus', 'verilator']
+    return next((sim for sim in order if available.get(sim)), None)
+
+
+def sources(filelist=os.path.join(SIM_DIR, 'fft_multipoint.f')):
+    """Source files from the VCS file list, as absolute paths"""
+    with open(filelist) as file:
+        return [os.path.normpath(os.path.join(SIM_DIR, line.strip())) for line in file
+                if line.strip() and not line.startswith(('//', '#', '+', '-'))]
+
+
+def defines(filelist=os.path.join(SIM_DIR, 'fft_multipoint.f')):
+    """+define+NAME=VALUE lines of the VCS file list as -DNAME=VALUE options"""
+    with open(filelist) as file:
+        return ['-D' + d for line in file if line.startswith('+define+') for d in line.strip().split('+')[2:] if d]
+
+
+def build(simulator, build_dir, arch='r2sdf', lanes=1):
+    """
+    Compile the testbench once
+
+    returns the command prefix that runs one simulation (plusargs are appended)
+    """
+    os.makedirs(build_dir, exist_ok=True)
+    files, opts = sources(filelist(arch, lanes)), defines(filelist(arch, lanes))
+    if simulator == 'icarus':
+        out = os.path.join(build_dir, 'fft_multipoint.vvp')
+        subprocess.run(['iverilog', '-g2012', '-s', TOP, '-o', out] + opts + files, check=True)
+        return ['vvp', '-n', out]
+    if simulator == 'verilator':
+        obj = os.path.join(build_dir, 'obj_dir')
+        subprocess.run(['verilator', '--binary', '--timing', '-Wno-fatal', '-Wno-lint', '--top-module', TOP,
+                        '-Mdir', obj, '-j', str(os.cpu_count() or 1)] + opts + files, check=True)
+        return [os.path.join(obj, f'V{TOP}')]
+    raise ValueError(f'unknown simulator {simulator!r}')
+
+
+def _score(entry, vec_dir, y_re, y_im, mode, arch):
+    N, frames, prefix = entry['N'], entry['frames'], entry['prefix']
+    x_re = read_hex(os.path.join(vec_dir, f'{prefix}_input_re.txt')).reshape(frames, N)
+    x_im = read_hex(os.path.join(vec_dir, f'{prefix}_input_im.txt')).reshape(frames, N)
+    m_re, m_im = ARCHS[arch](x_re, x_im, mode, load_twiddles())
+    ref = np.fft.fft(x_re + 1j * x_im)
+    result = {'model_sqnr': sqnr(m_re, m_im, ref)}
+    if y_re is None:
+        return result
+    n = min(len(y_re), len(y_im), frames * N)
+    got_re = np.full(frames * N, 0, dtype=np.int64)
+    got_im = np.full(frames * N, 0, dtype=np.int64)
+    got_re[:n], got_im[:n] = y_re[:n], y_im[:n]
+    err = np.maximum(np.abs(got_re - m_re.ravel()), np.abs(got_im - m_im.ravel()))
+    result.update({
+        'outputs': int(n),
+        'mismatches': int((err != 0).sum()),
+        'max_err': int(err.max()),
+        'sqnr': sqnr(got_re.reshape(frames, N), got_im.reshape(frames, N), ref),
+    })
+    result['pass'] = n == frames * N and result['mismatches'] == 0
+    return result
+
+
+def run_job(args):
+    """One (np, vector set) simulation plus scoring; runs in a worker process"""
+    entry, command, vec_dir, work_dir, mode, arch, lanes, timeout = args
+    prefix = entry['prefix']
+    result = dict(entry)
+    if command is None:
+        result.update(_score(entry, vec_dir, None, None, mode, arch))
+        return result
+    # one directory per core, so a failed run can never be scored on another core's outputs
+    work = os.path.join(work_dir, f'{arch}_x{lanes}', prefix)
+    os.makedirs(work, exist_ok=True)
+    for name in TWIDDLE_FILES:
+        shutil.copyfile(os.path.join(TB_DIR, name), os.path.join(work, name))
+    out_re, out_im = os.path.join(work, 'output_re.txt'), os.path.join(work, 'output_im.txt')
+    for name in (out_re, out_im):
+        if os.path.exists(name):
+            os.remove(name)
+    plusargs = [f"+np={entry['np']}", f"+frames={entry['frames']}",
+                f"+in_re={os.path.join(vec_dir, prefix + '_input_re.txt')}",
+                f"+in_im={os.path.join(vec_dir, prefix + '_input_im.txt')}",
+                f'+out_re={out_re}', f'+out_im={out_im}']
+    start = time.time()
+    try:
+        proc = subprocess.run(command + plusargs, cwd=work, capture_output=True, text=True, timeout=timeout)
+        with open(os.path.join(work, 'sim.log'), 'w') as log:
+            log.write(proc.stdout + proc.stderr)
+        if proc.returncode != 0 or not (os.path.exists(out_re) and os.path.exists(out_im)):
+            error = f'exit code {proc.returncode}' if proc.returncode != 0 else 'no output files'
+            result.update(_score(entry, vec_dir, None, None, mode, arch), status=f'ERROR: {error}',
+                          **{'pass': False})
+        else:
+            y_re, y_im = read_hex(out_re), read_hex(out_im)
+            result.update(_score(entry, vec_dir, y_re, y_im, mode, arch))
+            result['status'] = 'PASS' if result['pass'] else 'FAIL'
+    except subprocess.TimeoutExpired:
+        result.update(_score(entry, vec_dir, None, None, mode, arch), status='TIMEOUT', **{'pass': False})
+    except (OSError, ValueError) as e:
+        result.update(_score(entry, vec_dir, None, None, mode, arch), status=f'ERROR: {e}', **{'pass': False})
+    result['seconds'] = time.time() - start
+    return result
+
+
+def regress(sizes=SIZES, sets=tuple(VECTOR_SETS), frames=4, simulator=None, jobs=None, mode='rtl',
+            vec_dir=None, work_dir=None, model_only=False, timeout=600, regenerate=False, arch='r2sdf', lanes=1):
+    """
+    Build once, run all (np, vector set) jobs in parallel and score them
+
+    mode: saturation model of the golden reference, 'rtl' (matches the shipped RTL) or 'ideal'
+    arch: 'r2sdf' (fft_multipoint) or 'r22sdf' (fft_r22sdf), selects the file list and golden model
+    lanes: samples per cycle of the r22sdf core (fft_r22sdf_x2/x4); the golden model is the same
+    model_only: skip simulation and report only the golden model's SQNR (no simulator needed)
+
+    returns the per-job result dicts, ordered by N then vector set
+    """
+    vec_dir = os.path.abspath(vec_dir or os.path.join(SIM_DIR, 'vectors'))
+    work_dir = os.path.abspath(work_dir or os.path.join(SIM_DIR, 'work'))
+    index_file = os.path.join(vec_dir, 'index.json')
+    index = None
+    if not regenerate and os.path.exists(index_file):
+        with open(index_file) as file:
+            saved = json.load(file)
+        wanted = {(N, s) for N in sizes for s in sets}
+        index = [e for e in saved['vectors'] if (e['N'], e['set']) in wanted and e['frames'] == frames]
+        if saved['mode'] != mode or saved.get('arch', 'r2sdf') != arch or len(index) != len(wanted):
+            index = None
+    if index is None:
+        index = generate(sizes, sets, frames, vec_dir, mode, arch=arch)
+
+    command = None
+    if not model_only:
+        simulator = find_simulator(simulator)
+        if simulator is None:
+            raise RuntimeError('neither Icarus Verilog (iverilog/vvp) nor Verilator was found on PATH')
+        command = build(simulator, os.path.join(work_dir, f'build_{simulator}_{arch}_x{lanes}'), arch, lanes)
+
+    tasks = [(entry, command, vec_dir, work_dir, mode, arch, lanes, timeout) for entry in index]
+    if jobs == 1:
+        return [run_job(t) for t in tasks]
+    with Pool(jobs) as pool:
+        return pool.map(run_job, tasks)
+
+
+def print_table(results):
+    print(f"{'N':>5} {'np':>2} {'set':<11} {'frames':>6} {'status':<8} {'mismatch':>8} {'max_err':>7} "
+          f"{'SQNR(dB)':>9} {'model(dB)':>9} {'time(s)':>7}")
+    for r in results:
+        if 'status' not in r:
+            print(f"{r['N']:5d} {r['np']:2d} {r['set']:<11} {r['frames']:6d} {'model':<8} {'-':>8} {'-':>7} "
+                  f"{'-':>9} {r['model_sqnr']:9.2f} {'-':>7}")
+            continue
+        if 'sqnr' in r:
+            sim = f"{r['mismatches']:8d} {r['max_err']:7d} {r['sqnr']:9.2f}"
+        else:
+            sim = f"{'-':>8} {'-':>7} {'-':>9}"
+        print(f"{r['N']:5d} {r['np']:2d} {r['set']:<11} {r['frames']:6d} {r['status'][:8]:<8} {sim} "
+              f"{r['model_sqnr']:9.2f} {r['seconds']:7.1f}")
+
+
+# main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parallel fft_multipoint regression with Icarus Verilog / Verilator')
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('-s', '--sets', nargs='+', default=list(VECTOR_SETS), choices=list(VECTOR_SETS))
+    parser.add_argument('-f', '--frames', type=int, default=4, help='frames per (N, set)')
+    parser.add_argument('--simulator', choices=['icarus', 'verilator'], help='default: whichever is installed')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes, default all cores')
+    parser.add_argument('--mode', choices=['ideal', 'rtl'], default='rtl',
+                        help="saturation model used as the golden reference (see fft_model.py); 'rtl' matches "
+                             "the shipped RTL, 'ideal' only an RTL with the saturation fixed")
+    parser.add_argument('--arch', choices=list(FILELISTS), default='r2sdf',
+                        help='r2sdf: fft_multipoint, r22sdf: fft_r22sdf (../src/gen_fft_r22sdf.py)')
+    parser.add_argument('--lanes', type=int, choices=[1, 2, 4], default=1, help='samples per cycle (r22sdf only)')
+    parser.add_argument('--model-only', action='store_true', help='no simulation, golden-model SQNR only')
+    parser.add_argument('--regenerate', action='store_true', help='regenerate vectors even if they exist')
+    parser.add_argument('--timeout', type=float, default=600, help='per-simulation timeout (s)')
+    args = parser.parse_args()
+
+    start = time.time()
+    try:
+        results = regress(args.sizes, args.sets, args.frames, args.simulator, args.jobs, args.mode,
+                          model_only=args.model_only, timeout=args.timeout, regenerate=args.regenerate,
+                          arch=args.arch, lanes=args.lanes)
+    except RuntimeError as e:
+        print(f'{e}; use --model-only to score the golden model alone')
+        raise SystemExit(2)
+    print_table(results)
+    failed = [r for r in results if 'status' in r and not r['pass']]
+    print(f'{len(results)} jobs, {len(failed)} failed, {time.time() - start:.1f}s')
+    raise SystemExit(1 if failed else 0)
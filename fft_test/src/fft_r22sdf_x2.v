@@ -0,0 +1,692 @@
+// Author: generated by gen_fft_r22sdf.py (MAX_N = 2048, LANES = 2) -- edit the generator, not this file
+// Description: Radix-2^2 SDF Multi-Point FFT (FFT-only)
+//              Supports FFT sizes: 8, 16, ..., 2048
+//              Same interface as fft_multipoint with 2 complex Q15 sample(s) per cycle
+//              (lane j on bits [16*j +: 16], stream position t*2 + j),
+//              output in natural order through r22_reorder.
+//              10 complex multipliers (11 butterfly stages), trivial -j rotations in BF2II.
+
+// SDF butterfly stage K of lane LANE: FIFO depth 2^(K-LB), registered output, latency 2^(K-LB) + 1
+module r22_bf #(
+    parameter K    = 0,   // stage index
+    parameter ROT  = 0,   // 1: BF2II, multiply the last quarter of each 4*2^K block by -j
+    parameter CW   = 12,  // sample index width
+    parameter LB   = 0,   // log2(lanes)
+    parameter LANE = 0    // lane index
+) (
+    input               clk,
+    input               rst_n,
+    input      [CW-1:0] mask,      // point / lanes - 1
+    input      [15:0]   x_re,
+    input      [15:0]   x_im,
+    input               in_valid,
+    input               in_sop,
+    output reg [15:0]   y_re,
+    output reg [15:0]   y_im,
+    output              out_valid,
+    output              out_sop
+);
+
+    // Cycle index within the frame, restarted by sop; n is the stream position of this lane's sample
+    reg  [CW-1:0] cnt;
+    wire [CW-1:0] idx = in_sop ? {{CW{{1'b0}}}} : cnt;
+    wire [CW-1:0] n   = (idx << LB) | LANE;
+
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            cnt <= {{CW{{1'b0}}}};
+        end else begin
+            cnt <= (idx + 1'b1) & mask;
+        end
+    end
+
+    wire ctrl = n[K];                           // 0: fill FIFO, 1: butterfly
+    wire rot  = (ROT != 0) && n[K+1] && n[K];
+
+    // -j rotation: (re, im) -> (im, -re), -(-32768) saturates to 32767
+    wire [15:0] neg_re = (x_re == 16'h8000) ? 16'h7fff : (~x_re + 1'b1);
+    wire [15:0] b_re   = rot ? x_im   : x_re;
+    wire [15:0] b_im   = rot ? neg_re : x_im;
+
+    wire [15:0] a_re, a_im, sum_re, sum_im, dif_re, dif_im;
+
+    complex_add add_u (
+        .x0_re(a_re), .x0_im(a_im), .x1_re(b_re), .x1_im(b_im),
+        .res_re(sum_re), .res_im(sum_im)
+    );
+
+    complex_sub sub_u (
+        .x0_re(a_re), .x0_im(a_im), .x1_re(b_re), .x1_im(b_im),
+        .res_re(dif_re), .res_im(dif_im)
+    );
+
+    // Feedback FIFO: holds the first half of a block, then the differences
+    shiftreg #(.WIDTH(32), .DEPTH(1 << (K - LB))) fifo_u (
+        .clk(clk), .rst_n(rst_n),
+        .d_in (ctrl ? {{dif_re, dif_im}} : {{b_re, b_im}}),
+        .d_out({{a_re, a_im}})
+    );
+
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            y_re <= 16'd0;
+            y_im <= 16'd0;
+        end else if (ctrl) begin
+            y_re <= sum_re;
+            y_im <= sum_im;
+        end else begin
+            y_re <= a_re;
+            y_im <= a_im;
+        end
+    end
+
+    shiftreg #(.WIDTH(2), .DEPTH((1 << (K - LB)) + 1)) side_u (
+        .clk(clk), .rst_n(rst_n), .d_in({{in_valid, in_sop}}), .d_out({{out_valid, out_sop}})
+    );
+
+endmodule
+
+// Lane-crossing butterfly for stage K < LB: x0 = lane with n[K] = 0, x1 = lane LANE (n[K] = 1)
+// in the same cycle; no memory, registered output, latency 1
+module r22_xbf #(
+    parameter K    = 0,
+    parameter ROT  = 0,
+    parameter CW   = 12,
+    parameter LB   = 1,
+    parameter LANE = 1
+) (
+    input               clk,
+    input               rst_n,
+    input      [CW-1:0] mask,
+    input      [15:0]   x0_re,
+    input      [15:0]   x0_im,
+    input      [15:0]   x1_re,
+    input      [15:0]   x1_im,
+    input               in_valid,
+    input               in_sop,
+    output reg [15:0]   y0_re,
+    output reg [15:0]   y0_im,
+    output reg [15:0]   y1_re,
+    output reg [15:0]   y1_im,
+    output              out_valid,
+    output              out_sop
+);
+
+    reg  [CW-1:0] cnt;
+    wire [CW-1:0] idx = in_sop ? {{CW{{1'b0}}}} : cnt;
+    wire [CW-1:0] n   = (idx << LB) | LANE;
+
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            cnt <= {{CW{{1'b0}}}};
+        end else begin
+            cnt <= (idx + 1'b1) & mask;
+        end
+    end
+
+    wire rot = (ROT != 0) && n[K+1];
+
+    wire [15:0] neg_re = (x1_re == 16'h8000) ? 16'h7fff : (~x1_re + 1'b1);
+    wire [15:0] b_re   = rot ? x1_im  : x1_re;
+    wire [15:0] b_im   = rot ? neg_re : x1_im;
+
+    wire [15:0] sum_re, sum_im, dif_re, dif_im;
+
+    complex_add add_u (
+        .x0_re(x0_re), .x0_im(x0_im), .x1_re(b_re), .x1_im(b_im),
+        .res_re(sum_re), .res_im(sum_im)
+    );
+
+    complex_sub sub_u (
+        .x0_re(x0_re), .x0_im(x0_im), .x1_re(b_re), .x1_im(b_im),
+        .res_re(dif_re), .res_im(dif_im)
+    );
+
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            y0_re <= 16'd0;
+            y0_im <= 16'd0;
+            y1_re <= 16'd0;
+            y1_im <= 16'd0;
+        end else begin
+            y0_re <= sum_re;
+            y0_im <= sum_im;
+            y1_re <= dif_re;
+            y1_im <= dif_im;
+        end
+    end
+
+    shiftreg #(.WIDTH(2), .DEPTH(1)) side_u (
+        .clk(clk), .rst_n(rst_n), .d_in({{in_valid, in_sop}}), .d_out({{out_valid, out_sop}})
+    );
+
+endmodule
+
+// Twiddle stage after BF2II stage K: W_(2^(K+2))^(m*e), m = n[K-1:0], e = bit-reversed n[K+1:K]
+// Exponent scaled to the 2048-point ROM: z = (m*e << ZSHL) >> ZSHR; z = 0 bypasses the multiplier.
+// Latency 2 (synchronous ROM read, registered product).
+module r22_tw #(
+    parameter K    = 2,
+    parameter ZSHL = 7,
+    parameter ZSHR = 0,
+    parameter CW   = 12,
+    parameter LB   = 0,
+    parameter LANE = 0
+) (
+    input               clk,
+    input               rst_n,
+    input      [CW-1:0] mask,
+    input      [15:0]   x_re,
+    input      [15:0]   x_im,
+    input               in_valid,
+    input               in_sop,
+    output reg [15:0]   y_re,
+    output reg [15:0]   y_im,
+    output              out_valid,
+    output              out_sop
+);
+
+    reg  [CW-1:0] cnt;
+    wire [CW-1:0] idx = in_sop ? {{CW{{1'b0}}}} : cnt;
+    wire [CW-1:0] n   = (idx << LB) | LANE;
+
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            cnt <= {{CW{{1'b0}}}};
+        end else begin
+            cnt <= (idx + 1'b1) & mask;
+        end
+    end
+
+    wire [1:0]  e  = {{n[K], n[K+1]}};
+    wire [11:0] me = n[K-1:0] * e;
+    wire [11:0] z  = (me << ZSHL) >> ZSHR;    // angle in units of 2*pi/2048
+
+    wire [15:0] w_re, w_im;
+    twiddle_rom #(.MAX_N(2048)) tw_rom_u (
+        .clk(clk),
+        .addr({{1'b0, z[9:0]}}),
+        .data_re(w_re),
+        .data_im(w_im)
+    );
+
+    // Align data with the ROM output
+    reg [15:0] xd_re, xd_im;
+    reg        neg_d, trivial_d;
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            xd_re     <= 16'd0;
+            xd_im     <= 16'd0;
+            neg_d     <= 1'b0;
+            trivial_d <= 1'b1;
+        end else begin
+            xd_re     <= x_re;
+            xd_im     <= x_im;
+            neg_d     <= z[10];                 // past a half turn: W = -ROM[z - 1024]
+            trivial_d <= (z == 12'd0);
+        end
+    end
+
+    // ROM values are within +-32767, so plain negation cannot overflow
+    wire [15:0] wn_re = neg_d ? (~w_re + 1'b1) : w_re;
+    wire [15:0] wn_im = neg_d ? (~w_im + 1'b1) : w_im;
+    wire [15:0] p_re, p_im;
+
+    complex_mult mul_u (
+        .x0_re(xd_re), .x0_im(xd_im), .x1_re(wn_re), .x1_im(wn_im),
+        .res_re(p_re), .res_im(p_im)
+    );
+
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            y_re <= 16'd0;
+            y_im <= 16'd0;
+        end else begin
+            y_re <= trivial_d ? xd_re : p_re;
+            y_im <= trivial_d ? xd_im : p_im;
+        end
+    end
+
+    shiftreg #(.WIDTH(2), .DEPTH(2)) side_u (
+        .clk(clk), .rst_n(rst_n), .d_in({{in_valid, in_sop}}), .d_out({{out_valid, out_sop}})
+    );
+
+endmodule
+
+module fft_r22sdf_x2 (
+    input             clk,
+    input             rst_n,
+    input       [3:0] np,        // FFT size: 0->8, 1->16, ..., 8->2048
+    input             stb,       // Input data valid
+    input             sop_in,    // Start-of-packet (first valid input)
+    input      [31:0] x_re,      // Input real part (Q15)
+    input      [31:0] x_im,      // Input imaginary part (Q15)
+
+    output            valid_out, // Output data valid
+    output            sop_out,   // Start-of-packet for output
+    output     [31:0] y_re,      // Output real part
+    output     [31:0] y_im       // Output imaginary part
+);
+
+    localparam MAX_N = 2048;
+    localparam CW    = 12;
+    localparam LANES = 2;
+    localparam LB    = 1;
+
+    // ==============================
+    // Decode FFT Size
+    // ==============================
+    reg  [CW-1:0] point;
+    reg  [3:0]    log2point;
+
+    always @(*) begin
+        case(np)
+            4'd0:  begin point = 12'd8; log2point = 4'd3; end
+            4'd1:  begin point = 12'd16; log2point = 4'd4; end
+            4'd2:  begin point = 12'd32; log2point = 4'd5; end
+            4'd3:  begin point = 12'd64; log2point = 4'd6; end
+            4'd4:  begin point = 12'd128; log2point = 4'd7; end
+            4'd5:  begin point = 12'd256; log2point = 4'd8; end
+            4'd6:  begin point = 12'd512; log2point = 4'd9; end
+            4'd7:  begin point = 12'd1024; log2point = 4'd10; end
+            4'd8:  begin point = 12'd2048; log2point = 4'd11; end
+            default: begin point = 12'd8; log2point = 4'd3; end
+        endcase
+    end
+
+    wire [CW-1:0] mask = (point >> LB) - 1'b1;   // cycles per frame - 1
+
+    genvar j;
+
+    // ==============================
+    // Stage 10: BF2II, FIFO depth 512 + twiddle
+    // ==============================
+    wire [31:0] s10_in_re, s10_in_im, s10_bf_re, s10_bf_im;
+    wire        s10_in_valid, s10_in_sop;
+    wire [LANES-1:0] s10_bf_valid, s10_bf_sop;
+    assign s10_in_re = x_re;
+    assign s10_in_im = x_im;
+    assign s10_in_valid = stb;
+    assign s10_in_sop = sop_in;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : bf10_lane
+            r22_bf #(.K(10), .ROT(1), .CW(CW), .LB(LB), .LANE(j)) bf_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s10_in_re[16*j +: 16]), .x_im(s10_in_im[16*j +: 16]),
+                .in_valid(s10_in_valid), .in_sop(s10_in_sop),
+                .y_re(s10_bf_re[16*j +: 16]), .y_im(s10_bf_im[16*j +: 16]),
+                .out_valid(s10_bf_valid[j]), .out_sop(s10_bf_sop[j])
+            );
+        end
+    endgenerate
+    wire [31:0] s10_out_re, s10_out_im;
+    wire [LANES-1:0] s10_tw_valid, s10_tw_sop;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : tw10_lane
+            r22_tw #(.K(10), .ZSHL(0), .ZSHR(1), .CW(CW), .LB(LB), .LANE(j)) tw_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s10_bf_re[16*j +: 16]), .x_im(s10_bf_im[16*j +: 16]),
+                .in_valid(s10_bf_valid[0]), .in_sop(s10_bf_sop[0]),
+                .y_re(s10_out_re[16*j +: 16]), .y_im(s10_out_im[16*j +: 16]),
+                .out_valid(s10_tw_valid[j]), .out_sop(s10_tw_sop[j])
+            );
+        end
+    endgenerate
+
+    wire s10_out_valid = s10_tw_valid[0];
+    wire s10_out_sop   = s10_tw_sop[0];
+
+    // ==============================
+    // Stage 9: BF2I, FIFO depth 256
+    // ==============================
+    wire [31:0] s9_in_re, s9_in_im, s9_bf_re, s9_bf_im;
+    wire        s9_in_valid, s9_in_sop;
+    wire [LANES-1:0] s9_bf_valid, s9_bf_sop;
+    assign s9_in_re = (log2point == 4'd10) ? x_re : s10_out_re;
+    assign s9_in_im = (log2point == 4'd10) ? x_im : s10_out_im;
+    assign s9_in_valid = (log2point == 4'd10) ? stb : s10_out_valid;
+    assign s9_in_sop = (log2point == 4'd10) ? sop_in : s10_out_sop;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : bf9_lane
+            r22_bf #(.K(9), .ROT(0), .CW(CW), .LB(LB), .LANE(j)) bf_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s9_in_re[16*j +: 16]), .x_im(s9_in_im[16*j +: 16]),
+                .in_valid(s9_in_valid), .in_sop(s9_in_sop),
+                .y_re(s9_bf_re[16*j +: 16]), .y_im(s9_bf_im[16*j +: 16]),
+                .out_valid(s9_bf_valid[j]), .out_sop(s9_bf_sop[j])
+            );
+        end
+    endgenerate
+    wire [31:0] s9_out_re = s9_bf_re;
+    wire [31:0] s9_out_im = s9_bf_im;
+    wire        s9_out_valid = s9_bf_valid[0];
+    wire        s9_out_sop   = s9_bf_sop[0];
+
+    // ==============================
+    // Stage 8: BF2II, FIFO depth 128 + twiddle
+    // ==============================
+    wire [31:0] s8_in_re, s8_in_im, s8_bf_re, s8_bf_im;
+    wire        s8_in_valid, s8_in_sop;
+    wire [LANES-1:0] s8_bf_valid, s8_bf_sop;
+    assign s8_in_re = (log2point == 4'd9) ? x_re : s9_out_re;
+    assign s8_in_im = (log2point == 4'd9) ? x_im : s9_out_im;
+    assign s8_in_valid = (log2point == 4'd9) ? stb : s9_out_valid;
+    assign s8_in_sop = (log2point == 4'd9) ? sop_in : s9_out_sop;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : bf8_lane
+            r22_bf #(.K(8), .ROT(1), .CW(CW), .LB(LB), .LANE(j)) bf_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s8_in_re[16*j +: 16]), .x_im(s8_in_im[16*j +: 16]),
+                .in_valid(s8_in_valid), .in_sop(s8_in_sop),
+                .y_re(s8_bf_re[16*j +: 16]), .y_im(s8_bf_im[16*j +: 16]),
+                .out_valid(s8_bf_valid[j]), .out_sop(s8_bf_sop[j])
+            );
+        end
+    endgenerate
+    wire [31:0] s8_out_re, s8_out_im;
+    wire [LANES-1:0] s8_tw_valid, s8_tw_sop;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : tw8_lane
+            r22_tw #(.K(8), .ZSHL(1), .ZSHR(0), .CW(CW), .LB(LB), .LANE(j)) tw_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s8_bf_re[16*j +: 16]), .x_im(s8_bf_im[16*j +: 16]),
+                .in_valid(s8_bf_valid[0]), .in_sop(s8_bf_sop[0]),
+                .y_re(s8_out_re[16*j +: 16]), .y_im(s8_out_im[16*j +: 16]),
+                .out_valid(s8_tw_valid[j]), .out_sop(s8_tw_sop[j])
+            );
+        end
+    endgenerate
+
+    wire s8_out_valid = s8_tw_valid[0];
+    wire s8_out_sop   = s8_tw_sop[0];
+
+    // ==============================
+    // Stage 7: BF2I, FIFO depth 64
+    // ==============================
+    wire [31:0] s7_in_re, s7_in_im, s7_bf_re, s7_bf_im;
+    wire        s7_in_valid, s7_in_sop;
+    wire [LANES-1:0] s7_bf_valid, s7_bf_sop;
+    assign s7_in_re = (log2point == 4'd8) ? x_re : s8_out_re;
+    assign s7_in_im = (log2point == 4'd8) ? x_im : s8_out_im;
+    assign s7_in_valid = (log2point == 4'd8) ? stb : s8_out_valid;
+    assign s7_in_sop = (log2point == 4'd8) ? sop_in : s8_out_sop;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : bf7_lane
+            r22_bf #(.K(7), .ROT(0), .CW(CW), .LB(LB), .LANE(j)) bf_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s7_in_re[16*j +: 16]), .x_im(s7_in_im[16*j +: 16]),
+                .in_valid(s7_in_valid), .in_sop(s7_in_sop),
+                .y_re(s7_bf_re[16*j +: 16]), .y_im(s7_bf_im[16*j +: 16]),
+                .out_valid(s7_bf_valid[j]), .out_sop(s7_bf_sop[j])
+            );
+        end
+    endgenerate
+    wire [31:0] s7_out_re = s7_bf_re;
+    wire [31:0] s7_out_im = s7_bf_im;
+    wire        s7_out_valid = s7_bf_valid[0];
+    wire        s7_out_sop   = s7_bf_sop[0];
+
+    // ==============================
+    // Stage 6: BF2II, FIFO depth 32 + twiddle
+    // ==============================
+    wire [31:0] s6_in_re, s6_in_im, s6_bf_re, s6_bf_im;
+    wire        s6_in_valid, s6_in_sop;
+    wire [LANES-1:0] s6_bf_valid, s6_bf_sop;
+    assign s6_in_re = (log2point == 4'd7) ? x_re : s7_out_re;
+    assign s6_in_im = (log2point == 4'd7) ? x_im : s7_out_im;
+    assign s6_in_valid = (log2point == 4'd7) ? stb : s7_out_valid;
+    assign s6_in_sop = (log2point == 4'd7) ? sop_in : s7_out_sop;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : bf6_lane
+            r22_bf #(.K(6), .ROT(1), .CW(CW), .LB(LB), .LANE(j)) bf_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s6_in_re[16*j +: 16]), .x_im(s6_in_im[16*j +: 16]),
+                .in_valid(s6_in_valid), .in_sop(s6_in_sop),
+                .y_re(s6_bf_re[16*j +: 16]), .y_im(s6_bf_im[16*j +: 16]),
+                .out_valid(s6_bf_valid[j]), .out_sop(s6_bf_sop[j])
+            );
+        end
+    endgenerate
+    wire [31:0] s6_out_re, s6_out_im;
+    wire [LANES-1:0] s6_tw_valid, s6_tw_sop;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : tw6_lane
+            r22_tw #(.K(6), .ZSHL(3), .ZSHR(0), .CW(CW), .LB(LB), .LANE(j)) tw_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s6_bf_re[16*j +: 16]), .x_im(s6_bf_im[16*j +: 16]),
+                .in_valid(s6_bf_valid[0]), .in_sop(s6_bf_sop[0]),
+                .y_re(s6_out_re[16*j +: 16]), .y_im(s6_out_im[16*j +: 16]),
+                .out_valid(s6_tw_valid[j]), .out_sop(s6_tw_sop[j])
+            );
+        end
+    endgenerate
+
+    wire s6_out_valid = s6_tw_valid[0];
+    wire s6_out_sop   = s6_tw_sop[0];
+
+    // ==============================
+    // Stage 5: BF2I, FIFO depth 16
+    // ==============================
+    wire [31:0] s5_in_re, s5_in_im, s5_bf_re, s5_bf_im;
+    wire        s5_in_valid, s5_in_sop;
+    wire [LANES-1:0] s5_bf_valid, s5_bf_sop;
+    assign s5_in_re = (log2point == 4'd6) ? x_re : s6_out_re;
+    assign s5_in_im = (log2point == 4'd6) ? x_im : s6_out_im;
+    assign s5_in_valid = (log2point == 4'd6) ? stb : s6_out_valid;
+    assign s5_in_sop = (log2point == 4'd6) ? sop_in : s6_out_sop;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : bf5_lane
+            r22_bf #(.K(5), .ROT(0), .CW(CW), .LB(LB), .LANE(j)) bf_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s5_in_re[16*j +: 16]), .x_im(s5_in_im[16*j +: 16]),
+                .in_valid(s5_in_valid), .in_sop(s5_in_sop),
+                .y_re(s5_bf_re[16*j +: 16]), .y_im(s5_bf_im[16*j +: 16]),
+                .out_valid(s5_bf_valid[j]), .out_sop(s5_bf_sop[j])
+            );
+        end
+    endgenerate
+    wire [31:0] s5_out_re = s5_bf_re;
+    wire [31:0] s5_out_im = s5_bf_im;
+    wire        s5_out_valid = s5_bf_valid[0];
+    wire        s5_out_sop   = s5_bf_sop[0];
+
+    // ==============================
+    // Stage 4: BF2II, FIFO depth 8 + twiddle
+    // ==============================
+    wire [31:0] s4_in_re, s4_in_im, s4_bf_re, s4_bf_im;
+    wire        s4_in_valid, s4_in_sop;
+    wire [LANES-1:0] s4_bf_valid, s4_bf_sop;
+    assign s4_in_re = (log2point == 4'd5) ? x_re : s5_out_re;
+    assign s4_in_im = (log2point == 4'd5) ? x_im : s5_out_im;
+    assign s4_in_valid = (log2point == 4'd5) ? stb : s5_out_valid;
+    assign s4_in_sop = (log2point == 4'd5) ? sop_in : s5_out_sop;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : bf4_lane
+            r22_bf #(.K(4), .ROT(1), .CW(CW), .LB(LB), .LANE(j)) bf_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s4_in_re[16*j +: 16]), .x_im(s4_in_im[16*j +: 16]),
+                .in_valid(s4_in_valid), .in_sop(s4_in_sop),
+                .y_re(s4_bf_re[16*j +: 16]), .y_im(s4_bf_im[16*j +: 16]),
+                .out_valid(s4_bf_valid[j]), .out_sop(s4_bf_sop[j])
+            );
+        end
+    endgenerate
+    wire [31:0] s4_out_re, s4_out_im;
+    wire [LANES-1:0] s4_tw_valid, s4_tw_sop;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : tw4_lane
+            r22_tw #(.K(4), .ZSHL(5), .ZSHR(0), .CW(CW), .LB(LB), .LANE(j)) tw_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s4_bf_re[16*j +: 16]), .x_im(s4_bf_im[16*j +: 16]),
+                .in_valid(s4_bf_valid[0]), .in_sop(s4_bf_sop[0]),
+                .y_re(s4_out_re[16*j +: 16]), .y_im(s4_out_im[16*j +: 16]),
+                .out_valid(s4_tw_valid[j]), .out_sop(s4_tw_sop[j])
+            );
+        end
+    endgenerate
+
+    wire s4_out_valid = s4_tw_valid[0];
+    wire s4_out_sop   = s4_tw_sop[0];
+
+    // ==============================
+    // Stage 3: BF2I, FIFO depth 4
+    // ==============================
+    wire [31:0] s3_in_re, s3_in_im, s3_bf_re, s3_bf_im;
+    wire        s3_in_valid, s3_in_sop;
+    wire [LANES-1:0] s3_bf_valid, s3_bf_sop;
+    assign s3_in_re = (log2point == 4'd4) ? x_re : s4_out_re;
+    assign s3_in_im = (log2point == 4'd4) ? x_im : s4_out_im;
+    assign s3_in_valid = (log2point == 4'd4) ? stb : s4_out_valid;
+    assign s3_in_sop = (log2point == 4'd4) ? sop_in : s4_out_sop;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : bf3_lane
+            r22_bf #(.K(3), .ROT(0), .CW(CW), .LB(LB), .LANE(j)) bf_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s3_in_re[16*j +: 16]), .x_im(s3_in_im[16*j +: 16]),
+                .in_valid(s3_in_valid), .in_sop(s3_in_sop),
+                .y_re(s3_bf_re[16*j +: 16]), .y_im(s3_bf_im[16*j +: 16]),
+                .out_valid(s3_bf_valid[j]), .out_sop(s3_bf_sop[j])
+            );
+        end
+    endgenerate
+    wire [31:0] s3_out_re = s3_bf_re;
+    wire [31:0] s3_out_im = s3_bf_im;
+    wire        s3_out_valid = s3_bf_valid[0];
+    wire        s3_out_sop   = s3_bf_sop[0];
+
+    // ==============================
+    // Stage 2: BF2II, FIFO depth 2 + twiddle
+    // ==============================
+    wire [31:0] s2_in_re, s2_in_im, s2_bf_re, s2_bf_im;
+    wire        s2_in_valid, s2_in_sop;
+    wire [LANES-1:0] s2_bf_valid, s2_bf_sop;
+    assign s2_in_re = (log2point == 4'd3) ? x_re : s3_out_re;
+    assign s2_in_im = (log2point == 4'd3) ? x_im : s3_out_im;
+    assign s2_in_valid = (log2point == 4'd3) ? stb : s3_out_valid;
+    assign s2_in_sop = (log2point == 4'd3) ? sop_in : s3_out_sop;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : bf2_lane
+            r22_bf #(.K(2), .ROT(1), .CW(CW), .LB(LB), .LANE(j)) bf_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s2_in_re[16*j +: 16]), .x_im(s2_in_im[16*j +: 16]),
+                .in_valid(s2_in_valid), .in_sop(s2_in_sop),
+                .y_re(s2_bf_re[16*j +: 16]), .y_im(s2_bf_im[16*j +: 16]),
+                .out_valid(s2_bf_valid[j]), .out_sop(s2_bf_sop[j])
+            );
+        end
+    endgenerate
+    wire [31:0] s2_out_re, s2_out_im;
+    wire [LANES-1:0] s2_tw_valid, s2_tw_sop;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : tw2_lane
+            r22_tw #(.K(2), .ZSHL(7), .ZSHR(0), .CW(CW), .LB(LB), .LANE(j)) tw_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s2_bf_re[16*j +: 16]), .x_im(s2_bf_im[16*j +: 16]),
+                .in_valid(s2_bf_valid[0]), .in_sop(s2_bf_sop[0]),
+                .y_re(s2_out_re[16*j +: 16]), .y_im(s2_out_im[16*j +: 16]),
+                .out_valid(s2_tw_valid[j]), .out_sop(s2_tw_sop[j])
+            );
+        end
+    endgenerate
+
+    wire s2_out_valid = s2_tw_valid[0];
+    wire s2_out_sop   = s2_tw_sop[0];
+
+    // ==============================
+    // Stage 1: BF2I, FIFO depth 1
+    // ==============================
+    wire [31:0] s1_in_re, s1_in_im, s1_bf_re, s1_bf_im;
+    wire        s1_in_valid, s1_in_sop;
+    wire [LANES-1:0] s1_bf_valid, s1_bf_sop;
+    assign s1_in_re = (log2point == 4'd2) ? x_re : s2_out_re;
+    assign s1_in_im = (log2point == 4'd2) ? x_im : s2_out_im;
+    assign s1_in_valid = (log2point == 4'd2) ? stb : s2_out_valid;
+    assign s1_in_sop = (log2point == 4'd2) ? sop_in : s2_out_sop;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : bf1_lane
+            r22_bf #(.K(1), .ROT(0), .CW(CW), .LB(LB), .LANE(j)) bf_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s1_in_re[16*j +: 16]), .x_im(s1_in_im[16*j +: 16]),
+                .in_valid(s1_in_valid), .in_sop(s1_in_sop),
+                .y_re(s1_bf_re[16*j +: 16]), .y_im(s1_bf_im[16*j +: 16]),
+                .out_valid(s1_bf_valid[j]), .out_sop(s1_bf_sop[j])
+            );
+        end
+    endgenerate
+    wire [31:0] s1_out_re = s1_bf_re;
+    wire [31:0] s1_out_im = s1_bf_im;
+    wire        s1_out_valid = s1_bf_valid[0];
+    wire        s1_out_sop   = s1_bf_sop[0];
+
+    // ==============================
+    // Stage 0: BF2II, lane pairs (j, j + 1), no memory
+    // ==============================
+    wire [31:0] s0_in_re = s1_out_re;
+    wire [31:0] s0_in_im = s1_out_im;
+    wire [31:0] s0_out_re, s0_out_im;
+    wire [LANES/2-1:0] s0_xbf_valid, s0_xbf_sop;
+
+    generate
+        for (j = 0; j < LANES / 2; j = j + 1) begin : xbf0_pair
+            localparam A = ((j >> 0) << 1) | (j & 0);   // lane with n[0] = 0
+            localparam B = A + 1;
+            r22_xbf #(.K(0), .ROT(1), .CW(CW), .LB(LB), .LANE(B)) xbf_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x0_re(s0_in_re[16*A +: 16]), .x0_im(s0_in_im[16*A +: 16]),
+                .x1_re(s0_in_re[16*B +: 16]), .x1_im(s0_in_im[16*B +: 16]),
+                .in_valid(s1_out_valid), .in_sop(s1_out_sop),
+                .y0_re(s0_out_re[16*A +: 16]), .y0_im(s0_out_im[16*A +: 16]),
+                .y1_re(s0_out_re[16*B +: 16]), .y1_im(s0_out_im[16*B +: 16]),
+                .out_valid(s0_xbf_valid[j]), .out_sop(s0_xbf_sop[j])
+            );
+        end
+    endgenerate
+
+    wire s0_out_valid = s0_xbf_valid[0];
+    wire s0_out_sop   = s0_xbf_sop[0];
+
+    // ==============================
+    // Output Reordering (bit-reversed -> natural)
+    // ==============================
+    wire reorder_valid;
+    reg  reorder_valid_d;
+
+    r22_reorder #(.DATA_WIDTH(16), .MAX_N(MAX_N), .LANES(LANES)) reorder_u (
+        .clk(clk),
+        .rst_n(rst_n),
+        .in_re     (s0_out_re),
+        .in_im     (s0_out_im),
+        .in_valid  (s0_out_valid),
+        .np        (np),
+        .out_re    (y_re),
+        .out_im    (y_im),
+        .out_valid (reorder_valid)
+    );
+
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            reorder_valid_d <= 1'b0;
+        end else begin
+            reorder_valid_d <= reorder_valid;
+        end
+    end
+
+    assign valid_out = reorder_valid;
+    assign sop_out   = reorder_valid & ~reorder_valid_d;
+
+endmodule
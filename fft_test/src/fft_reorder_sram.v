@@ -53,4 +53,91 @@ always @(posedge clk) begin
     // else: hold previous value — no 'x', safe for synthesis
 end
 
-endmodule
\ No newline at end of file
+endmodule
+
+// =============================================================================
+// Module: fft_reorder_sram_banked
+// Description: LANES single-port fft_reorder_sram banks behind a lane crossbar,
+//              so a LANES-sample-per-cycle pipeline can write LANES bit-reversed
+//              addresses and read LANES natural-order addresses every cycle.
+// =============================================================================
+// Bank mapping for logical address a of an N = 2^log2n point frame (LB = log2(LANES)):
+//   bank   = (a ^ (a >> (log2n - LB))) mod LANES
+//   offset = a >> LB
+// The LANES addresses rev(t*LANES + j) written in one cycle differ in their top
+// LB bits, the LANES addresses t*LANES + j read in one cycle differ in their low
+// LB bits; XOR-ing both fields puts either set in LANES distinct banks for every
+// N >= 8. Addresses presented together must come from one of these two patterns.
+// LANES = 1 is a single ADDR_WIDTH-deep fft_reorder_sram.
+// Interface: as fft_reorder_sram, with lane j on addr/din/dout[j*WIDTH +: WIDTH]
+// =============================================================================
+
+module fft_reorder_sram_banked #(
+    parameter LANES      = 1,   // Samples per cycle (1, 2, 4)
+    parameter ADDR_WIDTH = 11,  // Logical address width; total depth = 2^ADDR_WIDTH words
+    parameter DATA_WIDTH = 32   // Data width per word in bits
+) (
+    input                             clk,
+    input                             ce,
+    input                             we,
+    input      [3:0]                  log2n,  // log2 of the frame length (bank mapping)
+    input      [LANES*ADDR_WIDTH-1:0] addr,
+    input      [LANES*DATA_WIDTH-1:0] din,
+    output     [LANES*DATA_WIDTH-1:0] dout
+);
+
+localparam LB = $clog2(LANES);
+localparam BW = (LB > 0) ? LB : 1;        // bank index width
+localparam OW = ADDR_WIDTH - LB;          // per-bank address width
+
+// Lane -> (bank, offset)
+reg [BW-1:0] lane_bank   [0:LANES-1];
+reg [BW-1:0] lane_bank_d [0:LANES-1];     // aligned with the registered bank outputs
+
+// Bank inputs, routed from the lane that maps to each bank
+reg [OW-1:0]         bank_addr [0:LANES-1];
+reg [DATA_WIDTH-1:0] bank_din  [0:LANES-1];
+wire [DATA_WIDTH-1:0] bank_dout [0:LANES-1];
+
+integer j, b;
+always @(*) begin
+    for (j = 0; j < LANES; j = j + 1) begin
+        lane_bank[j] = (addr[j*ADDR_WIDTH +: ADDR_WIDTH]
+                        ^ (addr[j*ADDR_WIDTH +: ADDR_WIDTH] >> (log2n - LB))) % LANES;
+    end
+    for (b = 0; b < LANES; b = b + 1) begin
+        bank_addr[b] = {OW{1'b0}};
+        bank_din[b]  = {DATA_WIDTH{1'b0}};
+        for (j = 0; j < LANES; j = j + 1) begin
+            if (lane_bank[j] == b) begin
+                bank_addr[b] = addr[j*ADDR_WIDTH +: ADDR_WIDTH] >> LB;
+                bank_din[b]  = din[j*DATA_WIDTH +: DATA_WIDTH];
+            end
+        end
+    end
+end
+
+always @(posedge clk) begin
+    for (j = 0; j < LANES; j = j + 1) begin
+        if (ce && !we) begin
+            lane_bank_d[j] <= lane_bank[j];
+        end
+    end
+end
+
+genvar g;
+generate
+    for (g = 0; g < LANES; g = g + 1) begin : bank_gen
+        fft_reorder_sram #(.ADDR_WIDTH(OW), .DATA_WIDTH(DATA_WIDTH)) bank_u (
+            .clk (clk),
+            .ce  (ce),
+            .we  (we),
+            .addr(bank_addr[g]),
+            .din (bank_din[g]),
+            .dout(bank_dout[g])
+        );
+        assign dout[g*DATA_WIDTH +: DATA_WIDTH] = bank_dout[lane_bank_d[g]];
+    end
+endgenerate
+
+endmodule
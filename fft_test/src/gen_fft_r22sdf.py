@@ -0,0 +1,572 @@
+# gen_fft_r22sdf.py
+# Generates fft_r22sdf.v: a radix-2^2 single-path delay feedback (R2^2SDF) variant of fft_multipoint
+# with the same ports (np, stb/sop_in, Q15 x/y, valid_out/sop_out), built from shiftreg,
+# complex_add/sub/mult, twiddle_rom and r22_reorder (reorder.v with the fixes these cores need;
+# fft_multipoint keeps the original reorder.v).
+#
+# Stage k (FIFO depth 2^k, k = log2(MAX_N)-1 .. 0) is an SDF butterfly. Stages alternate BF2I (odd k)
+# and BF2II (even k); BF2II applies the trivial -j rotation on the last quarter of each 4*2^k block,
+# and only BF2II stages with k >= 2 are followed by a complex multiplier, so the pipeline needs
+# ceil((log2(MAX_N)-2)/2) multipliers instead of log2(MAX_N)-1. Smaller FFTs enter at stage log2(N)-1.
+# Each stage registers its output; (valid, sop) travel alongside the data so every stage derives its
+# control from its own sample index. fft_model.fft_r22 is the matching golden model.
+#
+# --lanes L (2 or 4) generates fft_r22sdf_x{L}.v, a multi-path (MDC-style) version taking L samples per
+# cycle: lane j carries stream positions t*L + j. Stages k >= log2(L) pair samples of the same lane and
+# are L parallel SDF butterflies with FIFO depth 2^(k - log2(L)); the last log2(L) stages pair lanes in
+# the same cycle and need no memory. Every stage computes exactly what the single-lane pipeline does,
+# so fft_model.fft_r22 is the golden model for every lane count. r22_reorder takes LANES samples per cycle
+# through fft_reorder_sram_banked.
+import argparse
+import os
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LANES = [1, 2, 4]
+
+HEADER = """\
+// Author: generated by gen_fft_r22sdf.py (MAX_N = {max_n}, LANES = {lanes}) -- edit the generator, not this file
+// Description: Radix-2^2 SDF Multi-Point FFT (FFT-only)
+//              Supports FFT sizes: 8, 16, ..., {max_n}
+//              Same interface as fft_multipoint with {lanes} complex Q15 sample(s) per cycle
+//              (lane j on bits [16*j +: 16], stream position t*{lanes} + j),
+//              output in natural order through r22_reorder.
+//              {n_mult} complex multipliers ({n_stage} butterfly stages), trivial -j rotations in BF2II.
+
+"""
+
+BF = """\
+// SDF butterfly stage K of lane LANE: FIFO depth 2^(K-LB), registered output, latency 2^(K-LB) + 1
+module r22_bf #(
+    parameter K    = 0,   // stage index
+    parameter ROT  = 0,   // 1: BF2II, multiply the last quarter of each 4*2^K block by -j
+    parameter CW   = 12,  // sample index width
+    parameter LB   = 0,   // log2(lanes)
+    parameter LANE = 0    // lane index
+) (
+    input               clk,
+    input               rst_n,
+    input      [CW-1:0] mask,      // point / lanes - 1
+    input      [15:0]   x_re,
+    input      [15:0]   x_im,
+    input               in_valid,
+    input               in_sop,
+    output reg [15:0]   y_re,
+    output reg [15:0]   y_im,
+    output              out_valid,
+    output              out_sop
+);
+
+    // Cycle index within the frame, restarted by sop; n is the stream position of this lane's sample
+    reg  [CW-1:0] cnt;
+    wire [CW-1:0] idx = in_sop ? {{CW{{1'b0}}}} : cnt;
+    wire [CW-1:0] n   = (idx << LB) | LANE;
+
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            cnt <= {{CW{{1'b0}}}};
+        end else begin
+            cnt <= (idx + 1'b1) & mask;
+        end
+    end
+
+    wire ctrl = n[K];                           // 0: fill FIFO, 1: butterfly
+    wire rot  = (ROT != 0) && n[K+1] && n[K];
+
+    // -j rotation: (re, im) -> (im, -re), -(-32768) saturates to 32767
+    wire [15:0] neg_re = (x_re == 16'h8000) ? 16'h7fff : (~x_re + 1'b1);
+    wire [15:0] b_re   = rot ? x_im   : x_re;
+    wire [15:0] b_im   = rot ? neg_re : x_im;
+
+    wire [15:0] a_re, a_im, sum_re, sum_im, dif_re, dif_im;
+
+    complex_add add_u (
+        .x0_re(a_re), .x0_im(a_im), .x1_re(b_re), .x1_im(b_im),
+        .res_re(sum_re), .res_im(sum_im)
+    );
+
+    complex_sub sub_u (
+        .x0_re(a_re), .x0_im(a_im), .x1_re(b_re), .x1_im(b_im),
+        .res_re(dif_re), .res_im(dif_im)
+    );
+
+    // Feedback FIFO: holds the first half of a block, then the differences
+    shiftreg #(.WIDTH(32), .DEPTH(1 << (K - LB))) fifo_u (
+        .clk(clk), .rst_n(rst_n),
+        .d_in (ctrl ? {{dif_re, dif_im}} : {{b_re, b_im}}),
+        .d_out({{a_re, a_im}})
+    );
+
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            y_re <= 16'd0;
+            y_im <= 16'd0;
+        end else if (ctrl) begin
+            y_re <= sum_re;
+            y_im <= sum_im;
+        end else begin
+            y_re <= a_re;
+            y_im <= a_im;
+        end
+    end
+
+    shiftreg #(.WIDTH(2), .DEPTH((1 << (K - LB)) + 1)) side_u (
+        .clk(clk), .rst_n(rst_n), .d_in({{in_valid, in_sop}}), .d_out({{out_valid, out_sop}})
+    );
+
+endmodule
+
+"""
+
+XBF = """\
+// Lane-crossing butterfly for stage K < LB: x0 = lane with n[K] = 0, x1 = lane LANE (n[K] = 1)
+// in the same cycle; no memory, registered output, latency 1
+module r22_xbf #(
+    parameter K    = 0,
+    parameter ROT  = 0,
+    parameter CW   = 12,
+    parameter LB   = 1,
+    parameter LANE = 1
+) (
+    input               clk,
+    input               rst_n,
+    input      [CW-1:0] mask,
+    input      [15:0]   x0_re,
+    input      [15:0]   x0_im,
+    input      [15:0]   x1_re,
+    input      [15:0]   x1_im,
+    input               in_valid,
+    input               in_sop,
+    output reg [15:0]   y0_re,
+    output reg [15:0]   y0_im,
+    output reg [15:0]   y1_re,
+    output reg [15:0]   y1_im,
+    output              out_valid,
+    output              out_sop
+);
+
+    reg  [CW-1:0] cnt;
+    wire [CW-1:0] idx = in_sop ? {{CW{{1'b0}}}} : cnt;
+    wire [CW-1:0] n   = (idx << LB) | LANE;
+
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            cnt <= {{CW{{1'b0}}}};
+        end else begin
+            cnt <= (idx + 1'b1) & mask;
+        end
+    end
+
+    wire rot = (ROT != 0) && n[K+1];
+
+    wire [15:0] neg_re = (x1_re == 16'h8000) ? 16'h7fff : (~x1_re + 1'b1);
+    wire [15:0] b_re   = rot ? x1_im  : x1_re;
+    wire [15:0] b_im   = rot ? neg_re : x1_im;
+
+    wire [15:0] sum_re, sum_im, dif_re, dif_im;
+
+    complex_add add_u (
+        .x0_re(x0_re), .x0_im(x0_im), .x1_re(b_re), .x1_im(b_im),
+        .res_re(sum_re), .res_im(sum_im)
+    );
+
+    complex_sub sub_u (
+        .x0_re(x0_re), .x0_im(x0_im), .x1_re(b_re), .x1_im(b_im),
+        .res_re(dif_re), .res_im(dif_im)
+    );
+
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            y0_re <= 16'd0;
+            y0_im <= 16'd0;
+            y1_re <= 16'd0;
+            y1_im <= 16'd0;
+        end else begin
+            y0_re <= sum_re;
+            y0_im <= sum_im;
+            y1_re <= dif_re;
+            y1_im <= dif_im;
+        end
+    end
+
+    shiftreg #(.WIDTH(2), .DEPTH(1)) side_u (
+        .clk(clk), .rst_n(rst_n), .d_in({{in_valid, in_sop}}), .d_out({{out_valid, out_sop}})
+    );
+
+endmodule
+
+"""
+
+TW = """\
+// Twiddle stage after BF2II stage K: W_(2^(K+2))^(m*e), m = n[K-1:0], e = bit-reversed n[K+1:K]
+// Exponent scaled to the 2048-point ROM: z = (m*e << ZSHL) >> ZSHR; z = 0 bypasses the multiplier.
+// Latency 2 (synchronous ROM read, registered product).
+module r22_tw #(
+    parameter K    = 2,
+    parameter ZSHL = 7,
+    parameter ZSHR = 0,
+    parameter CW   = 12,
+    parameter LB   = 0,
+    parameter LANE = 0
+) (
+    input               clk,
+    input               rst_n,
+    input      [CW-1:0] mask,
+    input      [15:0]   x_re,
+    input      [15:0]   x_im,
+    input               in_valid,
+    input               in_sop,
+    output reg [15:0]   y_re,
+    output reg [15:0]   y_im,
+    output              out_valid,
+    output              out_sop
+);
+
+    reg  [CW-1:0] cnt;
+    wire [CW-1:0] idx = in_sop ? {{CW{{1'b0}}}} : cnt;
+    wire [CW-1:0] n   = (idx << LB) | LANE;
+
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            cnt <= {{CW{{1'b0}}}};
+        end else begin
+            cnt <= (idx + 1'b1) & mask;
+        end
+    end
+
+    wire [1:0]  e  = {{n[K], n[K+1]}};
+    wire [11:0] me = n[K-1:0] * e;
+    wire [11:0] z  = (me << ZSHL) >> ZSHR;    // angle in units of 2*pi/2048
+
+    wire [15:0] w_re, w_im;
+    twiddle_rom #(.MAX_N(2048)) tw_rom_u (
+        .clk(clk),
+        .addr({{1'b0, z[9:0]}}),
+        .data_re(w_re),
+        .data_im(w_im)
+    );
+
+    // Align data with the ROM output
+    reg [15:0] xd_re, xd_im;
+    reg        neg_d, trivial_d;
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            xd_re     <= 16'd0;
+            xd_im     <= 16'd0;
+            neg_d     <= 1'b0;
+            trivial_d <= 1'b1;
+        end else begin
+            xd_re     <= x_re;
+            xd_im     <= x_im;
+            neg_d     <= z[10];                 // past a half turn: W = -ROM[z - 1024]
+            trivial_d <= (z == 12'd0);
+        end
+    end
+
+    // ROM values are within +-32767, so plain negation cannot overflow
+    wire [15:0] wn_re = neg_d ? (~w_re + 1'b1) : w_re;
+    wire [15:0] wn_im = neg_d ? (~w_im + 1'b1) : w_im;
+    wire [15:0] p_re, p_im;
+
+    complex_mult mul_u (
+        .x0_re(xd_re), .x0_im(xd_im), .x1_re(wn_re), .x1_im(wn_im),
+        .res_re(p_re), .res_im(p_im)
+    );
+
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            y_re <= 16'd0;
+            y_im <= 16'd0;
+        end else begin
+            y_re <= trivial_d ? xd_re : p_re;
+            y_im <= trivial_d ? xd_im : p_im;
+        end
+    end
+
+    shiftreg #(.WIDTH(2), .DEPTH(2)) side_u (
+        .clk(clk), .rst_n(rst_n), .d_in({{in_valid, in_sop}}), .d_out({{out_valid, out_sop}})
+    );
+
+endmodule
+
+"""
+
+TOP_HEAD = """\
+module {name} (
+    input             clk,
+    input             rst_n,
+    input       [3:0] np,        // FFT size: 0->8, 1->16, ..., {np_max}->{max_n}
+    input             stb,       // Input data valid
+    input             sop_in,    // Start-of-packet (first valid input)
+    input      [{w}:0] x_re,      // Input real part (Q15)
+    input      [{w}:0] x_im,      // Input imaginary part (Q15)
+
+    output            valid_out, // Output data valid
+    output            sop_out,   // Start-of-packet for output
+    output     [{w}:0] y_re,      // Output real part
+    output     [{w}:0] y_im       // Output imaginary part
+);
+
+    localparam MAX_N = {max_n};
+    localparam CW    = {cw};
+    localparam LANES = {lanes};
+    localparam LB    = {lb};
+
+    // ==============================
+    // Decode FFT Size
+    // ==============================
+    reg  [CW-1:0] point;
+    reg  [3:0]    log2point;
+
+    always @(*) begin
+        case(np)
+{cases}
+            default: begin point = {cw}'d8; log2point = 4'd3; end
+        endcase
+    end
+
+    wire [CW-1:0] mask = (point >> LB) - 1'b1;   // cycles per frame - 1
+
+    genvar j;
+
+"""
+
+STAGE = """\
+    // ==============================
+    // Stage {k}: {kind}, FIFO depth {depth}{tw_note}
+    // ==============================
+    wire [{w}:0] s{k}_in_re, s{k}_in_im, s{k}_bf_re, s{k}_bf_im;
+    wire        s{k}_in_valid, s{k}_in_sop;
+    wire [LANES-1:0] s{k}_bf_valid, s{k}_bf_sop;
+{input}
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : bf{k}_lane
+            r22_bf #(.K({k}), .ROT({rot}), .CW(CW), .LB(LB), .LANE(j)) bf_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s{k}_in_re[16*j +: 16]), .x_im(s{k}_in_im[16*j +: 16]),
+                .in_valid(s{k}_in_valid), .in_sop(s{k}_in_sop),
+                .y_re(s{k}_bf_re[16*j +: 16]), .y_im(s{k}_bf_im[16*j +: 16]),
+                .out_valid(s{k}_bf_valid[j]), .out_sop(s{k}_bf_sop[j])
+            );
+        end
+    endgenerate
+{twiddle}
+"""
+
+XSTAGE = """\
+    // ==============================
+    // Stage {k}: {kind}, lane pairs (j, j + {dist}), no memory
+    // ==============================
+    wire [{w}:0] s{k}_in_re = s{prev}_out_re;
+    wire [{w}:0] s{k}_in_im = s{prev}_out_im;
+    wire [{w}:0] s{k}_out_re, s{k}_out_im;
+    wire [LANES/2-1:0] s{k}_xbf_valid, s{k}_xbf_sop;
+
+    generate
+        for (j = 0; j < LANES / 2; j = j + 1) begin : xbf{k}_pair
+            localparam A = ((j >> {k}) << {k1}) | (j & {low});   // lane with n[{k}] = 0
+            localparam B = A + {dist};
+            r22_xbf #(.K({k}), .ROT({rot}), .CW(CW), .LB(LB), .LANE(B)) xbf_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x0_re(s{k}_in_re[16*A +: 16]), .x0_im(s{k}_in_im[16*A +: 16]),
+                .x1_re(s{k}_in_re[16*B +: 16]), .x1_im(s{k}_in_im[16*B +: 16]),
+                .in_valid(s{prev}_out_valid), .in_sop(s{prev}_out_sop),
+                .y0_re(s{k}_out_re[16*A +: 16]), .y0_im(s{k}_out_im[16*A +: 16]),
+                .y1_re(s{k}_out_re[16*B +: 16]), .y1_im(s{k}_out_im[16*B +: 16]),
+                .out_valid(s{k}_xbf_valid[j]), .out_sop(s{k}_xbf_sop[j])
+            );
+        end
+    endgenerate
+
+    wire s{k}_out_valid = s{k}_xbf_valid[0];
+    wire s{k}_out_sop   = s{k}_xbf_sop[0];
+
+"""
+
+TW_INST = """\
+    wire [{w}:0] s{k}_out_re, s{k}_out_im;
+    wire [LANES-1:0] s{k}_tw_valid, s{k}_tw_sop;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : tw{k}_lane
+            r22_tw #(.K({k}), .ZSHL({zshl}), .ZSHR({zshr}), .CW(CW), .LB(LB), .LANE(j)) tw_u (
+                .clk(clk), .rst_n(rst_n), .mask(mask),
+                .x_re(s{k}_bf_re[16*j +: 16]), .x_im(s{k}_bf_im[16*j +: 16]),
+                .in_valid(s{k}_bf_valid[0]), .in_sop(s{k}_bf_sop[0]),
+                .y_re(s{k}_out_re[16*j +: 16]), .y_im(s{k}_out_im[16*j +: 16]),
+                .out_valid(s{k}_tw_valid[j]), .out_sop(s{k}_tw_sop[j])
+            );
+        end
+    endgenerate
+
+    wire s{k}_out_valid = s{k}_tw_valid[0];
+    wire s{k}_out_sop   = s{k}_tw_sop[0];
+"""
+
+NO_TW = """\
+    wire [{w}:0] s{k}_out_re = s{k}_bf_re;
+    wire [{w}:0] s{k}_out_im = s{k}_bf_im;
+    wire        s{k}_out_valid = s{k}_bf_valid[0];
+    wire        s{k}_out_sop   = s{k}_bf_sop[0];
+"""
+
+TOP_TAIL = """\
+    // ==============================
+    // Output Reordering (bit-reversed -> natural)
+    // ==============================
+    wire reorder_valid;
+    reg  reorder_valid_d;
+
+    r22_reorder #(.DATA_WIDTH(16), .MAX_N(MAX_N), .LANES(LANES)) reorder_u (
+        .clk(clk),
+        .rst_n(rst_n),
+        .in_re     (s0_out_re),
+        .in_im     (s0_out_im),
+        .in_valid  (s0_out_valid),
+        .np        (np),
+        .out_re    (y_re),
+        .out_im    (y_im),
+        .out_valid (reorder_valid)
+    );
+
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            reorder_valid_d <= 1'b0;
+        end else begin
+            reorder_valid_d <= reorder_valid;
+        end
+    end
+
+    assign valid_out = reorder_valid;
+    assign sop_out   = reorder_valid & ~reorder_valid_d;
+
+endmodule
+"""
+
+FILELIST = ['shiftreg.v', 'complex_arithmetic_param.v', 'twiddle_rom.v', 'reverse_bits.v', 'fft_reorder_sram.v',
+            'r22_reorder.v']
+
+
+def has_twiddle(k):
+    """BF2II stages (even k) with k >= 2 are followed by a multiplier"""
+    return k % 2 == 0 and k >= 2
+
+
+def zshift(k, rom_bits=11):
+    """(ZSHL, ZSHR) scaling m*e (units of 2*pi/2^(k+2)) to the 2048-point ROM"""
+    d = rom_bits - (k + 2)
+    return (d, 0) if d >= 0 else (0, -d)
+
+
+def module_name(lanes=1):
+    return 'fft_r22sdf' if lanes == 1 else f'fft_r22sdf_x{lanes}'
+
+
+def resources(max_n=2048, lanes=1):
+    """
+    Datapath cost of the generated pipeline
+
+    returns {'lanes', 'samples_per_cycle', 'multipliers', 'butterflies', 'fifo_words', 'reorder_words',
+             'rom_words', 'memory_bits'}; a word is one complex Q15 sample (32 bits)
+    """
+    stages = max_n.bit_length() - 1
+    lb = lanes.bit_length() - 1
+    tw = sum(has_twiddle(k) for k in range(stages))
+    fifo = sum(lanes << (k - lb) for k in range(lb, stages))
+    rom = tw * lanes * 1024                 # one 1024-entry twiddle_rom per twiddle stage and lane
+    return {
+        'lanes': lanes,
+        'samples_per_cycle': lanes,
+        'multipliers': tw * lanes,
+        'butterflies': (stages - lb) * lanes + lb * lanes // 2,
+        'fifo_words': fifo,
+        'reorder_words': max_n,
+        'rom_words': rom,
+        'memory_bits': 32 * (fifo + max_n + rom),
+    }
+
+
+def generate(max_n=2048, lanes=1):
+    """Return the Verilog source of fft_r22sdf (or fft_r22sdf_x{lanes}) for sizes 8 .. max_n"""
+    stages = max_n.bit_length() - 1
+    if max_n & (max_n - 1) or not 8 <= max_n <= 2048:
+        raise ValueError('max_n must be a power of two between 8 and 2048')
+    if lanes not in LANES:
+        raise ValueError(f'lanes must be one of {LANES}')
+    lb = lanes.bit_length() - 1
+    cw = stages + 1
+    w = 16 * lanes - 1
+    n_mult = resources(max_n, lanes)['multipliers']
+    parts = [HEADER.format(max_n=max_n, lanes=lanes, n_mult=n_mult, n_stage=stages), BF]
+    if lb:
+        parts.append(XBF)
+    parts.append(TW)
+    cases = '\n'.join(f"            4'd{n - 3}:  begin point = {cw}'d{1 << n}; log2point = 4'd{n}; end"
+                      for n in range(3, stages + 1))
+    parts.append(TOP_HEAD.format(name=module_name(lanes), max_n=max_n, cw=cw, lanes=lanes, lb=lb, w=w,
+                                 np_max=stages - 3, cases=cases))
+    for k in range(stages - 1, -1, -1):
+        kind = 'BF2II' if k % 2 == 0 else 'BF2I'
+        if k < lb:
+            # smallest FFT (8 points, log2 = 3) still enters above the lane-crossing stages
+            parts.append(XSTAGE.format(k=k, kind=kind, prev=k + 1, w=w, dist=1 << k, k1=k + 1,
+                                       low=(1 << k) - 1, rot=int(k % 2 == 0)))
+            continue
+        src = ['x_re', 'x_im', 'stb', 'sop_in']
+        if k == stages - 1:
+            sel = [f'    assign s{k}_in_{p} = {s};\n' for p, s in zip(['re', 'im', 'valid', 'sop'], src)]
+        else:
+            # sizes with log2(N) = k+1 enter here, larger ones come from the stage above
+            sel = [f"    assign s{k}_in_{p} = (log2point == 4'd{k + 1}) ? {s} : s{k + 1}_out_{p};\n"
+                   for p, s in zip(['re', 'im', 'valid', 'sop'], src)]
+        if has_twiddle(k):
+            zshl, zshr = zshift(k)
+            twiddle = TW_INST.format(k=k, zshl=zshl, zshr=zshr, w=w)
+        else:
+            twiddle = NO_TW.format(k=k, w=w)
+        parts.append(STAGE.format(k=k, kind=kind, depth=1 << (k - lb), w=w,
+                                  tw_note=' + twiddle' if has_twiddle(k) else '',
+                                  input=''.join(sel), rot=int(k % 2 == 0), twiddle=twiddle))
+    parts.append(TOP_TAIL)
+    return ''.join(parts)
+
+
+def write_filelist(filename, lanes=1):
+    """VCS file list in the style of ../sim/fft_multipoint.f, selecting the generated core as the tb's DUT"""
+    with open(filename, 'w') as file:
+        file.write(f'+define+FFT_TOP={module_name(lanes)}\n')
+        if lanes > 1:
+            file.write(f'+define+FFT_LANES={lanes}\n')
+        file.write(''.join(f'./../src/{name}\n' for name in FILELIST + [module_name(lanes) + '.v']))
+        file.write('./../tb/fft_multipoint_tb.v\n')
+
+
+def print_report(max_n=2048):
+    rows = [resources(max_n, lanes) for lanes in LANES]
+    print(f"{'lanes':>5} {'samples/cyc':>11} {'mult':>4} {'bfly':>4} {'fifo':>6} {'reorder':>7} {'rom':>6} "
+          f"{'memory(kbit)':>12}")
+    for r in rows:
+        print(f"{r['lanes']:5d} {r['samples_per_cycle']:11d} {r['multipliers']:4d} {r['butterflies']:4d} "
+              f"{r['fifo_words']:6d} {r['reorder_words']:7d} {r['rom_words']:6d} {r['memory_bits'] / 1024:12.1f}")
+
+
+# main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate the radix-2^2 SDF FFT pipeline')
+    parser.add_argument('--max-n', type=int, default=2048, help='largest supported FFT size')
+    parser.add_argument('--lanes', type=int, choices=LANES, default=1, help='samples per cycle')
+    parser.add_argument('-o', '--output', help='default: fft_r22sdf.v / fft_r22sdf_x{lanes}.v next to this script')
+    parser.add_argument('--filelist', help='default: ../sim/<module>.f')
+    parser.add_argument('--report', action='store_true', help='print the cost of every lane count and exit')
+    args = parser.parse_args()
+
+    if args.report:
+        print_report(args.max_n)
+        raise SystemExit(0)
+    name = module_name(args.lanes)
+    output = args.output or os.path.join(HERE, name + '.v')
+    with open(output, 'w') as file:
+        file.write(generate(args.max_n, args.lanes))
+    write_filelist(args.filelist or os.path.join(HERE, '..', 'sim', name + '.f'), args.lanes)
+    r = resources(args.max_n, args.lanes)
+    print(f"{output}: {r['samples_per_cycle']} samples/cycle, {r['multipliers']} multipliers, "
+          f"{r['memory_bits'] / 1024:.1f} kbit memory")
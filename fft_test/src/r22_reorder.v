@@ -0,0 +1,163 @@
+// Author: LR
+// Create Date: 2025/4/5
+// Description: Bit-Reversal Reordering Unit for the radix-2^2 SDF cores (gen_fft_r22sdf.py)
+//              Converts FFT output from bit-reversed order to natural (linear) order.
+//              Supports 8 to 2048 points and back-to-back frames. Derived from reorder.v (which
+//              fft_multipoint keeps using unchanged) with these fixes:
+//                - write address = 11-bit reversed position >> (11 - log2point), not masked with point - 1
+//                - point/read_counter are 12 bits wide, so 2048 no longer wraps to 0
+//                - write_done has a single driver
+//              Input: LANES complex samples per cycle during in_valid
+//                     (stream positions t*LANES + j, lane j on bits [j*DATA_WIDTH +: DATA_WIDTH]).
+//              Output: LANES complex samples per cycle in natural order during out_valid.
+//              Storage: fft_reorder_sram_banked, one single-port bank per lane.
+
+module r22_reorder #(
+    parameter DATA_WIDTH = 16,   // Data width of real/imaginary parts
+    parameter MAX_N      = 2048, // Maximum FFT size (must be power of 2)
+    parameter LANES      = 1     // Samples per cycle (1, 2, 4)
+) (
+    input                   clk,
+    input                   rst_n,
+
+    // Input from FFT pipeline (bit-reversed order)
+    input      [LANES*DATA_WIDTH-1:0] in_re,
+    input      [LANES*DATA_WIDTH-1:0] in_im,
+    input                   in_valid,
+
+    // FFT size selector (aligned with fft_multipoint)
+    input            [3:0] np,  // 0→8, 1→16, 2→32, 3→64, 4→128,
+                               // 5→256, 6→512, 7→1024, 8→2048
+
+    // Output in natural order
+    output     [LANES*DATA_WIDTH-1:0] out_re,
+    output     [LANES*DATA_WIDTH-1:0] out_im,
+    output reg              out_valid
+);
+
+    localparam LB = $clog2(LANES);
+
+    // ====================================================================
+    // Step 1: Decode FFT size based on np
+    // ====================================================================
+    reg  [11:0] point;          // Actual FFT length (8 to 2048), 12 bits so that 2048 fits
+    reg  [3:0]  log2point;      // log2(point), ranges from 3 to 11
+
+    always @(*) begin
+        case(np)
+            4'd0:  begin point = 12'd8;    log2point = 4'd3;  end
+            4'd1:  begin point = 12'd16;   log2point = 4'd4;  end
+            4'd2:  begin point = 12'd32;   log2point = 4'd5;  end
+            4'd3:  begin point = 12'd64;   log2point = 4'd6;  end
+            4'd4:  begin point = 12'd128;  log2point = 4'd7;  end
+            4'd5:  begin point = 12'd256;  log2point = 4'd8;  end
+            4'd6:  begin point = 12'd512;  log2point = 4'd9;  end
+            4'd7:  begin point = 12'd1024; log2point = 4'd10; end
+            4'd8:  begin point = 12'd2048; log2point = 4'd11; end
+            default: begin point = 12'd8;  log2point = 4'd3;  end // safe fallback
+        endcase
+    end
+
+    // ====================================================================
+    // Step 2: Write Phase — Store data at bit-reversed addresses
+    // ====================================================================
+    wire [11:0] cycles = point >> LB;   // Cycles per frame
+    reg  [10:0] write_counter;          // Counts 0 to cycles-1
+    reg  [11:0] read_counter;           // Counts 0 to cycles during the read phase
+    reg         write_done;             // High when all inputs are written
+
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            write_counter <= 11'd0;
+            write_done    <= 1'b0;
+        end else if (in_valid && !write_done) begin
+            if (write_counter == cycles - 1) begin
+                write_counter <= 11'd0;
+                write_done    <= 1'b1;  // Write phase complete
+            end else begin
+                write_counter <= write_counter + 1'b1;
+            end
+        end else if (write_done && read_counter == cycles) begin
+            write_done    <= 1'b0;  // Read phase complete: allow next write phase
+        end
+    end
+
+    wire writing = in_valid && !write_done;
+    wire reading = write_done && (read_counter < cycles);
+
+    // Per-lane addresses: bit-reversed stream position when writing, natural order when reading
+    wire [LANES*11-1:0] lane_addr;
+
+    genvar j;
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : lane_addr_gen
+            // Generate full-width (11-bit) bit-reversed address of stream position t*LANES + j
+            wire [10:0] position = (write_counter << LB) | j;
+            wire [10:0] full_rev_addr;
+            reverse_bits #(.WIDTH(11)) u_reverse (
+                .in (position),
+                .out(full_rev_addr)
+            );
+
+            // Reversing 11 bits moves the log2point significant bits to the top:
+            // effective address = reverse of position[log2point-1:0] = full_rev_addr >> (11 - log2point)
+            wire [10:0] write_addr = full_rev_addr >> (4'd11 - log2point);
+            wire [10:0] read_addr  = (read_counter << LB) | j;
+
+            assign lane_addr[j*11 +: 11] = writing ? write_addr : read_addr;
+        end
+    endgenerate
+
+    // ====================================================================
+    // Step 3: Memory Storage (LANES single-port banks, {re, im} per word)
+    // ====================================================================
+    // Memory depth = MAX_N in total, supports up to 2048 points
+    wire [LANES*2*DATA_WIDTH-1:0] mem_din, mem_dout;
+
+    generate
+        for (j = 0; j < LANES; j = j + 1) begin : lane_data_gen
+            assign mem_din[j*2*DATA_WIDTH +: 2*DATA_WIDTH] = {in_re[j*DATA_WIDTH +: DATA_WIDTH],
+                                                              in_im[j*DATA_WIDTH +: DATA_WIDTH]};
+            assign out_re[j*DATA_WIDTH +: DATA_WIDTH] = mem_dout[j*2*DATA_WIDTH+DATA_WIDTH +: DATA_WIDTH];
+            assign out_im[j*DATA_WIDTH +: DATA_WIDTH] = mem_dout[j*2*DATA_WIDTH +: DATA_WIDTH];
+        end
+    endgenerate
+
+    fft_reorder_sram_banked #(
+        .LANES     (LANES),
+        .ADDR_WIDTH($clog2(MAX_N)),
+        .DATA_WIDTH(2*DATA_WIDTH)
+    ) mem_u (
+        .clk  (clk),
+        .ce   (writing || reading),
+        .we   (writing),
+        .log2n(log2point),
+        .addr (lane_addr),
+        .din  (mem_din),
+        .dout (mem_dout)
+    );
+
+    // ====================================================================
+    // Step 4: Read Phase — Output in natural (linear) order
+    // ====================================================================
+    // Registered SRAM output: out_re/out_im follow the read address by one cycle, as out_valid does
+    always @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            read_counter <= 12'd0;
+            out_valid    <= 1'b0;
+        end else if (write_done) begin
+            // Read N samples sequentially from address 0 to N-1, LANES per cycle
+            if (read_counter < cycles) begin
+                out_valid <= 1'b1;
+                read_counter <= read_counter + 1'b1;
+            end else begin
+                // Frame complete: reset for next FFT
+                out_valid <= 1'b0;
+                read_counter <= 12'd0;
+            end
+        end else begin
+            out_valid <= 1'b0;
+        end
+    end
+
+endmodule
\ No newline at end of file
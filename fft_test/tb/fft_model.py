@@ -0,0 +1,361 @@
+# fft_model.py
+# Bit-accurate golden model of the fft_multipoint datapath (Q15, radix-2 DIF).
+#
+# Per stage s (0 .. log2(N)-1), on pairs (a, b) that are N >> (s+1) samples apart:
+#   y0 = complex_add(a, b)
+#   y1 = complex_mult(complex_sub(a, b), W)   (bf_rdx2, W from twiddle_2048_*.hex)
+#   y1 = complex_sub(a, b)                    (last stage, bf_rdx2_noW)
+# W for index k of stage s is W_N^(k * 2^s), i.e. ROM address k * 2^s * (2048 / N).
+# The pipeline emits bit-reversed order; reorder.v restores natural order.
+#
+# Arithmetic follows complex_arithmetic_param.v:
+#   add/sub: 17-bit result, saturated to 16 bits
+#   mult:    33-bit ac - bd / ad + bc, >>> 15 (floor) into 17 bits, saturated to 16 bits
+# saturation modes:
+#   'rtl':   (default) saturate_16bit({2'b0, x}) as written -- the 17-bit result is zero-extended, so every
+#            negative result (and every positive overflow) becomes 0x7FFF; this is what the shipped RTL computes
+#   'ideal': two's complement clamp to [-32768, 32767]; opt in to model the intended (fixed) saturation
+#
+# Saturation instrumentation: pass stats=SaturationStats() to fft()/fft_r22() to count saturated
+# results per stage, operation, butterfly slot and frame, with histograms of pre-saturation magnitudes.
+# Counters are aggregated per call (a few numpy reductions per stage, about doubling the model's run
+# time), not logged per event.
+import os
+
+import numpy as np
+
+MAX_N = 2048
+SIZES = [8, 16, 32, 64, 128, 256, 512, 1024, 2048]
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def np_code(N):
+    """FFT size -> np input of fft_multipoint (0 -> 8, ..., 8 -> 2048)"""
+    return int(N).bit_length() - 4
+
+
+def twiddles(max_n=MAX_N):
+    """Q15 twiddle ROM contents, same formula as gen_twiddle.py"""
+    k = np.arange(max_n // 2)
+    angle = 2 * np.pi * k / max_n
+    re = np.clip(np.round(np.cos(angle) * 32767), -32768, 32767).astype(np.int64)
+    im = np.clip(np.round(-np.sin(angle) * 32767), -32768, 32767).astype(np.int64)
+    return re, im
+
+
+def load_twiddles(directory=HERE, max_n=MAX_N):
+    """Twiddle ROM from twiddle_{max_n}_re/im.hex, falling back to twiddles() if the files are missing"""
+    try:
+        re = read_hex(os.path.join(directory, f'twiddle_{max_n}_re.hex'))
+        im = read_hex(os.path.join(directory, f'twiddle_{max_n}_im.hex'))
+    except OSError:
+        return twiddles(max_n)
+    return re, im
+
+
+def wrap(v, width):
+    """Keep the low width bits as a signed value"""
+    half = 1 << (width - 1)
+    return ((np.asarray(v, dtype=np.int64) + half) & ((1 << width) - 1)) - half
+
+
+def saturate(v, mode='rtl', record=None):
+    """
+    17-bit signed result -> 16 bits (see the mode description above)
+
+    record: optional callable(v, result), e.g. SaturationStats.recorder()
+    """
+    if mode == 'ideal':
+        out = np.clip(v, -32768, 32767)
+    elif mode == 'rtl':
+        u = np.asarray(v, dtype=np.int64) & 0x1FFFF
+        out = np.where(u > 32767, 32767, u)
+    else:
+        raise ValueError(f'unknown saturation mode {mode!r}')
+    if record is not None:
+        record(v, out)
+    return out
+
+
+def complex_add(x0_re, x0_im, x1_re, x1_im, mode='rtl', record=None):
+    return saturate(x0_re + x1_re, mode, record), saturate(x0_im + x1_im, mode, record)
+
+
+def complex_sub(x0_re, x0_im, x1_re, x1_im, mode='rtl', record=None):
+    return saturate(x0_re - x1_re, mode, record), saturate(x0_im - x1_im, mode, record)
+
+
+def complex_mult(x0_re, x0_im, x1_re, x1_im, mode='rtl', record=None):
+    re = wrap((x0_re * x1_re - x0_im * x1_im) >> 15, 17)
+    im = wrap((x0_re * x1_im + x0_im * x1_re) >> 15, 17)
+    return saturate(re, mode, record), saturate(im, mode, record)
+
+
+def bitrev(n_bits):
+    """Bit-reversal permutation of 0 .. 2^n_bits - 1"""
+    idx = np.arange(1 << n_bits)
+    rev = np.zeros_like(idx)
+    for b in range(n_bits):
+        rev |= ((idx >> b) & 1) << (n_bits - 1 - b)
+    return rev
+
+
+# bit length of |v| for every 17-bit magnitude (the widest pre-saturation value)
+_BIT_LENGTH = np.frexp(np.arange((1 << 17) + 1))[1].astype(np.intp)
+
+
+class SaturationStats:
+    """
+    Saturation counters aggregated over any number of fft()/fft_r22() calls of one FFT size
+
+    Stages are numbered in processing order (0 = first stage after the input), operations are
+    'add', 'sub', 'mult' and 'neg' (the -j rotation of fft_r22). re and im count separately.
+      events[stage, op]:  saturated results
+      totals[stage, op]:  results passed through the saturation
+      slots[stage, slot]: saturated results per butterfly slot (N/2 per stage), all operations
+      hist[stage, b]:     pre-saturation magnitudes |v| of bit length b (0 .. 17), all operations
+      frame_events():     saturated results per frame, in call order
+    A result counts as saturated when the saturation changed it; in 'rtl' mode that includes every
+    negative result, which is what the hardware does.
+    """
+
+    OPS = ('add', 'sub', 'mult', 'neg')
+    BINS = 18
+
+    def __init__(self):
+        self.N = None
+
+    def begin(self, N, frames):
+        """Start one model call on (frames, N) inputs"""
+        if self.N is None:
+            stages = N.bit_length() - 1
+            self.N = N
+            self.events = np.zeros((stages, len(self.OPS)), dtype=np.int64)
+            self.totals = np.zeros((stages, len(self.OPS)), dtype=np.int64)
+            self.slots = np.zeros((stages, N // 2), dtype=np.int64)
+            self.hist = np.zeros((stages, self.BINS), dtype=np.int64)
+            self._frames = []
+        elif N != self.N:
+            raise ValueError(f'statistics collected for N={self.N}, got N={N}')
+        self._frames.append(np.zeros(frames, dtype=np.int64))
+
+    def recorder(self, stage, op, slot=None):
+        """
+        record callable for saturate()
+
+        slot: butterfly slot of each per-frame element, default element i -> slot i
+        """
+        o = self.OPS.index(op)
+        frame = self._frames[-1]
+
+        def record(v, out):
+            v = np.asarray(v).reshape(len(frame), -1)
+            sat = np.asarray(out).reshape(v.shape) != v
+            per_slot = sat.sum(axis=0)
+            self.events[stage, o] += per_slot.sum()
+            self.totals[stage, o] += v.size
+            if slot is None:
+                self.slots[stage, :len(per_slot)] += per_slot
+            else:
+                self.slots[stage] += np.bincount(slot, weights=per_slot, minlength=self.N // 2).astype(np.int64)
+            frame[:] += sat.sum(axis=1)
+            self.hist[stage] += np.bincount(_BIT_LENGTH.take(np.abs(v).ravel()), minlength=self.BINS)
+        return record
+
+    def frame_events(self):
+        return np.concatenate(self._frames) if self.N is not None else np.zeros(0, dtype=np.int64)
+
+    def merge(self, other):
+        """Add the counters of another SaturationStats (e.g. from a worker process) to this one"""
+        if other.N is None:
+            return self
+        if self.N is None:
+            self.begin(other.N, 0)
+            self._frames = []
+        elif other.N != self.N:
+            raise ValueError(f'cannot merge statistics for N={other.N} into N={self.N}')
+        self.events += other.events
+        self.totals += other.totals
+        self.slots += other.slots
+        self.hist += other.hist
+        self._frames.extend(other._frames)
+        return self
+
+    def summary(self):
+        """Per-stage rows: {'stage', 'events', 'rate', <op>: events, 'hist'}"""
+        rows = []
+        for s in range(len(self.events)):
+            row = {'stage': s, 'events': int(self.events[s].sum()),
+                   'rate': float(self.events[s].sum() / max(self.totals[s].sum(), 1))}
+            row.update({op: int(self.events[s, o]) for o, op in enumerate(self.OPS)})
+            row['hist'] = self.hist[s].tolist()
+            rows.append(row)
+        return rows
+
+    def table(self):
+        """Printable per-stage summary; '>15b' counts pre-saturation magnitudes beyond 15 bits"""
+        lines = [f"{'stage':>5} " + ' '.join(f'{op:>8}' for op in self.OPS) + f" {'rate':>9} {'>15b':>8}"]
+        for row in self.summary():
+            lines.append(f"{row['stage']:5d} " + ' '.join(f'{row[op]:8d}' for op in self.OPS) +
+                         f" {row['rate']:9.2e} {sum(row['hist'][16:]):8d}")
+        frames = self.frame_events()
+        lines.append(f'{len(frames)} frames, {int((frames > 0).sum())} with saturation')
+        return '\n'.join(lines)
+
+
+def fft(x_re, x_im, mode='rtl', rom=None, stats=None):
+    """
+    Fixed-point FFT of one or more frames
+
+    x_re, x_im: (..., N) signed 16-bit integers
+    rom: (re, im) twiddle ROM, default load_twiddles()
+    stats: SaturationStats to accumulate saturation counters into, default off
+
+    returns (y_re, y_im) in natural order, int64 arrays of the same shape
+    """
+    re = np.asarray(x_re, dtype=np.int64)
+    im = np.asarray(x_im, dtype=np.int64)
+    shape = re.shape
+    N = shape[-1]
+    stages = N.bit_length() - 1
+    if N < 2 or N & (N - 1) or N > MAX_N:
+        raise ValueError(f'N must be a power of two up to {MAX_N}, got {N}')
+    w_re, w_im = rom if rom is not None else load_twiddles()
+    max_n = 2 * len(w_re)
+    re = re.reshape(-1, N)
+    im = im.reshape(-1, N)
+    if stats is not None:
+        stats.begin(N, len(re))
+    for s in range(stages):
+        rec = {op: stats.recorder(s, op) for op in ('add', 'sub', 'mult')} if stats is not None else {}
+        half = N >> (s + 1)
+        a_re, b_re = re.reshape(-1, 1 << s, 2, half).transpose(2, 0, 1, 3)
+        a_im, b_im = im.reshape(-1, 1 << s, 2, half).transpose(2, 0, 1, 3)
+        y0 = complex_add(a_re, a_im, b_re, b_im, mode, rec.get('add'))
+        y1 = complex_sub(a_re, a_im, b_re, b_im, mode, rec.get('sub'))
+        if s < stages - 1:
+            addr = np.arange(half) * ((1 << s) * (max_n // N))
+            y1 = complex_mult(y1[0], y1[1], w_re[addr], w_im[addr], mode, rec.get('mult'))
+        re = np.stack([y0[0], y1[0]], axis=2).reshape(-1, N)
+        im = np.stack([y0[1], y1[1]], axis=2).reshape(-1, N)
+    order = bitrev(stages)
+    return re[:, order].reshape(shape), im[:, order].reshape(shape)
+
+
+def negate(v, record=None):
+    """-v with saturation (-(-32768) -> 32767)"""
+    v = np.asarray(v, dtype=np.int64)
+    out = np.where(v == -32768, 32767, -v)
+    if record is not None:
+        record(-v, out)
+    return out
+
+
+def fft_r22(x_re, x_im, mode='rtl', rom=None, stats=None):
+    """
+    Fixed-point FFT through the radix-2^2 SDF pipeline of gen_fft_r22sdf.py, in stream order
+
+    Stage k (k = log2(N)-1 .. 0) is an SDF butterfly on samples 2^k apart. Odd k: BF2I.
+    Even k: BF2II, the input is multiplied by -j ((re, im) -> (im, -re)) where stream index bits
+    [k+1:k] are both set, and for k >= 2 it is followed by a twiddle stage:
+        W_(2^(k+2))^(m * e), m = index bits [k-1:0], e = bit-reversed index bits [k+1:k]
+    taken from the 2048-point ROM (negated past a half turn) and skipped when the exponent is 0.
+    With odd log2(N) the top stage has no partner; bit k+1 is then always 0, which makes it a plain
+    radix-2 DIF stage with twiddle W_N^m.
+    The multi-lane variants (gen_fft_r22sdf.py --lanes 2/4) perform the same operations on the same
+    stream positions, so this is also their golden model.
+    stats: SaturationStats, as for fft()
+
+    returns (y_re, y_im) in natural order
+    """
+    re = np.asarray(x_re, dtype=np.int64)
+    im = np.asarray(x_im, dtype=np.int64)
+    shape = re.shape
+    N = shape[-1]
+    stages = N.bit_length() - 1
+    if N < 2 or N & (N - 1) or N > MAX_N:
+        raise ValueError(f'N must be a power of two up to {MAX_N}, got {N}')
+    w_re, w_im = rom if rom is not None else load_twiddles()
+    rom_bits = (2 * len(w_re)).bit_length() - 1
+    re = re.reshape(-1, N).copy()
+    im = im.reshape(-1, N).copy()
+    s = np.arange(N)
+    if stats is not None:
+        stats.begin(N, len(re))
+    for k in range(stages - 1, -1, -1):
+        D = 1 << k
+        q = (s >> k) & 3
+        # butterfly slot of each stream position (same for the stage's inputs and outputs)
+        slot = ((s >> (k + 1)) << k) | (s & (D - 1))
+        rec = {}
+        if stats is not None:
+            stage = stages - 1 - k
+            rec = {op: stats.recorder(stage, op) for op in ('add', 'sub')}
+            rec['neg'] = stats.recorder(stage, 'neg', slot[q == 3])
+        if k % 2 == 0:
+            rot = q == 3
+            re[:, rot], im[:, rot] = im[:, rot], negate(re[:, rot], rec.get('neg'))
+        a_re, b_re = re.reshape(-1, N // (2 * D), 2, D).transpose(2, 0, 1, 3)
+        a_im, b_im = im.reshape(-1, N // (2 * D), 2, D).transpose(2, 0, 1, 3)
+        y0 = complex_add(a_re, a_im, b_re, b_im, mode, rec.get('add'))
+        y1 = complex_sub(a_re, a_im, b_re, b_im, mode, rec.get('sub'))
+        re = np.stack([y0[0], y1[0]], axis=2).reshape(-1, N)
+        im = np.stack([y0[1], y1[1]], axis=2).reshape(-1, N)
+        if k % 2 == 0 and k >= 2:
+            e = ((q & 1) << 1) | (q >> 1)
+            z = ((s & (D - 1)) * e << rom_bits) >> (k + 2)
+            half = len(w_re)
+            neg = z >= half
+            addr = z % half
+            t_re = np.where(neg, -w_re[addr], w_re[addr])
+            t_im = np.where(neg, -w_im[addr], w_im[addr])
+            # z == 0 bypasses the multiplier
+            rotate = z != 0
+            if stats is not None:
+                rec['mult'] = stats.recorder(stages - 1 - k, 'mult', slot[rotate])
+            re[:, rotate], im[:, rotate] = complex_mult(re[:, rotate], im[:, rotate], t_re[rotate], t_im[rotate],
+                                                        mode, rec.get('mult'))
+    order = bitrev(stages)
+    return re[:, order].reshape(shape), im[:, order].reshape(shape)
+
+
+# golden model per RTL architecture
+ARCHS = {'r2sdf': fft, 'r22sdf': fft_r22}
+
+
+def sqnr(y_re, y_im, ref):
+    """SQNR (dB) of fixed-point outputs against a complex reference in the same units"""
+    err = (np.asarray(y_re) - ref.real) ** 2 + (np.asarray(y_im) - ref.imag) ** 2
+    power = np.abs(ref) ** 2
+    return 10 * np.log10(power.sum() / max(err.sum(), 1e-30))
+
+
+_HEX = np.array([list(f'{v:04x}\n'.encode()) for v in range(1 << 16)], dtype=np.uint8)
+
+
+def write_hex(filename, values):
+    """Signed 16-bit values -> $readmemh file, one 4-digit word per line, written in one call"""
+    v = np.asarray(values, dtype=np.int64).ravel() & 0xFFFF
+    with open(filename, 'wb') as file:
+        file.write(_HEX[v].tobytes())
+
+
+def read_hex(filename):
+    """$readmemh-style file (or the tb's "0x...." output) -> signed 16-bit int64 array"""
+    with open(filename, 'r') as file:
+        words = file.read().split()
+    v = np.array([int(w, 16) for w in words if not w.startswith('//')], dtype=np.int64)
+    return v - ((v >> 15) << 16)
+
+
+# main
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    print(f"{'N':>5} " + ' '.join(f'{arch + "(dB)":>12}' for arch in ARCHS))
+    for N in SIZES:
+        # scaled so that no stage saturates: |x| * N < 32768; 'ideal' checks the arithmetic against a float FFT
+        amp = 32767 // N
+        x_re = rng.integers(-amp, amp + 1, (64, N))
+        x_im = rng.integers(-amp, amp + 1, (64, N))
+        ref = np.fft.fft(x_re + 1j * x_im)
+        print(f'{N:5d} ' + ' '.join(f'{sqnr(*model(x_re, x_im, "ideal"), ref):12.2f}' for model in ARCHS.values()))
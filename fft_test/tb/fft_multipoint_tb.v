@@ -1,45 +1,89 @@
 `timescale 1ns / 1ps
 
+// Runtime configuration (plusargs), so one build covers every FFT size:
+//   +np=<0..8>          FFT size code, 0 -> 8 ... 8 -> 2048 (default 8)
+//   +frames=<n>         frames in the input files, fed one after another (default 1)
+//   +in_re=<file>       input hex, one word per line (default ./fft2048_random_input_re.txt)
+//   +in_im=<file>
+//   +out_re=<file>      output hex, one two's complement word per line (default ../result/fft_output_re.txt)
+//   +out_im=<file>
+// The DUT defaults to fft_multipoint; define FFT_TOP to test another core with the same ports
+// (e.g. +define+FFT_TOP=fft_r22sdf, see ../src/gen_fft_r22sdf.py), and FFT_LANES for cores taking
+// several samples per cycle (lane j on bits [16*j +: 16], samples i*FFT_LANES + j of the frame).
+
+`ifndef FFT_TOP
+`define FFT_TOP fft_multipoint
+`endif
+`ifndef FFT_LANES
+`define FFT_LANES 1
+`endif
+
 module fft_multipoint_tb();
 
-  parameter N = 2048;
+  parameter MAX_N = 2048;
+  parameter MAX_FRAMES = 256;
+  parameter LANES = `FFT_LANES;
   localparam CLK_PERIOD = 12;
 
   reg clk, rst_n;
-  reg [15:0] x_re;
-  reg [15:0] x_im;
-  reg [1:0] np;
+  reg [16*LANES-1:0] x_re;
+  reg [16*LANES-1:0] x_im;
+  reg [3:0] np;
   reg stb;
   reg sop_in;
   wire valid_out;
-  wire sop_out; 
-  wire [15:0] y_re;
-  wire [15:0] y_im;
+  wire sop_out;
+  wire [16*LANES-1:0] y_re;
+  wire [16*LANES-1:0] y_im;
+
+  integer N;
+  integer frames;
+  integer n_out;
+  string in_re_file  = "./fft2048_random_input_re.txt";
+  string in_im_file  = "./fft2048_random_input_im.txt";
+  string out_re_file = "../result/fft_output_re.txt";
+  string out_im_file = "../result/fft_output_im.txt";
 
-  reg [15:0] fft_input_re [0:N-1];
-  reg [15:0] fft_input_im [0:N-1];
+  reg [15:0] fft_input_re [0:MAX_N*MAX_FRAMES-1];
+  reg [15:0] fft_input_im [0:MAX_N*MAX_FRAMES-1];
+
+  integer np_arg;
   initial begin
-    $readmemh("./fft512_input_re.txt", fft_input_re);
-    $readmemh("./fft512_input_im.txt", fft_input_im);
+    np_arg = 8;
+    frames = 1;
+    void'($value$plusargs("np=%d", np_arg));
+    void'($value$plusargs("frames=%d", frames));
+    void'($value$plusargs("in_re=%s", in_re_file));
+    void'($value$plusargs("in_im=%s", in_im_file));
+    void'($value$plusargs("out_re=%s", out_re_file));
+    void'($value$plusargs("out_im=%s", out_im_file));
+    np = np_arg;
+    N = 8 << np_arg;
+    if (frames > MAX_FRAMES || N > MAX_N) begin
+      $display("ERROR: %0d frames of %0d points exceed MAX_FRAMES=%0d / MAX_N=%0d", frames, N, MAX_FRAMES, MAX_N);
+      $finish();
+    end
+    $readmemh(in_re_file, fft_input_re, 0, N*frames-1);
+    $readmemh(in_im_file, fft_input_im, 0, N*frames-1);
   end
 
   integer fft_output_re;
   integer fft_output_im;
   initial begin
-    fft_output_re = $fopen("../result/fft_output_re.txt", "w"); 
-    fft_output_im = $fopen("../result/fft_output_im.txt", "w");
-    forever begin
-      @(posedge clk);
-      if(valid_out) begin
-        if(y_re[15])
-            $fwrite(fft_output_re, "0x%h ", -$signed(y_re));
-        else
-          $fwrite(fft_output_re, "0x%h ", y_re);
-        if(y_im[15])
-            $fwrite(fft_output_im, "0x%h ", -$signed(y_im));
-        else
-          $fwrite(fft_output_im, "0x%h ", y_im);
+    n_out = 0;
+    #1;
+    fft_output_re = $fopen(out_re_file, "w");
+    fft_output_im = $fopen(out_im_file, "w");
+  end
+
+  integer lane;
+  always @(posedge clk) begin
+    if(valid_out) begin
+      for(lane=0; lane<LANES; lane=lane+1) begin
+        $fwrite(fft_output_re, "%h\n", y_re[16*lane +: 16]);
+        $fwrite(fft_output_im, "%h\n", y_im[16*lane +: 16]);
       end
+      n_out = n_out + LANES;
     end
   end
 
@@ -48,7 +92,7 @@ module fft_multipoint_tb();
     forever #(CLK_PERIOD/2) clk = ~clk;
   end
 
-  integer i;
+  integer i, j, f, wait_cycles;
   initial begin
     `ifdef DEBUG
     `ifdef FSDB
@@ -60,44 +104,47 @@ module fft_multipoint_tb();
 
     // reset and clk
     rst_n <= 1'b0;
-    np <= 2'b11;
     stb <= 1'b0;
     sop_in <= 1'b0;
-    x_re <= 16'h0;
-    x_im <= 16'h0;
+    x_re <= 0;
+    x_im <= 0;
 
     repeat (2) @(posedge clk);
     rst_n <= 1;
     repeat (3) @(posedge clk);
 
-    stb <= 1'b1;
-    sop_in <= 1'b1;
-    x_re <= fft_input_re[0];
-    x_im <= fft_input_im[0];
-    @(posedge clk);
-    sop_in <= 1'b0;
-    for(i=1; i<N; i=i+1) begin
-      x_re <= $signed(fft_input_re[i]);
-      x_im <= $signed(fft_input_im[i]);
-      @(posedge clk);
-    end
-    stb <= 1'b0;
+    for(f=0; f<frames; f=f+1) begin
+      stb <= 1'b1;
+      sop_in <= 1'b1;
+      for(i=0; i<N; i=i+LANES) begin
+        for(j=0; j<LANES; j=j+1) begin
+          x_re[16*j +: 16] <= fft_input_re[f*N+i+j];
+          x_im[16*j +: 16] <= fft_input_im[f*N+i+j];
+        end
+        @(posedge clk);
+        sop_in <= 1'b0;
+      end
+      stb <= 1'b0;
 
-    repeat ((N*3/2-1)+N) @(posedge clk);
+      // wait for this frame's N outputs, bounded in case the pipeline never asserts valid_out
+      wait_cycles = 0;
+      while (n_out < (f+1)*N && wait_cycles < (N*3/2-1)+2*N+64) begin
+        @(posedge clk);
+        wait_cycles = wait_cycles + 1;
+      end
+      repeat (4) @(posedge clk);
+    end
 
+    if (n_out != frames*N)
+      $display("WARNING: expected %0d outputs, got %0d", frames*N, n_out);
     $fclose(fft_output_re);
+    $fclose(fft_output_im);
     $finish();
   end
 
-  always @(posedge clk) begin
-    if(valid_out) begin
-      $display("%h", y_re);
-    end
-  end
-
-  fft_multipoint u_fft_multipoint (
+  `FFT_TOP u_fft_multipoint (
     .clk(clk),
-    .rst_n(rst_n),  
+    .rst_n(rst_n),
     .np(np),
     .stb(stb),
     .sop_in(sop_in),
@@ -0,0 +1,114 @@
+# gen_vectors.py
+# Test vectors for fft_multipoint_tb: input hex and expected-output hex from fft_model.py
+# for every FFT size from 8 to 2048, for either pipeline architecture (fft_model.ARCHS).
+#
+# Files (one 4-digit $readmemh word per line, frames back to back):
+#   vectors/fft{N}_{set}_input_re.txt / _input_im.txt
+#   vectors/fft{N}_{set}_expected_re.txt / _expected_im.txt   (natural order)
+#   vectors/index.json: {"mode", "arch", "seed",
+#                        "vectors": [{"N", "np", "set", "frames", "prefix", "saturated", "saturated_frames"}, ...]}
+# saturated / saturated_frames: saturation events / frames with at least one event in the golden model
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from fft_model import ARCHS, SIZES, SaturationStats, load_twiddles, np_code, write_hex
+
+
+def impulse(N, frames, rng):
+    """Unit impulses at n = frame index mod N, amplitude 0x7fff and -0x8000 alternating"""
+    x = np.zeros((frames, N), dtype=np.int64)
+    x[np.arange(frames), np.arange(frames) % N] = np.where(np.arange(frames) % 2, -32768, 32767)
+    return x, np.zeros_like(x)
+
+
+def tone(N, frames, rng):
+    """Bin-centred complex tones at random bins, scaled so the N-point sum stays below full scale"""
+    k = rng.integers(0, N, frames)[:, None]
+    amp = 32767 / N
+    phase = 2 * np.pi * k * np.arange(N) / N + rng.uniform(0, 2 * np.pi, (frames, 1))
+    return np.round(amp * np.cos(phase)).astype(np.int64), np.round(amp * np.sin(phase)).astype(np.int64)
+
+
+def random(N, frames, rng):
+    """Uniform random samples scaled to avoid any saturation (|x| * N < 32768)"""
+    amp = 32767 // N
+    return rng.integers(-amp, amp + 1, (frames, N)), rng.integers(-amp, amp + 1, (frames, N))
+
+
+def full_scale(N, frames, rng):
+    """Uniform random samples over the full Q15 range (saturates from the first stage on)"""
+    return rng.integers(-32768, 32768, (frames, N)), rng.integers(-32768, 32768, (frames, N))
+
+
+def corners(N, frames, rng):
+    """Saturation corners: all +max, all -max, alternating +/-max, +max re with -max im, and mixes thereof"""
+    n = np.arange(N)
+    patterns = [
+        (np.full(N, 32767), np.full(N, 32767)),
+        (np.full(N, -32768), np.full(N, -32768)),
+        (np.where(n % 2, -32768, 32767), np.where(n % 2, 32767, -32768)),
+        (np.full(N, 32767), np.full(N, -32768)),
+        (np.where(n < N // 2, 32767, -32768), np.zeros(N, dtype=np.int64)),
+    ]
+    idx = np.arange(frames) % len(patterns)
+    return (np.stack([patterns[i][0] for i in idx]).astype(np.int64),
+            np.stack([patterns[i][1] for i in idx]).astype(np.int64))
+
+
+VECTOR_SETS = {'impulse': impulse, 'tone': tone, 'random': random, 'full_scale': full_scale, 'corners': corners}
+
+
+def generate(sizes=SIZES, sets=tuple(VECTOR_SETS), frames=16, out_dir='vectors', mode='rtl', seed=0,
+             arch='r2sdf'):
+    """
+    Write input and expected-output files for every (N, set)
+
+    mode: saturation model for the expected outputs, 'rtl' (matches the shipped RTL) or 'ideal'
+    arch: golden model for the expected outputs, 'r2sdf' (fft_multipoint) or 'r22sdf' (fft_r22sdf)
+
+    returns the index entries
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rom = load_twiddles()
+    model = ARCHS[arch]
+    index = []
+    for N in sizes:
+        for s, name in enumerate(sets):
+            rng = np.random.default_rng([seed, N, s])
+            x_re, x_im = VECTOR_SETS[name](N, frames, rng)
+            stats = SaturationStats()
+            y_re, y_im = model(x_re, x_im, mode, rom, stats)
+            prefix = f'fft{N}_{name}'
+            write_hex(os.path.join(out_dir, f'{prefix}_input_re.txt'), x_re)
+            write_hex(os.path.join(out_dir, f'{prefix}_input_im.txt'), x_im)
+            write_hex(os.path.join(out_dir, f'{prefix}_expected_re.txt'), y_re)
+            write_hex(os.path.join(out_dir, f'{prefix}_expected_im.txt'), y_im)
+            index.append({'N': N, 'np': np_code(N), 'set': name, 'frames': frames, 'prefix': prefix,
+                          'saturated': int(stats.events.sum()),
+                          'saturated_frames': int((stats.frame_events() > 0).sum())})
+    with open(os.path.join(out_dir, 'index.json'), 'w') as file:
+        json.dump({'mode': mode, 'arch': arch, 'seed': seed, 'vectors': index}, file, indent=1)
+    return index
+
+
+# main
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate fft_multipoint test vectors and expected outputs')
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('-s', '--sets', nargs='+', default=list(VECTOR_SETS), choices=list(VECTOR_SETS))
+    parser.add_argument('-f', '--frames', type=int, default=16, help='frames per (N, set)')
+    parser.add_argument('-o', '--out-dir', default='vectors')
+    parser.add_argument('--mode', choices=['ideal', 'rtl'], default='rtl',
+                        help="saturation model for the expected outputs (see fft_model.py); 'rtl' matches the "
+                             "shipped RTL, 'ideal' the intended two's complement clamp")
+    parser.add_argument('--arch', choices=list(ARCHS), default='r2sdf', help='golden model for the expected outputs')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.time()
+    index = generate(args.sizes, args.sets, args.frames, args.out_dir, args.mode, args.seed, args.arch)
+    print(f'{len(index)} vector sets, {args.frames} frames each: {time.time() - start:.2f}s')